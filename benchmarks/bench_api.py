@@ -0,0 +1,105 @@
+"""
+HTTP API 的負載測試：啟動 cat_api.py (uvicorn)，以 asyncio 開多條 keep-alive 連線持續送出請求，
+量測每秒請求數 (與每秒計算筆數) 以及 p50 / p99 延遲。
+客戶端與伺服器跑在同一台機器上 (會互相搶 CPU)，只用標準函式庫的 asyncio 實作簡單的 HTTP/1.1 客戶端。
+
+用法: python benchmarks/bench_api.py [--connections 32] [--duration 10] [--workers 1] [--batch 1 100]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "der": {"weight_kg": 4.0, "age_months": 24, "is_neutered": True, "bcs": 5},
+    "plan": {"der": 237.6, "wet_food_percentage": 50, "dry_food_kcal_per_1000g": 3600, "wet_food_kcal_per_100g": 100},
+    "report": {"weight": 4.0, "age_years": 2, "dry_food_grams": 50, "wet_food_grams": 80},
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def request(reader, writer, path, body):
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    status = await reader.readline()
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    if b" 200 " not in status:
+        raise RuntimeError(f"HTTP 錯誤: {status!r}")
+
+
+async def worker(port, path, body, deadline, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await request(reader, writer, path, body)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def load(port, path, body, connections, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(worker(port, path, body, deadline, latencies) for _ in range(connections)))
+    return latencies
+
+
+def wait_ready(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("API 伺服器沒有啟動")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=32, help="同時連線數")
+    parser.add_argument("--duration", type=float, default=10, help="每項測試的秒數")
+    parser.add_argument("--workers", type=int, default=1, help="伺服器工作行程數")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 100], help="每個請求的筆數 (1 為單筆物件)")
+    parser.add_argument("--endpoints", nargs="+", choices=CASES, default=list(CASES), help="測試的端點")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "cat_api.py"), "--port", str(port),
+                               "--workers", str(args.workers)], cwd=ROOT)
+    try:
+        wait_ready(port)
+        print(f"連線數 {args.connections}，每項 {args.duration:g} 秒，伺服器 {args.workers} 個行程，CPU {os.cpu_count()} 核")
+        print(f"{'端點':<10}{'每請求筆數':>10}{'請求/秒':>10}{'筆/秒':>10}{'p50':>10}{'p99':>10}")
+        for endpoint in args.endpoints:
+            for batch in args.batch:
+                payload = CASES[endpoint] if batch == 1 else [CASES[endpoint]] * batch
+                body = json.dumps(payload).encode()
+                latencies = asyncio.run(load(port, f"/v1/{endpoint}", body, args.connections, args.duration))
+                rps = len(latencies) / args.duration
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(f"{endpoint:<10}{batch:>10}{rps:>10,.0f}{rps * batch:>10,.0f}"
+                      f"{quantiles[49] * 1e3:8.1f}ms{quantiles[98] * 1e3:8.1f}ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+第一步 BCS 指南圖示 (cat_bcs_guide) 的效能測試：
+    - 預先產生的圖檔大小 (每個寬度與格式，四個 BCS 分級的平均)，以及第一步實際送出的圖示大小；
+    - 取得圖示的時間：行程中第一次 (讀檔 + base64) 與之後 (快取)；
+    - 對照：以 st.image 顯示最大的 PNG (寬度 GUIDE_DISPLAY_WIDTH)，Streamlit 每次重跑都要解碼、縮小、重新編碼，
+      且第一次使用時要匯入 NumPy 與 Pillow (以子行程量測)。
+
+用法: python benchmarks/bench_bcs_guide.py [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cat_bcs_guide  # noqa: E402
+from cat_bcs_guide import (GUIDE_DISPLAY_WIDTH, GUIDE_FORMATS, GUIDE_WIDTHS, asset_path, guide_data_uri,  # noqa: E402
+                           variant_width)
+from cat_images import BCS_CLASSES  # noqa: E402
+
+ST_IMAGE_IMPORTS = "import time; t = time.perf_counter(); import numpy, PIL.Image; print(time.perf_counter() - t)"
+
+
+def timed(func, *args, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="每項量測的重複次數")
+    args = parser.parse_args()
+
+    classes = [low for low, *_ in BCS_CLASSES]
+    if not all(os.path.exists(asset_path(bcs, w, fmt)) for bcs in classes for w in GUIDE_WIDTHS for fmt in GUIDE_FORMATS):
+        sys.exit("找不到指南圖檔，請先執行 python cat_bcs_guide.py")
+
+    print("圖檔大小 (四個分級的平均):")
+    for width in GUIDE_WIDTHS:
+        sizes = {fmt: statistics.mean(os.path.getsize(asset_path(bcs, width, fmt)) for bcs in classes) for fmt in GUIDE_FORMATS}
+        print(f"  {width:4d}px  " + "  ".join(f"{fmt} {size / 1e3:5.1f} KB" for fmt, size in sizes.items()))
+    served = statistics.mean(len(guide_data_uri(bcs)) for bcs in classes)
+    print(f"第一步送出: {variant_width()}px webp (顯示寬度 {GUIDE_DISPLAY_WIDTH}px)，data URI 平均 {served / 1e3:.1f} KB")
+
+    cold = []
+    for bcs in classes:
+        cat_bcs_guide._data_uri.cache_clear()
+        cold.append(timed(guide_data_uri, bcs))
+    warm = timed(guide_data_uri, classes[1], repeat=args.repeat)
+    print(f"取得圖示: 行程中第一次 {statistics.median(cold) * 1e3:.3f} ms，之後 {warm * 1e6:.2f} µs")
+
+    imports = float(subprocess.run([sys.executable, "-c", ST_IMAGE_IMPORTS], capture_output=True, text=True, check=True).stdout)
+    from streamlit.elements.lib.image_utils import image_to_url
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+
+    largest = asset_path(classes[1], max(GUIDE_WIDTHS), "png")
+    layout = LayoutConfig(width=GUIDE_DISPLAY_WIDTH)
+    per_rerun = timed(image_to_url, largest, layout, False, "RGB", "auto", "bcs_guide", repeat=args.repeat)
+    print(f"對照 st.image ({max(GUIDE_WIDTHS)}px PNG 顯示為 {GUIDE_DISPLAY_WIDTH}px): 每次重跑 {per_rerun * 1e3:.2f} ms，"
+          f"第一次另需匯入 NumPy + Pillow {imports * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+快取效益測試：比較直接計算與經過 TTLCache 查表 (命中) 的單次成本。
+
+用法: python benchmarks/bench_cache.py [--number 200000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_cache import TTLCache, cached_text_report, memoize  # noqa: E402
+from cat_core import (analyze_intake, calculate_der, generate_text_report, normalize_cat_inputs,  # noqa: E402
+                      run_pipeline)
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cat = normalize_cat_inputs({"weight": 4, "age_years": 2, "dry_food_grams": 50, "wet_food_grams": 80})
+    result = run_pipeline(cat, include_report=False)
+    report_args = (result["cat_info"], result["der_info"], result["intake_analysis"],
+                   result["monthly_cost_info"], result["feeding_plan"])
+    der_args = (4.0, 24, True, 5)
+    intake_args = (237.59, 50.0, 3600.0, 80.0, 100.0)
+    cached_der = memoize(TTLCache())(calculate_der)
+    cached_intake = memoize(TTLCache())(analyze_intake)
+
+    cases = [
+        ("generate_text_report", lambda: generate_text_report(*report_args), lambda: cached_text_report(*report_args)),
+        ("calculate_der", lambda: calculate_der(*der_args), lambda: cached_der(*der_args)),
+        ("analyze_intake", lambda: analyze_intake(*intake_args), lambda: cached_intake(*intake_args)),
+    ]
+    print(f"{'函數':<22}{'直接計算':>10}{'快取命中':>10}")
+    for name, direct, cached in cases:
+        print(f"{name:<24}{per_call_us(direct, args.number):8.2f} us{per_call_us(cached, args.number):8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
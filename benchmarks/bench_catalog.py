@@ -0,0 +1,60 @@
+"""
+商品資料庫搜尋速度測試：以隨機產生的 N 筆商品 (預設 10 萬筆) 建立 ProductCatalog，
+量測載入時間與各種查詢 (短前綴、trigram 子字串、多關鍵字、限定乾食/濕食) 的延遲。
+
+用法: python benchmarks/bench_catalog.py [--products 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_catalog import ProductCatalog  # noqa: E402
+
+BRANDS = ["Kuro Select", "Shiro Farm", "Mochi Pet", "Nori Kitchen", "Tama House", "Sora Feline", "Hana Nutrition",
+          "皇家喵", "森林貓", "海洋廚房", "小黑家", "月光貓糧"]
+PROTEINS = ["雞肉", "鮭魚", "鮪魚", "火雞", "鴨肉", "牛肉", "兔肉", "鹿肉", "羊肉", "蝦", "chicken", "salmon", "tuna", "duck"]
+FORMS = ["成貓配方乾糧", "幼貓配方乾糧", "低脂乾糧", "主食罐", "副食罐", "餐包", "慕斯", "凍乾", "kibble", "pate", "mousse"]
+QUERIES = [("sh", None), ("雞肉", None), ("鮭魚主食罐", None), ("chicken pate", None), ("森林貓 鴨肉", "wet"),
+           ("mochi", "dry"), ("kuro select salmon", None), ("不存在的商品", None)]
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        form = rng.choice(FORMS)
+        dry = "乾糧" in form or form in ("凍乾", "kibble")
+        yield {
+            "brand": rng.choice(BRANDS), "name": f"{rng.choice(PROTEINS)}{form} {i}", "kind": "dry" if dry else "wet",
+            "kcal_per_1000g": rng.uniform(3300, 4300) if dry else rng.uniform(700, 1300),
+            "package_weight": rng.choice([1500, 2000, 5400]) if dry else rng.choice([70, 85, 156, 400]),
+            "package_price": rng.uniform(300, 1800) if dry else rng.uniform(25, 120),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000, help="商品筆數")
+    parser.add_argument("--repeat", type=int, default=50, help="每個查詢的重複次數")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = ProductCatalog(make_rows(args.products))
+    print(f"載入 {len(catalog):,} 筆商品: {time.perf_counter() - start:.2f} 秒\n")
+
+    print(f"{'查詢':<22}{'類別':<6}{'筆數':>6}{'中位數':>12}{'最大':>12}")
+    for query, kind in QUERIES:
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = catalog.search(query, kind)
+            times.append(time.perf_counter() - start)
+        print(f"{query:<22}{kind or '-':<6}{len(results):>6}{statistics.median(times) * 1e3:10.2f}ms{max(times) * 1e3:10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
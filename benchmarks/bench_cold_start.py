@@ -0,0 +1,97 @@
+"""
+冷啟動測試：每一輪都啟動全新的 Streamlit 伺服器行程，以 WebSocket 模擬第一個瀏覽器連線，
+量測從啟動行程到第一步畫面送完 (script_finished) 的時間，取多輪的中位數與最小值：
+    - 伺服器就緒：啟動行程到可以連線 (匯入 streamlit、啟動 Tornado)；
+    - 第一步：連線後第一次執行 catv3.py (匯入 cat_* 模組，執行 main()) 到送出最後一個訊息；
+    - 第二次載入：同一個行程再開一個 session 載入第一步，作為已暖機時的對照。
+另外列出第一步畫面送完時伺服器行程已載入的重型套件 (bench_import_time.LAZY_MODULES，
+由 /proc/<pid>/maps 中的擴充模組判斷)，應該沒有任何一個。
+不含瀏覽器下載前端靜態檔與繪製的時間。
+--file-watcher none 關閉 Streamlit 的檔案監看 (每個 session 都會為程式目錄下已匯入的模組建立監看)，
+可看出它佔的時間；Streamlit Cloud 靠它在推送新版後重新載入，所以專案本身沒有關閉。
+
+用法: python benchmarks/bench_cold_start.py [--app catv3.py] [--runs 5] [--file-watcher auto|none]
+與 bench_reruns.py 相同，只支援 Linux。
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+from bench_import_time import LAZY_MODULES
+from bench_reruns import ROOT, BrowserSession, _free_port
+
+
+def _loaded_packages(pid, names):
+    """伺服器行程已載入 (有擴充模組映射到記憶體) 的套件。"""
+    with open(f"/proc/{pid}/maps") as f:
+        maps = f.read()
+    return [name for name in names if f"/{name}/" in maps]
+
+
+async def _first_paint(port, pid):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=None) as ws:
+        await BrowserSession(ws, pid).load()
+
+
+def cold_start(app, env, file_watcher="auto"):
+    """啟動一次伺服器，回傳 (伺服器就緒秒數, 第一步秒數, 第二次載入秒數, 已載入的重型套件)。"""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false",
+         "--server.fileWatcherType", file_watcher],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.05).close()
+                break
+            except OSError:
+                if time.perf_counter() - start > 30:
+                    raise RuntimeError(f"Streamlit 伺服器未啟動: {app}")
+                time.sleep(0.01)
+        ready = time.perf_counter()
+        asyncio.run(_first_paint(port, server.pid))
+        painted = time.perf_counter()
+        loaded = _loaded_packages(server.pid, LAZY_MODULES)
+        asyncio.run(_first_paint(port, server.pid))
+        return ready - start, painted - ready, time.perf_counter() - painted, loaded
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="catv3.py", help="要測試的 Streamlit 程式")
+    parser.add_argument("--runs", type=int, default=5, help="啟動伺服器的次數")
+    parser.add_argument("--file-watcher", choices=("auto", "none"), default="auto", help="server.fileWatcherType")
+    args = parser.parse_args()
+
+    # 歷史紀錄寫到暫存檔，不動到真正的資料庫
+    env = dict(os.environ, KURO_HISTORY_DB=os.path.join(tempfile.mkdtemp(prefix="kuro-bench-"), "history.db"))
+    runs = []
+    for i in range(args.runs):
+        ready, paint, warm, loaded = cold_start(args.app, env, args.file_watcher)
+        runs.append((ready, paint, ready + paint, warm))
+        print(f"第 {i + 1} 輪: 伺服器就緒 {ready * 1e3:7.1f} ms，第一步 {paint * 1e3:7.1f} ms，"
+              f"合計 {(ready + paint) * 1e3:7.1f} ms，第二次載入 {warm * 1e3:6.1f} ms"
+              f"{'，已載入 ' + ', '.join(loaded) if loaded else ''}")
+
+    print(f"\n{args.app}，檔案監看 {args.file_watcher}，{args.runs} 輪 (中位數 / 最小值):")
+    for label, samples in zip(("伺服器就緒", "第一步", "啟動到第一步畫面", "第二次載入"), zip(*runs)):
+        print(f"  {label:<10}{statistics.median(samples) * 1e3:9.1f} ms {min(samples) * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+批次 DER 效能測試：以 100 萬隻隨機貓咪比較 cat_batch 與逐筆呼叫 cat_core 的吞吐量，
+並檢查兩者結果完全一致。
+
+用法: python benchmarks/bench_der_batch.py [--cats 1000000] [--scalar-sample 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_batch import calculate_der_batch  # noqa: E402
+from cat_core import calculate_rer, get_activity_multiplier  # noqa: E402
+
+
+def make_roster(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "weight_kg": np.round(rng.uniform(0.1, 12.0, n), 2),
+        "age_months": rng.integers(1, 240, n),
+        "is_neutered": rng.random(n) < 0.7,
+        "bcs": rng.integers(1, 10, n),
+        "is_pregnant": rng.random(n) < 0.02,
+        "is_lactating": rng.random(n) < 0.02,
+    }
+
+
+def scalar_der(roster, n):
+    rer = np.empty(n)
+    multiplier = np.empty(n)
+    for i in range(n):
+        rer[i] = calculate_rer(float(roster["weight_kg"][i]))
+        multiplier[i] = get_activity_multiplier(
+            int(roster["age_months"][i]), bool(roster["is_neutered"][i]), int(roster["bcs"][i]),
+            bool(roster["is_pregnant"][i]), bool(roster["is_lactating"][i]),
+        )
+    return rer, multiplier, rer * multiplier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cats", type=int, default=1_000_000)
+    parser.add_argument("--scalar-sample", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    roster = make_roster(args.cats)
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        batch = calculate_der_batch(**roster)
+        best = min(best, time.perf_counter() - start)
+    print(f"批次 (NumPy): {args.cats:,} 隻 {best * 1000:.1f} ms -> {args.cats / best:,.0f} 隻/秒")
+
+    n = min(args.scalar_sample, args.cats)
+    start = time.perf_counter()
+    rer, multiplier, der = scalar_der(roster, n)
+    elapsed = time.perf_counter() - start
+    print(f"逐筆 (Python): {n:,} 隻 {elapsed * 1000:.1f} ms -> {n / elapsed:,.0f} 隻/秒")
+    print(f"加速倍數: {(args.cats / best) / (n / elapsed):.1f}x")
+
+    exact = (np.array_equal(batch.rer[:n], rer) and np.array_equal(batch.multiplier[:n], multiplier)
+             and np.array_equal(batch.der[:n], der))
+    print("結果一致: " + ("是" if exact else "否"))
+    return 0 if exact else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+最省錢飲食組合搜尋的速度測試：以隨機產生的 N 筆商品 (同 bench_catalog.py) 建立商品資料庫，
+量測讀出商品 + 找出前 10 名方案的時間，並列出暴力法需要比較的組合數。
+
+用法: python benchmarks/bench_diet_search.py [--products 1000 5000 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_catalog import make_rows  # noqa: E402
+from cat_catalog import ProductCatalog  # noqa: E402
+from cat_diet_search import find_cheapest_plans  # noqa: E402
+
+DER = 250.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, nargs="+", default=[1000, 5000, 20000], help="商品筆數")
+    parser.add_argument("--top", type=int, default=10, help="回傳的方案數")
+    args = parser.parse_args()
+
+    print(f"{'商品數':>8}{'濕食下限':>8}{'暴力法組合數':>14}{'搜尋時間':>12}{'最低月費':>12}")
+    for n in args.products:
+        catalog = ProductCatalog(make_rows(n))
+        dry = len(catalog.products("dry"))
+        for min_wet in (0, 50, 90):
+            start = time.perf_counter()
+            plans = find_cheapest_plans(DER, catalog.products(), min_wet, args.top)
+            elapsed = time.perf_counter() - start
+            print(f"{n:>8}{min_wet:>7}%{dry * (n - dry):>16,}{elapsed * 1e3:10.1f}ms{plans[0]['total_monthly_cost']:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
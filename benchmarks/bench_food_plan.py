@@ -0,0 +1,47 @@
+"""
+多種食物餵食計畫的求解時間：N 種食物、部分指定熱量佔比與公克數上下限 (會觸及上下限，走完整的轉折點計算)。
+
+用法: python benchmarks/bench_food_plan.py [--sizes 2 5 10 50 200]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_plan import make_food, solve_feeding_plan  # noqa: E402
+
+DER = 250.0
+
+
+def make_foods(n, seed=0):
+    rng = random.Random(seed)
+    foods = []
+    for i in range(n):
+        dry = rng.random() < 0.4
+        foods.append(make_food(
+            f"食物 {i}", rng.uniform(3200, 4200) if dry else rng.uniform(70, 130), 1000 if dry else 100,
+            share=rng.choice([None, rng.uniform(1, 100 / n)]),
+            min_grams=rng.choice([0.0, 10.0 / n]), max_grams=rng.choice([None, rng.uniform(5, 40)]),
+        ))
+    return foods
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 5, 10, 50, 200], help="食物種類數")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'食物數':>6}{'每次求解':>14}")
+    for n in args.sizes:
+        foods = make_foods(n)
+        solve_feeding_plan(DER, foods) # 確認可行
+        per_call = min(timeit.repeat(lambda: solve_feeding_plan(DER, foods), number=args.number, repeat=3)) / args.number
+        print(f"{n:>6}{per_call * 1e6:11.1f} us")
+
+
+if __name__ == "__main__":
+    main()
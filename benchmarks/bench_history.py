@@ -0,0 +1,64 @@
+"""
+歷史紀錄的速度測試：模擬一間診所 (預設 500 隻貓、每隻每天一筆、3 年)，
+量測批次寫入的速度，以及載入一隻貓全部歷史、最近 30 筆的時間。
+
+用法: python benchmarks/bench_history.py [--cats 500] [--days 1095] [--repeat 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_history import HistoryStore  # noqa: E402
+
+
+def timed(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cats", type=int, default=500, help="貓咪數")
+    parser.add_argument("--days", type=int, default=1095, help="每隻貓的天數")
+    parser.add_argument("--repeat", type=int, default=200, help="查詢重複次數")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start_day = date(2023, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"))
+        total = args.cats * args.days
+        start = time.perf_counter()
+        # 依日期輪流寫入各貓 (與實際使用相同，同一隻貓的紀錄不是連續寫入的)
+        for day in range(args.days):
+            today = start_day + timedelta(days=day)
+            for cat in range(args.cats):
+                store.record(f"cat-{cat:05d}", today, weight=4 + rng.random(), bcs=5, der=230 + rng.random() * 20,
+                             total_intake=240.0, monthly_cost=1500.0)
+        enqueue = time.perf_counter() - start
+        store.flush()
+        written = time.perf_counter() - start
+        print(f"寫入 {total:,} 筆: record() 合計 {enqueue:.2f}s (平均 {enqueue / total * 1e6:.1f}µs/筆)，"
+              f"全部寫入磁碟 {written:.2f}s，{store.batches_written:,} 個交易")
+
+        cat_ids = [f"cat-{rng.randrange(args.cats):05d}" for _ in range(args.repeat)]
+        it = itertools.cycle(cat_ids)
+        full, entries = timed(lambda: store.history(next(it)), args.repeat)
+        print(f"載入一隻貓全部歷史 ({len(entries):,} 筆): {full * 1e3:.2f}ms")
+        last, entries = timed(lambda: store.latest(next(it), 30), args.repeat)
+        print(f"載入一隻貓最近 {len(entries)} 筆: {last * 1e3:.3f}ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+批次產生插圖 (cat_image_batch) 的效能測試，以 stub_image_server 在本機模擬圖片生成 API (--latency 秒/張)：
+    - 逐一呼叫：與 03_Images_Generation_API.ipynb 相同，一次一個請求 (cat_images.ImageClient)，讀完整個回應再解碼；
+    - asyncio 管線：--concurrency 指定的各個併發數，速率不設限；
+    - 加上 --error-rate 比例的 503 錯誤 (重試與退避)；
+    - 速率限制：--rate-per-minute，確認實際的請求速率不超過設定；
+    - 記憶體：以 tracemalloc 量測逐一呼叫與管線 (最大併發數) 的 Python 記憶體峰值。
+提示為計算機所有 BCS x 年齡階段 x 絕育組合 (cat_image_batch.report_prompts，去除重複後 16 張)，
+每一輪都寫到新的暫存快取目錄。
+
+用法: python benchmarks/bench_image_batch.py [--latency 1.0] [--concurrency 1 4 8 16] [--error-rate 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cat_image_batch  # noqa: E402
+from cat_image_batch import generate_batch, report_prompts  # noqa: E402
+from cat_images import IMAGE_MODEL, IMAGE_SIZE, ImageCache, ImageClient, cache_key  # noqa: E402
+from stub_image_server import StubImageServer, stub_png  # noqa: E402
+
+
+def sequential(server, prompts):
+    """與筆記本相同：一次一個請求，讀完整個回應再解碼存檔。"""
+    client = ImageClient(server.base_url, api_key="stub")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ImageCache(tmp)
+        for prompt in dict.fromkeys(prompts):
+            cache.put_b64(cache_key(IMAGE_MODEL, prompt, IMAGE_SIZE), client.generate_b64(IMAGE_MODEL, prompt))
+
+
+def pipeline(server, prompts, **options):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(generate_batch(prompts, ImageCache(tmp), base_url=server.base_url, api_key="stub", **options))
+        for result in results:
+            if result.error is not None:
+                raise RuntimeError(result.error)
+            if os.path.getsize(result.path) != len(stub_png(result.prompt, IMAGE_SIZE)):
+                raise RuntimeError("圖檔內容與 API 回傳的不同")
+        return sum(r.attempts for r in {r.prompt: r for r in results}.values())
+
+
+def timed(server, func, *args, **kwargs):
+    before = server.requests
+    server.max_in_flight = 0
+    start = time.perf_counter()
+    func(server, *args, **kwargs)
+    return time.perf_counter() - start, server.requests - before, server.max_in_flight
+
+
+def peak_memory(func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="模擬 API 每次生圖的秒數")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16], help="要測試的併發數")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="重試測試中回應 503 的比例")
+    parser.add_argument("--seed", type=int, default=1, help="決定哪些請求回應 503 的亂數種子")
+    parser.add_argument("--rate-per-minute", type=float, default=240, help="速率限制測試的每分鐘請求數")
+    parser.add_argument("--rate-concurrency", type=int, default=4, help="速率限制測試的併發數 (也是可突發的請求數)")
+    args = parser.parse_args()
+
+    prompts = report_prompts()
+    unique = len(set(prompts))
+    server = StubImageServer(latency=args.latency).start()
+    for prompt in set(prompts):
+        stub_png(prompt, IMAGE_SIZE) # 先讓 stub 編碼好圖片，只量 API 延遲以外的成本
+    cat_image_batch.BACKOFF_BASE = args.latency / 4 # 退避時間與延遲同一個量級，避免測試太久
+    unlimited = 1e9
+    try:
+        print(f"{len(prompts)} 個組合 (不重複 {unique} 張，每張 {len(stub_png(prompts[0], IMAGE_SIZE)) / 1e6:.1f} MB)，"
+              f"API 延遲 {args.latency:.1f}s")
+        print(f"{'模式':<22}{'時間':>9}{'張/秒':>8}{'請求':>6}{'最大同時':>8}")
+        elapsed, requests, in_flight = timed(server, sequential, prompts)
+        print(f"{'逐一呼叫':<22}{elapsed:8.2f}s{unique / elapsed:8.2f}{requests:6d}{in_flight:8d}")
+        for concurrency in args.concurrency:
+            elapsed, requests, in_flight = timed(server, pipeline, prompts, concurrency=concurrency, rate_per_minute=unlimited)
+            print(f"{f'管線 併發 {concurrency}':<22}{elapsed:8.2f}s{unique / elapsed:8.2f}{requests:6d}{in_flight:8d}")
+
+        top = max(args.concurrency)
+        flaky = StubImageServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed).start()
+        try:
+            elapsed, requests, in_flight = timed(flaky, pipeline, prompts, concurrency=top, rate_per_minute=unlimited)
+        finally:
+            flaky.stop()
+        print(f"{f'管線 併發 {top} 錯誤 {args.error_rate:.0%}':<22}{elapsed:8.2f}s{unique / elapsed:8.2f}{requests:6d}{in_flight:8d}"
+              f"  (503 {flaky.errors} 次，全部重試成功)")
+
+        burst = args.rate_concurrency
+        elapsed, requests, in_flight = timed(server, pipeline, prompts, concurrency=burst, rate_per_minute=args.rate_per_minute)
+        # 一開始可突發 burst 個請求，之後每個請求間隔 60 / rate 秒
+        expected = (requests - burst) * 60 / args.rate_per_minute
+        print(f"{f'管線 限速 {args.rate_per_minute:.0f}/分':<22}{elapsed:8.2f}s{unique / elapsed:8.2f}{requests:6d}{in_flight:8d}"
+              f"  (依速率至少 {expected:.2f}s)")
+
+        sequential_peak = peak_memory(sequential, server, prompts)
+        pipeline_peak = peak_memory(pipeline, server, prompts, concurrency=top, rate_per_minute=unlimited)
+        print(f"記憶體峰值: 逐一呼叫 {sequential_peak / 1e6:.1f} MB，管線 (併發 {top}) {pipeline_peak / 1e6:.1f} MB")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
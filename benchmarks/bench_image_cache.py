@@ -0,0 +1,102 @@
+"""
+報告插圖快取 (cat_images) 的效能測試，以 stub_image_server 在本機模擬圖片生成 API，不需網路與 API 金鑰：
+    - 第一輪：每種 BCS 分級 x 年齡階段 (共 16 張) 都未命中，呼叫 API、解碼 base64、寫檔；
+    - 第二輪：全部命中，只從磁碟讀出圖檔，與「快取 API 回應 (base64) 每次再解碼」比較；
+    - 介面顯示用的縮圖 (寬度 --width)：第一次由原圖產生，之後直接讀檔；
+    - 同一張新圖由多個執行緒同時要求時，API 只被呼叫一次。
+最後確認 API 的總請求數與命中時讀出的內容正確。
+
+用法: python benchmarks/bench_image_cache.py [--latency 0.2] [--threads 8] [--width 240]
+"""
+import argparse
+import base64
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cat_images import (BCS_CLASSES, IMAGE_MODEL, IMAGE_SIZE, ImageCache, ImageClient, cache_key,  # noqa: E402
+                        illustration_prompt)
+from stub_image_server import StubImageServer, stub_png_b64  # noqa: E402
+
+STAGE_AGES = (2, 6, 36, 120) # 幼貓、青年、成貓、熟齡各一個月齡
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="模擬 API 每次生圖的秒數")
+    parser.add_argument("--threads", type=int, default=8, help="同時要求同一張新圖的執行緒數")
+    parser.add_argument("--width", type=int, default=240, help="縮圖寬度")
+    args = parser.parse_args()
+
+    server = StubImageServer(latency=args.latency).start()
+    client = ImageClient(server.base_url, api_key="stub")
+    prompts = [illustration_prompt(low, age) for low, *_ in BCS_CLASSES for age in STAGE_AGES]
+    for prompt in prompts:
+        stub_png_b64(prompt, IMAGE_SIZE) # 先讓 stub 編碼好圖片，只量 API 延遲以外的本機成本
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(tmp)
+            misses = []
+            for prompt in prompts:
+                start = time.perf_counter()
+                cache.get_or_generate(client, IMAGE_MODEL, prompt)
+                misses.append(time.perf_counter() - start)
+
+            hits, redecodes = [], []
+            for prompt in prompts:
+                start = time.perf_counter()
+                with open(cache.get_or_generate(client, IMAGE_MODEL, prompt), "rb") as f:
+                    data = f.read()
+                hits.append(time.perf_counter() - start)
+                b64_text = stub_png_b64(prompt, IMAGE_SIZE)
+                start = time.perf_counter()
+                expected = base64.b64decode(b64_text)
+                redecodes.append(time.perf_counter() - start)
+                if data != expected:
+                    raise RuntimeError("快取讀出的圖檔與 API 回傳的內容不同")
+
+            keys = [cache_key(IMAGE_MODEL, prompt, IMAGE_SIZE) for prompt in prompts]
+            variant_builds, variant_hits = [], []
+            for samples in (variant_builds, variant_hits):
+                for key in keys:
+                    start = time.perf_counter()
+                    with open(cache.variant(key, args.width), "rb") as f:
+                        f.read()
+                    samples.append(time.perf_counter() - start)
+
+            # 多個執行緒同時要同一張新圖
+            before = server.requests
+            new_prompt = prompts[0] + " Wearing a tiny scarf."
+            threads = [threading.Thread(target=cache.get_or_generate, args=(client, IMAGE_MODEL, new_prompt))
+                       for _ in range(args.threads)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            concurrent = time.perf_counter() - start
+            concurrent_requests = server.requests - before
+
+            size = os.path.getsize(cache.path(cache_key(IMAGE_MODEL, prompts[0], IMAGE_SIZE)))
+            print(f"{len(prompts)} 張插圖，每張 {size / 1e6:.1f} MB (base64 {len(stub_png_b64(prompts[0], IMAGE_SIZE)) / 1e6:.1f} MB)，"
+                  f"API 延遲 {args.latency * 1e3:.0f} ms")
+            print(f"未命中 (API + 解碼 + 寫檔): 中位數 {statistics.median(misses) * 1e3:7.1f} ms，"
+                  f"扣除 API 延遲 {(statistics.median(misses) - args.latency) * 1e3:6.1f} ms")
+            print(f"命中 (從磁碟讀出):          中位數 {statistics.median(hits) * 1e3:7.2f} ms")
+            print(f"對照: 每次解碼 base64:      中位數 {statistics.median(redecodes) * 1e3:7.2f} ms")
+            print(f"縮圖 ({args.width}px, {os.path.getsize(cache.variant(keys[0], args.width)) / 1e3:.1f} KB): "
+                  f"產生 中位數 {statistics.median(variant_builds) * 1e3:.1f} ms，之後讀檔 {statistics.median(variant_hits) * 1e3:.2f} ms")
+            print(f"{args.threads} 個執行緒同時要求同一張新圖: {concurrent * 1e3:.0f} ms，API 請求 {concurrent_requests} 次")
+            print(f"API 總請求數 {server.requests} (預期 {len(prompts) + 1})")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
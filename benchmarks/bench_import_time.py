@@ -0,0 +1,100 @@
+"""
+匯入時間測試：每個模組都在全新的 Python 行程中匯入，取多次中的最佳值。
+
+用法: python benchmarks/bench_import_time.py [模組 ...] [--repeat 5] [--check]
+預設比較 cat_core (純計算) 與 catv3 (Streamlit 介面)。
+
+--check 檢查匯入時間預算 (IMPORT_BUDGETS_MS)，並確認匯入後、以及用 AppTest 執行完 catv3 第一步後
+都沒有載入 LAZY_MODULES 中的重型套件 (這些套件只在第一次使用相關功能時才匯入)；超出預算時以結束代碼 1 結束。
+catv3 由 Streamlit 伺服器在已匯入 streamlit 的行程中執行，所以先匯入 streamlit 再計時，只計 catv3 本身的成本。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 匯入時間預算 (毫秒，取最佳值比較)。catv3 原本會匯入 NumPy 與 Pillow，約 145 毫秒
+IMPORT_BUDGETS_MS = {"cat_core": 15, "catv3": 50}
+PRELOADED = {"catv3": "streamlit"} # 計時前先匯入的模組
+LAZY_MODULES = ("numpy", "PIL", "pandas", "pyarrow") # 第一步不應載入的重型套件
+
+_SNIPPET = """\
+import json, sys, time
+{preload}
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps([elapsed, [name for name in {lazy!r} if name in sys.modules]]))"""
+
+# 執行第一步 (set_page_config 的圖示、各個面板) 時也可能匯入重型套件，只檢查匯入不夠
+_STEP1_SNIPPET = """\
+import json, logging, sys
+from streamlit.testing.v1 import AppTest
+logging.disable(logging.WARNING)
+AppTest.from_file({app!r}, default_timeout=60).run()
+print(json.dumps([name for name in {lazy!r} if name in sys.modules]))"""
+
+
+def import_time(module, repeat=5):
+    """回傳在全新行程中匯入 module 所需的最短秒數，以及匯入後已載入的 LAZY_MODULES。"""
+    best, loaded = float("inf"), []
+    preload = f"import {PRELOADED[module]}" if module in PRELOADED else ""
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module, preload=preload, lazy=LAZY_MODULES)],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        elapsed, loaded = json.loads(out.strip().splitlines()[-1])
+        best = min(best, elapsed)
+    return best, loaded
+
+
+def step1_loaded(app):
+    """在全新行程中以 AppTest 執行 app 的第一步，回傳已載入的 LAZY_MODULES。"""
+    out = subprocess.run(
+        [sys.executable, "-c", _STEP1_SNIPPET.format(app=os.path.join(ROOT, app), lazy=LAZY_MODULES)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=["cat_core", "catv3"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="檢查匯入時間預算與延遲匯入的套件")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        seconds, loaded = import_time(module, args.repeat)
+        ms = seconds * 1000
+        preload = f" (已匯入 {PRELOADED[module]})" if module in PRELOADED else ""
+        line = f"{module:<20} {ms:8.1f} ms{preload}"
+        budget = IMPORT_BUDGETS_MS.get(module)
+        if args.check and budget is not None:
+            line += f"  預算 {budget} ms"
+            if ms > budget:
+                failures.append(f"{module} 匯入 {ms:.1f} ms，超出預算 {budget} ms")
+            if loaded:
+                failures.append(f"{module} 匯入時載入了 {', '.join(loaded)}")
+        elif loaded:
+            line += f"  (載入 {', '.join(loaded)})"
+        print(line)
+
+    if args.check and "catv3" in args.modules:
+        loaded = step1_loaded("catv3.py")
+        print(f"catv3 第一步載入的重型套件: {', '.join(loaded) or '無'}")
+        if loaded:
+            failures.append(f"catv3 第一步載入了 {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"超出預算: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+命令列批次模式的平行處理效能測試：產生隨機名冊 (預設 20 萬隻貓)，
+比較逐筆處理 (process_rows + write_results) 與行程池 (write_results_parallel) 在不同行程數下的吞吐量，
+並檢查輸出的大小與行數相同。行程數預設為 1、2、4 … 到 CPU 核心數；核心數為 1 時只能量到行程池本身的開銷。
+
+用法: python benchmarks/bench_parallel.py [--rows 200000] [--chunk-size 2000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_cli import DEFAULT_CHUNK_SIZE, process_rows, write_results, write_results_parallel  # noqa: E402
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    # 與 CSV 讀入的資料相同，所有欄位都是字串
+    return [(line_no, {
+        "cat_id": f"cat-{line_no:06d}",
+        "weight": f"{rng.uniform(2.0, 8.0):.1f}",
+        "age_years": str(rng.randrange(0, 18)),
+        "age_months": str(rng.randrange(0, 12)),
+        "is_neutered": rng.choice(("是", "否")),
+        "bcs": str(rng.randrange(1, 10)),
+        "dry_food_grams": str(rng.randrange(0, 80)),
+        "wet_food_grams": str(rng.randrange(0, 200)),
+    }) for line_no in range(2, n + 2)]
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="名冊筆數")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每組的資料列數")
+    parser.add_argument("--workers", type=int, nargs="+", help="要測試的行程數 (預設 1、2、4 … 到 CPU 核心數)")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), default="jsonl", help="輸出格式")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows:,} 筆，CPU 核心數 {os.cpu_count()}，輸出 {args.output_format}，每組 {args.chunk_size} 筆")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def run(write):
+            # 與命令列相同，寫到 UTF-8 檔案
+            path = os.path.join(tmp, f"out.{args.output_format}")
+            newline = "" if args.output_format == "csv" else None
+            start = time.perf_counter()
+            with open(path, "w", encoding="utf-8", newline=newline) as sink:
+                write(sink)
+            elapsed = time.perf_counter() - start
+            with open(path, "rb") as f:
+                return elapsed, (os.path.getsize(path), sum(1 for _ in f)) # 輸出很大，只比較大小與行數
+
+        serial, expected = run(lambda sink: write_results(process_rows(rows, lambda *error: None), sink,
+                                                          args.output_format))
+        print(f"逐筆處理: {serial:.2f}s ({args.rows / serial:,.0f} 筆/s)")
+
+        for workers in args.workers or default_workers():
+            elapsed, output = run(lambda sink: write_results_parallel(rows, sink, args.output_format, lambda *error: None,
+                                                                      workers=workers, chunk_size=args.chunk_size))
+            print(f"行程池 {workers:>2} 個行程: {elapsed:.2f}s ({args.rows / elapsed:,.0f} 筆/s)，"
+                  f"加速 {serial / elapsed:.2f}x{'' if output == expected else '  輸出與逐筆處理不同!'}")
+
+
+if __name__ == "__main__":
+    main()
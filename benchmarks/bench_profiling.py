@@ -0,0 +1,75 @@
+"""
+重跑效能紀錄 (cat_profiling) 的開銷測試：
+    - 每個 span 的成本 (未啟用時的 nullcontext、啟用時的計時)；
+    - 以 AppTest 執行 catv3.py 第一步到第四步數輪，比較每次重跑的總時間與紀錄本身的開銷
+      (結束時的 collector、彙總與寫檔，加上各 span 的成本)。
+
+用法: python benchmarks/bench_profiling.py [--passes 5] [--export none|jsonl|prom]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--passes", type=int, default=5, help="第一步到第四步的輪數")
+parser.add_argument("--export", choices=("none", "jsonl", "prom"), default="jsonl", help="匯出格式")
+args = parser.parse_args()
+
+# cat_profiling 在匯入時依環境變數決定是否啟用，必須先設定
+tmp = tempfile.mkdtemp(prefix="kuro-bench-")
+os.environ["KURO_PROFILE"] = "1"
+os.environ["KURO_HISTORY_DB"] = os.path.join(tmp, "history.db")
+if args.export != "none":
+    os.environ["KURO_PROFILE_FILE"] = os.path.join(tmp, f"profile.{args.export}")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import cat_profiling  # noqa: E402
+
+STEPS = ("calc_der_s1_btn", "next_step1_btn", "analyze_intake_s2_btn", "next_step2_btn",
+         "generate_plan_s3_btn", "next_step3_btn", "reset_app")
+
+
+def span_cost_us(make_span):
+    timer = timeit.Timer("with make_span('x'): pass", globals={"make_span": make_span})
+    loops, _ = timer.autorange()
+    return min(timer.repeat(5, loops)) / loops * 1e6
+
+
+def main():
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    disabled = span_cost_us(lambda name: cat_profiling._NULL_SPAN)
+    profiler = cat_profiling.Profiler("")
+    # 在外層先開一個 span，量到的是巢狀 span 的成本 (不含每次重跑一次的結束處理)
+    with profiler.span("outer"):
+        enabled = span_cost_us(profiler.span)
+    print(f"每個 span: 未啟用 {disabled:.3f}µs，啟用 {enabled:.3f}µs")
+
+    at = AppTest.from_file(os.path.join(ROOT, "catv3.py"), default_timeout=60).run()
+    for _ in range(args.passes):
+        for key in STEPS:
+            at.button(key=key).click().run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+    reruns = cat_profiling.get_profiler().reruns()[1 + len(STEPS):] # 略過第一輪 (匯入與快取暖機)
+    totals = [r.total_ms for r in reruns]
+    overheads = [r.overhead_ms + len(r.spans) * enabled / 1e3 for r in reruns]
+    ratios = [o / t for o, t in zip(overheads, totals)]
+    print(f"匯出: {args.export}，{len(reruns)} 次重跑 (第 2 輪起)")
+    print(f"重跑時間 中位數 {statistics.median(totals):.2f}ms (最短 {min(totals):.2f}ms)")
+    print(f"紀錄開銷 中位數 {statistics.median(overheads) * 1e3:.0f}µs，"
+          f"佔重跑時間 中位數 {statistics.median(ratios):.2%}、最高 {max(ratios):.2%}")
+    widgets = [r.gauges.get("widgets") for r in reruns]
+    sizes = [r.gauges.get("session_state_bytes") for r in reruns]
+    print(f"widget 數 {min(widgets)}~{max(widgets)}，session_state {min(sizes):,}~{max(sizes):,} 位元組")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+報告產生速度測試：以一份隨機產生的名冊 (每隻貓一份報告)，比較
+cat_core.generate_text_report 逐筆產生，與 cat_report 預先編譯樣板
+(render 逐筆、render_many 整批共用標題) 在各格式下的吞吐量。
+同時確認 text 格式的報告內容與 generate_text_report 逐字相同。
+
+用法: python benchmarks/bench_report.py [--cats 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_core import generate_text_report, normalize_cat_inputs, report_body, run_pipeline  # noqa: E402
+from cat_report import REPORT_FORMATS, get_renderer  # noqa: E402
+
+SECTIONS = ("cat_info", "der_info", "intake_analysis", "monthly_cost_info", "feeding_plan")
+
+
+def make_roster(cats, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for _ in range(cats):
+        cat = normalize_cat_inputs({
+            "weight": rng.uniform(1, 8), "age_years": rng.randint(0, 15), "age_months": rng.randint(1, 11),
+            "is_neutered": rng.random() < 0.8, "bcs": rng.randint(1, 9), "is_pregnant": rng.random() < 0.05,
+            "dry_food_grams": rng.uniform(0, 80), "wet_food_grams": rng.uniform(0, 200),
+            "wet_food_percentage": rng.randint(0, 100),
+        })
+        results.append(run_pipeline(cat, include_report=False))
+    return results
+
+
+def reports_per_second(func, cats):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return cats / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cats", type=int, default=20_000, help="名冊中的貓咪數")
+    args = parser.parse_args()
+
+    roster = make_roster(args.cats)
+    sections = [tuple(r[k] for k in SECTIONS) for r in roster]
+    text = get_renderer("text")
+    for s in sections:
+        assert text.body(*s) == report_body(*s), "text 格式與 generate_text_report 不一致"
+
+    baseline = reports_per_second(lambda: [generate_text_report(*s) for s in sections], args.cats)
+    print(f"{'方法':<34}{'報告/秒':>12}{'相對':>8}")
+    print(f"{'generate_text_report (逐筆)':<34}{baseline:12,.0f}{1:7.2f}x")
+    for fmt in REPORT_FORMATS:
+        renderer = get_renderer(fmt)
+        single = reports_per_second(lambda: [renderer.render(*s) for s in sections], args.cats)
+        now = datetime.now()
+        batch = reports_per_second(lambda: list(renderer.render_many(roster, generated_at=now)), args.cats)
+        print(f"{'ReportRenderer(' + fmt + ').render':<34}{single:12,.0f}{single / baseline:7.2f}x")
+        print(f"{'ReportRenderer(' + fmt + ').render_many':<34}{batch:12,.0f}{batch / baseline:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+重跑成本測試：啟動真正的 Streamlit 伺服器，以 WebSocket 模擬瀏覽器操作，
+量測每次互動伺服器送出的訊息數、位元組數與伺服器 CPU 時間。
+
+情境：第一步計算 DER -> 進入第二步 -> 修改「每日乾食餵食量」N 次 -> 按下「計算實際攝取與費用」。
+位於 st.form 內的欄位在瀏覽器端修改時不會送出任何訊息 (與真實瀏覽器行為相同)，
+只有送出表單時才帶著所有欄位值一起送出；屬於 fragment 的按鈕會帶上 fragment_id，只重跑該 fragment。
+
+用法: python benchmarks/bench_reruns.py [--app catv3.py ...] [--edits 50]
+伺服器 CPU 時間取自 /proc/<pid>/task/*/schedstat，因此只支援 Linux。
+"""
+import argparse
+import asyncio
+import glob
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_cpu_ns(pid):
+    """伺服器行程所有執行緒累計的 CPU 時間 (奈秒)。"""
+    total = 0
+    for path in glob.glob(f"/proc/{pid}/task/*/schedstat"):
+        try:
+            with open(path) as f:
+                total += int(f.read().split()[0])
+        except (OSError, ValueError, IndexError):
+            pass # 執行緒剛好結束
+    return total
+
+
+class BrowserSession:
+    """極簡的 Streamlit 前端：記錄 widget 的 id、所屬表單與 fragment，並送出重跑請求。"""
+
+    def __init__(self, ws, pid):
+        self.ws = ws
+        self.pid = pid
+        self.widgets = {} # key -> (widget id, form_id, fragment_id)
+        self.pending_form_values = {} # form_id -> {widget id: (欄位, 值)}
+
+    async def _rerun(self, states, fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        for widget_id, (field, value) in states.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        cpu_before = _server_cpu_ns(self.pid)
+        await self.ws.send(msg.SerializeToString())
+        count, size = await self._drain()
+        return count, size, _server_cpu_ns(self.pid) - cpu_before
+
+    async def _drain(self):
+        count = size = 0
+        while True:
+            raw = await asyncio.wait_for(self.ws.recv(), 30)
+            count += 1
+            size += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                inner = getattr(element, element.WhichOneof("type"))
+                widget_id = getattr(inner, "id", "")
+                if widget_id.startswith("$$ID-"):
+                    key = widget_id.split("-", 2)[2]
+                    self.widgets[key] = (widget_id, getattr(inner, "form_id", ""), msg.delta.fragment_id)
+            # st.rerun() 會先以 FINISHED_EARLY_FOR_RERUN 結束，接著自動再跑一次
+            if kind == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return count, size
+
+    async def load(self):
+        return await self._rerun({})
+
+    async def click(self, key):
+        widget_id, form_id, fragment_id = self.widgets[key]
+        states = dict(self.pending_form_values.pop(form_id, {})) if form_id else {}
+        states[widget_id] = ("trigger_value", True)
+        return await self._rerun(states, fragment_id)
+
+    async def edit(self, key, field, value):
+        """修改欄位；在表單內時只記在瀏覽器端，回傳 (0, 0, 0)。"""
+        widget_id, form_id, fragment_id = self.widgets[key]
+        if form_id:
+            self.pending_form_values.setdefault(form_id, {})[widget_id] = (field, value)
+            return 0, 0, 0
+        return await self._rerun({widget_id: (field, value)}, fragment_id)
+
+
+async def run_scenario(port, pid, edits):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=None) as ws:
+        browser = BrowserSession(ws, pid)
+        await browser.load()
+        await browser.click("calc_der_s1_btn")
+        await browser.click("next_step1_btn")
+
+        edit_totals = [0, 0, 0]
+        for i in range(edits):
+            for j, value in enumerate(await browser.edit("dry_grams_s2", "double_value", 40.0 + i)):
+                edit_totals[j] += value
+        submit = await browser.click("analyze_intake_s2_btn")
+    return [t / edits for t in edit_totals], submit
+
+
+def bench_app(app, edits):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.port", str(port),
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Streamlit 伺服器未啟動: {app}")
+                time.sleep(0.1)
+        return asyncio.run(run_scenario(port, server.pid, edits))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", action="append", help="要測試的 Streamlit 程式 (可重複，預設 catv3.py)")
+    parser.add_argument("--edits", type=int, default=50, help="第二步欄位修改次數")
+    args = parser.parse_args()
+
+    print(f"{'程式':<20}{'每次編輯: 訊息':>14}{'位元組':>10}{'CPU':>10}  {'送出: 訊息':>10}{'位元組':>10}{'CPU':>10}")
+    for app in args.app or ["catv3.py"]:
+        (edit_msgs, edit_bytes, edit_cpu), (submit_msgs, submit_bytes, submit_cpu) = bench_app(app, args.edits)
+        print(f"{app:<20}{edit_msgs:14.1f}{edit_bytes:10.0f}{edit_cpu / 1e6:8.2f}ms  "
+              f"{submit_msgs:10d}{submit_bytes:10d}{submit_cpu / 1e6:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
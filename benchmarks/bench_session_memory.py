@@ -0,0 +1,129 @@
+"""
+Session 狀態記憶體測試：比較舊版散落在 st.session_state 的十幾個鍵 (以 dict 模擬)
+與 cat_state.SessionModel (__slots__ dataclass) 在同時存在 N 個 session 時的記憶體用量，
+並量測「重新開始」(逐一刪除鍵並重新初始化 vs. 換成新的 SessionModel) 的耗時。
+
+兩種表示法都填入第一步到第三步完成後的相同內容 (4 公斤、已絕育、BCS 5 ...)。
+
+用法: python benchmarks/bench_session_memory.py [--sessions 10000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_core import CAT_INPUT_DEFAULTS, analyze_intake, build_feeding_plan, calculate_der, calculate_monthly_cost  # noqa: E402
+from cat_state import CatProfile, SessionModel  # noqa: E402
+
+DRY_GRAMS, WET_GRAMS = 50.0, 80.0
+
+# 舊版 catv3.py 重新開始時刪除的鍵
+LEGACY_KEYS = (
+    "current_step", "der", "cat_info", "der_info", "intake_analysis", "monthly_cost_info", "feeding_plan",
+    "dry_food_grams", "wet_food_grams", "dry_food_kcal_per_1000g", "wet_food_kcal_per_100g",
+    "dry_food_package_weight", "dry_food_package_price", "wet_food_package_weight", "wet_food_package_price",
+    "wet_food_percentage_plan",
+)
+
+
+def _results():
+    der_info = calculate_der(4.0, 24, True, 5, False, False)
+    d = CAT_INPUT_DEFAULTS
+    intake = analyze_intake(der_info["der"], DRY_GRAMS, d["dry_food_kcal_per_1000g"], WET_GRAMS, d["wet_food_kcal_per_100g"])
+    cost = calculate_monthly_cost(DRY_GRAMS, d["dry_food_package_weight"], d["dry_food_package_price"],
+                                  WET_GRAMS, d["wet_food_package_weight"], d["wet_food_package_price"])
+    plan = build_feeding_plan(der_info["der"], d["wet_food_percentage"], d["dry_food_kcal_per_1000g"], d["wet_food_kcal_per_100g"])
+    return der_info, intake, cost, plan
+
+
+def legacy_init(state):
+    """舊版 main() 開頭的初始化。"""
+    d = CAT_INPUT_DEFAULTS
+    defaults = {
+        "current_step": 1, "der": None, "cat_info": {}, "der_info": {}, "intake_analysis": None,
+        "monthly_cost_info": None, "feeding_plan": None,
+        "dry_food_grams": float(d["dry_food_grams"]), "wet_food_grams": float(d["wet_food_grams"]),
+        "dry_food_kcal_per_1000g": float(d["dry_food_kcal_per_1000g"]),
+        "wet_food_kcal_per_100g": float(d["wet_food_kcal_per_100g"]),
+        "dry_food_package_weight": float(d["dry_food_package_weight"]),
+        "dry_food_package_price": float(d["dry_food_package_price"]),
+        "wet_food_package_weight": float(d["wet_food_package_weight"]),
+        "wet_food_package_price": float(d["wet_food_package_price"]),
+        "wet_food_percentage_plan": d["wet_food_percentage"],
+    }
+    for key, value in defaults.items():
+        if key not in state:
+            state[key] = value
+
+
+def legacy_session(results):
+    der_info, intake, cost, plan = (dict(r) for r in results)
+    state = {}
+    legacy_init(state)
+    state.update(
+        current_step=4, der=der_info["der"], der_info=der_info, intake_analysis=intake,
+        monthly_cost_info=cost, feeding_plan=plan, dry_food_grams=DRY_GRAMS, wet_food_grams=WET_GRAMS,
+        cat_info={"weight": 4.0, "age_years": 2, "age_months": 0, "is_neutered": "是", "is_neutered_bool": True,
+                  "bcs": 5, "is_pregnant": False, "is_lactating": False},
+    )
+    return state
+
+
+def model_session(results):
+    der_info, intake, cost, plan = (dict(r) for r in results)
+    model = SessionModel(current_step=4)
+    model.profile = CatProfile(4.0, 2, 0, True, 5, False, False)
+    model.food.dry_food_grams = DRY_GRAMS
+    model.food.wet_food_grams = WET_GRAMS
+    model.results.der_info = der_info
+    model.results.intake_analysis = intake
+    model.results.monthly_cost_info = cost
+    model.results.feeding_plan = plan
+    return model
+
+
+def measure(factory, sessions):
+    results = _results()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [factory(results) for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / sessions
+
+
+def legacy_reset(state):
+    for key in LEGACY_KEYS:
+        if key in state:
+            del state[key]
+    legacy_init(state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000, help="同時存在的 session 數")
+    parser.add_argument("--repeat", type=int, default=100000, help="重新開始的量測次數")
+    args = parser.parse_args()
+
+    results = _results()
+    legacy_bytes = measure(legacy_session, args.sessions)
+    model_bytes = measure(model_session, args.sessions)
+
+    state = legacy_session(results)
+    legacy_reset_us = timeit.timeit(lambda: legacy_reset(state), number=args.repeat) / args.repeat * 1e6
+    holder = {"model": model_session(results)}
+    model_reset_us = timeit.timeit(lambda: holder.__setitem__("model", SessionModel()),
+                                   number=args.repeat) / args.repeat * 1e6
+
+    print(f"{'表示法':<16}{'每個 session (位元組)':>22}{'重新開始 (微秒)':>18}")
+    print(f"{'session_state 鍵':<16}{legacy_bytes:22.0f}{legacy_reset_us:18.2f}")
+    print(f"{'SessionModel':<16}{model_bytes:22.0f}{model_reset_us:18.2f}")
+    print(f"記憶體減少 {1 - model_bytes / legacy_bytes:.1%}")
+
+
+if __name__ == "__main__":
+    main()
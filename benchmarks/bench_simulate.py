@@ -0,0 +1,54 @@
+"""
+體重變化模擬的速度測試：隨機產生 N 隻貓 (體重、每日攝取、月齡、絕育、BCS)，一次模擬 W 週，
+並以逐隻呼叫 cat_core.calculate_der 的純 Python 迴圈抽樣驗證結果相同。
+
+用法: python benchmarks/bench_simulate.py [--cats 10000] [--weeks 52 260 520]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_core import calculate_der  # noqa: E402
+from cat_simulate import DAYS_PER_MONTH, DAYS_PER_WEEK, ENERGY_PER_KG, MIN_WEIGHT_KG, simulate_weight  # noqa: E402
+
+
+def reference(weight, intake, age, neutered, bcs, weeks):
+    """逐週呼叫 calculate_der 的單隻貓版本。"""
+    weights = [weight]
+    for week in range(weeks):
+        der = calculate_der(weight, age + week * DAYS_PER_WEEK / DAYS_PER_MONTH, neutered, bcs)["der"]
+        weight = max(weight + (intake - der) * DAYS_PER_WEEK / ENERGY_PER_KG, MIN_WEIGHT_KG)
+        weights.append(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cats", type=int, default=10_000, help="貓咪數")
+    parser.add_argument("--weeks", type=int, nargs="+", default=[52, 260, 520], help="模擬週數")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.cats
+    cats = (rng.uniform(2, 8, n), rng.uniform(150, 400, n), rng.integers(1, 180, n), rng.random(n) < 0.8, rng.integers(1, 10, n))
+
+    print(f"{'週數':>6}{'貓咪 x 週':>14}{'耗時':>12}")
+    for weeks in args.weeks:
+        start = time.perf_counter()
+        trajectory = simulate_weight(*cats, weeks=weeks)
+        elapsed = time.perf_counter() - start
+        print(f"{weeks:>6}{n * weeks:>14,}{elapsed * 1e3:10.1f}ms")
+
+    for i in rng.choice(n, size=min(n, 20), replace=False):
+        expected = reference(*(float(c[i]) if c.dtype.kind == "f" else c[i].item() for c in cats), args.weeks[-1])
+        assert np.array_equal(trajectory.weight[i], expected), f"第 {i} 隻貓的結果與逐週計算不一致"
+    print("抽樣 20 隻貓與逐週 calculate_der 結果完全相同")
+
+
+if __name__ == "__main__":
+    main()
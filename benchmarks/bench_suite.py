@@ -0,0 +1,214 @@
+"""
+效能測試套件：每次提交都能以同樣的方式重跑，結果存成 JSON 以便比較不同提交之間的差異。
+
+    - 微基準：cat_core.calculate_rer、get_activity_multiplier、generate_text_report 每次呼叫的時間
+      (timeit，自動決定迴圈次數，取多輪的最小值與中位數)；
+    - 端對端：以 Streamlit 的 AppTest (不開瀏覽器、不啟動伺服器) 執行 catv3.py，
+      依序完成第一步到第四步 (與使用者操作相同的按鈕)，量測每一次重跑的時間。
+      每一輪都是新的 session；第一輪包含模組匯入與快取暖機，另外記錄，不列入中位數。
+
+結果 JSON 含提交 (git rev-parse)、Python 與主要套件版本、CPU 核心數，以及每項測試的 min / median。
+--compare 指定先前的結果檔時，逐項列出變化，變慢超過 --threshold 的項目標為退步，並以結束代碼 1 結束。
+微基準以最小值比較 (雜訊只會讓時間變長，最小值最穩定)，端對端以中位數比較 (重跑時間本身就有變異)。
+不同機器的數字不能直接比較，請在同一台機器上比較。
+
+用法:
+    python benchmarks/bench_suite.py                                  # 結果寫到 benchmarks/results/<提交>.json
+    python benchmarks/bench_suite.py -o after.json --compare benchmarks/results/abc1234.json
+    python benchmarks/bench_suite.py --passes 3 --only micro
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 端對端測試在本行程內執行 catv3.py；歷史紀錄寫到暫存檔，不動到真正的資料庫 (須在匯入 cat_history 前設定)
+os.environ.setdefault("KURO_HISTORY_DB", os.path.join(tempfile.mkdtemp(prefix="kuro-bench-"), "history.db"))
+
+from cat_core import (calculate_rer, generate_text_report, get_activity_multiplier, normalize_cat_inputs,  # noqa: E402
+                      run_pipeline)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SCHEMA_VERSION = 1
+DEFAULT_THRESHOLD = 0.10 # 變慢超過 10% 視為退步
+
+# 端對端情境：(項目名稱, 操作)；操作為 None 表示第一次載入頁面
+E2E_STAGES = (
+    ("load", None),
+    ("step1_calc_der", ("click", "calc_der_s1_btn")),
+    ("step1_next", ("click", "next_step1_btn")),
+    ("step2_analyze_intake", ("click", "analyze_intake_s2_btn")),
+    ("step2_next", ("click", "next_step2_btn")),
+    ("step3_generate_plan", ("click", "generate_plan_s3_btn")),
+    ("step3_next", ("click", "next_step3_btn")), # 第四步：顯示報告
+)
+E2E_INPUTS = {"dry_grams_s2": 50.0, "wet_grams_s2": 80.0} # 第二步的餵食量 (送出表單前填入)
+
+SAMPLE_CAT = {"weight": 4.5, "age_years": 3, "age_months": 2, "is_neutered": "是", "bcs": 6,
+              "dry_food_grams": 50, "wet_food_grams": 80, "wet_food_percentage": 40}
+
+
+# --- 環境資訊 ---
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    versions = {}
+    for name in ("streamlit", "numpy", "pandas"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def _summary(samples, unit, compare_by):
+    """compare_by 為 --compare 時使用的統計值 ("min" 或 "median")。"""
+    return {"unit": unit, "min": min(samples), "median": statistics.median(samples), "samples": len(samples),
+            "compare_by": compare_by}
+
+
+# --- 微基準 ---
+def micro_benchmarks(repeat):
+    result = run_pipeline(normalize_cat_inputs(SAMPLE_CAT), include_report=False)
+    sections = [result[name] for name in ("cat_info", "der_info", "intake_analysis", "monthly_cost_info", "feeding_plan")]
+    cases = {
+        "calculate_rer": lambda: calculate_rer(4.5),
+        "get_activity_multiplier": lambda: get_activity_multiplier(38, True, 6),
+        "generate_text_report": lambda: generate_text_report(*sections),
+    }
+    results = {}
+    for name, func in cases.items():
+        timer = timeit.Timer(func)
+        loops, _ = timer.autorange() # 每輪至少 0.2 秒
+        samples = [t / loops * 1e9 for t in timer.repeat(repeat, loops)]
+        results[name] = {**_summary(samples, "ns", "min"), "loops": loops}
+        print(f"  {name:<28}{results[name]['min']:>12,.0f} ns/次 (median {results[name]['median']:,.0f})")
+    return results
+
+
+# --- 端對端 (AppTest) ---
+def _run_pass(app):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=60)
+    timings = {}
+    for name, action in E2E_STAGES:
+        if action is None:
+            start = time.perf_counter()
+            at.run()
+        else:
+            if name == "step2_analyze_intake":
+                for key, value in E2E_INPUTS.items():
+                    at.number_input(key=key).set_value(value)
+            widget = at.button(key=action[1])
+            start = time.perf_counter()
+            widget.click().run()
+        timings[name] = (time.perf_counter() - start) * 1e3
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+    if not at.code:
+        raise RuntimeError("第四步沒有顯示報告。")
+    return timings
+
+
+def e2e_benchmarks(app, passes):
+    # AppTest 在 bare mode 下每輪都會警告缺少 ScriptRunContext，與測試無關
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    names = [name for name, _ in E2E_STAGES]
+    cold = _run_pass(app) # 第一輪：含匯入與快取暖機
+    runs = [_run_pass(app) for _ in range(passes)]
+    results = {name: _summary([run[name] for run in runs], "ms", "median") for name in names}
+    results["total"] = _summary([sum(run.values()) for run in runs], "ms", "median")
+    results["first_pass_total"] = _summary([sum(cold.values())], "ms", "median")
+    for name in (*names, "total", "first_pass_total"):
+        print(f"  {name:<28}{results[name]['median']:>12.2f} ms (min {results[name]['min']:.2f})")
+    return results
+
+
+# --- 比較 ---
+def compare(previous, current, threshold):
+    """逐項比較兩份結果 (各項的 compare_by 統計值)，印出變化，回傳退步的項目。"""
+    base = previous["environment"]
+    print(f"\n與 {base.get('commit')}{' (有未提交的修改)' if base.get('dirty') else ''} ({base.get('timestamp')}) 比較:")
+    if base.get("platform") != current["environment"]["platform"] or base.get("cpu_count") != current["environment"]["cpu_count"]:
+        print("  注意：兩份結果來自不同的機器，數字僅供參考。")
+    regressions = []
+    for group, cases in current["results"].items():
+        for name, stats in cases.items():
+            old = previous.get("results", {}).get(group, {}).get(name)
+            key = stats["compare_by"]
+            if not old or not old.get(key):
+                print(f"  {group}.{name:<34}(新項目)")
+                continue
+            ratio = stats[key] / old[key]
+            mark = ""
+            if ratio > 1 + threshold:
+                mark = "  <- 退步"
+                regressions.append(f"{group}.{name}")
+            elif ratio < 1 - threshold:
+                mark = "  <- 改善"
+            print(f"  {group}.{name:<34}{old[key]:>12,.2f} -> {stats[key]:>12,.2f} {stats['unit']:<3}"
+                  f"{key:<7}({ratio - 1:+.1%}){mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="結果 JSON 檔 (預設 benchmarks/results/<提交>.json)")
+    parser.add_argument("--compare", help="與先前的結果 JSON 比較")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="視為退步的變慢比例 (預設 0.10)")
+    parser.add_argument("--only", choices=("micro", "e2e"), help="只執行其中一組")
+    parser.add_argument("--repeat", type=int, default=7, help="微基準的輪數")
+    parser.add_argument("--passes", type=int, default=10, help="端對端的輪數 (不含暖機的第一輪)")
+    parser.add_argument("--app", default=os.path.join(ROOT, "catv3.py"), help="端對端測試的 Streamlit 程式")
+    args = parser.parse_args()
+
+    report = {"schema": SCHEMA_VERSION, "environment": environment(), "results": {}}
+    if args.only in (None, "micro"):
+        print("微基準:")
+        report["results"]["micro"] = micro_benchmarks(args.repeat)
+    if args.only in (None, "e2e"):
+        print(f"端對端 ({os.path.basename(args.app)}，第一步到第四步，{args.passes} 輪):")
+        report["results"]["e2e"] = e2e_benchmarks(os.path.abspath(args.app), args.passes)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['environment']['commit'] or 'unknown'}"
+                                                      f"{'-dirty' if report['environment']['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n結果已寫入 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n退步 (變慢超過 {args.threshold:.0%}): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+不確定範圍 (蒙地卡羅) 的速度測試：cat_uncertainty.simulate_uncertainty 與直接以 float64、
+Generator.normal / uniform 抽樣再呼叫 np.percentile 的寫法比較，並確認兩者的百分位數相近。
+
+用法: python benchmarks/bench_uncertainty.py [--samples 100000 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_core import DAYS_PER_MONTH, calculate_der  # noqa: E402
+from cat_uncertainty import PERCENTILES, UNCERTAINTY_DEFAULTS, simulate_uncertainty  # noqa: E402
+
+CAT = {"weight_kg": 4.0, "wet_food_percentage": 50, "dry_food_kcal_per_1000g": 3600.0, "wet_food_kcal_per_100g": 100.0,
+       "dry_food_package_weight": 1500.0, "dry_food_package_price": 300.0,
+       "wet_food_package_weight": 80.0, "wet_food_package_price": 30.0}
+
+
+def naive(weight_kg, multiplier, wet_food_percentage, dry_food_kcal_per_1000g, wet_food_kcal_per_100g,
+          dry_food_package_weight, dry_food_package_price, wet_food_package_weight, wet_food_package_price, samples):
+    """直覺寫法：float64、np.float_power、np.percentile。"""
+    rng = np.random.default_rng(1)
+    tolerance = UNCERTAINTY_DEFAULTS["kcal_tolerance"]
+    weight = np.maximum(rng.normal(weight_kg, UNCERTAINTY_DEFAULTS["weight_sd_kg"], samples), 0.1)
+    der = 70 * np.float_power(weight, 0.75) * multiplier * np.exp(rng.normal(0, UNCERTAINTY_DEFAULTS["multiplier_sd"], samples))
+    share = wet_food_percentage / 100
+    dry = der * (1 - share) / (dry_food_kcal_per_1000g / 1000 * rng.uniform(1 - tolerance, 1 + tolerance, samples))
+    wet = der * share / (wet_food_kcal_per_100g / 100 * rng.uniform(1 - tolerance, 1 + tolerance, samples))
+    cost = (dry * dry_food_package_price / dry_food_package_weight + wet * wet_food_package_price / wet_food_package_weight) * DAYS_PER_MONTH
+    return {name: dict(zip(PERCENTILES, np.percentile(values, PERCENTILES)))
+            for name, values in (("der", der), ("dry_grams", dry), ("wet_grams", wet), ("monthly_cost", cost))}
+
+
+def best_of(func, repeat):
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, nargs="+", default=[100_000, 1_000_000], help="樣本數")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最快)")
+    args = parser.parse_args()
+
+    multiplier = calculate_der(CAT["weight_kg"], 24, True, 5)["multiplier"]
+    values = list(CAT.values())
+    values.insert(1, multiplier)
+    print(f"{'樣本數':>10}{'直覺寫法':>12}{'simulate_uncertainty':>24}{'最大相對差':>12}")
+    for samples in args.samples:
+        naive_time, expected = best_of(lambda: naive(*values, samples), args.repeat)
+        fast_time, result = best_of(lambda: simulate_uncertainty(*values, samples=samples), args.repeat)
+        diff = max(abs(result[name][q] / expected[name][q] - 1) for name in expected for q in PERCENTILES)
+        print(f"{samples:>10,}{naive_time * 1e3:10.1f}ms{fast_time * 1e3:22.1f}ms{diff:12.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+體重趨勢的速度測試：一隻貓逐日加入 N 筆體重 (偶爾漏量幾天)，比較
+WeightTracker 的增量更新與每次重新掃描視窗計算 (np.polyfit) 的耗時，並確認結果一致。
+
+用法: python benchmarks/bench_weight_log.py [--entries 1000 10000 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cat_weight_log import TREND_WINDOW, WeightTracker  # noqa: E402
+
+
+def make_log(n, seed=0):
+    rng = random.Random(seed)
+    day, weight, log = date(2015, 1, 1), 4.0, []
+    for _ in range(n):
+        day += timedelta(days=rng.choice((1, 1, 1, 2, 3))) # 偶爾漏量幾天
+        weight = max(2.0, weight + rng.gauss(0, 0.03))
+        log.append((day, weight))
+    return log
+
+
+def rescan(log, i, days):
+    """每次都從頭找出視窗內的資料再計算。"""
+    end = log[i][0]
+    window = [(d.toordinal(), w) for d, w in log[:i + 1] if (end - d).days < days]
+    t, w = np.array(window, dtype=np.float64).T
+    slope = np.polyfit(t - t[0], w, 1)[0] if len(window) > 1 and t[-1] > t[0] else None
+    return w.mean(), slope
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1_000, 10_000, 50_000], help="體重筆數")
+    args = parser.parse_args()
+
+    print(f"{'筆數':>8}{'增量 (每筆)':>14}{'重新掃描 (每筆)':>18}{'平均最大差':>12}{'斜率最大差':>12}")
+    for n in args.entries:
+        log = make_log(n)
+        tracker = WeightTracker()
+        start = time.perf_counter()
+        for day, weight in log:
+            tracker.add(day, weight)
+            tracker.stats()
+        incremental = (time.perf_counter() - start) / n
+
+        # 重新掃描很慢，只量最後 200 筆並與增量結果比對
+        sample = range(n - 200, n)
+        check = WeightTracker()
+        results = []
+        for i, (day, weight) in enumerate(log):
+            check.add(day, weight)
+            if i in sample:
+                results.append(check.stats())
+        start = time.perf_counter()
+        expected = [rescan(log, i, TREND_WINDOW) for i in sample]
+        full = (time.perf_counter() - start) / len(sample)
+        mean_diff = max(abs(s.mean - m) for s, (m, _) in zip(results, expected))
+        slope_diff = max(abs(s.kg_per_week / 7 - k) for s, (_, k) in zip(results, expected))
+        print(f"{n:>8,}{incremental * 1e6:12.1f}µs{full * 1e6:16.1f}µs{mean_diff:12.1e}{slope_diff:12.1e}")
+
+
+if __name__ == "__main__":
+    main()
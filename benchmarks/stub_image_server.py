@@ -0,0 +1,137 @@
+"""
+離線測試用的圖片生成 API：與 OpenAI Images API 相同的 POST /v1/images/generations，
+回傳 {"created", "data": [{"b64_json"}]}。圖片是以提示為亂數種子的雜訊 PNG (以 Pillow 產生，相同請求只編碼一次)，
+1024x1024 約 3 MB，與真實生圖結果的大小相當。
+--latency 模擬生圖所需的秒數，--error-rate 為隨機回應 503 的比例 (測試重試)。不檢查 API 金鑰。
+
+用法:
+    python benchmarks/stub_image_server.py --port 8100 --latency 2 --error-rate 0.1
+    KURO_IMAGE_API_BASE=http://127.0.0.1:8100/v1 KURO_IMAGE_API_KEY=stub streamlit run catv3.py
+"""
+import argparse
+import base64
+import functools
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+
+@functools.lru_cache(maxsize=24) # 每張約 3 MB
+def stub_png(prompt, size):
+    width, height = (int(n) for n in size.split("x"))
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def stub_png_b64(prompt, size):
+    return base64.b64encode(stub_png(prompt, size)).decode("ascii")
+
+
+@functools.lru_cache(maxsize=24) # 回應內容也只編碼一次，伺服器處理請求時不會每次配置數 MB 的記憶體
+def _response_body(prompt, size):
+    return json.dumps({"created": int(time.time()), "data": [{"b64_json": stub_png_b64(prompt, size)}]}).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/images/generations"):
+            self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            prompt, size = body["prompt"], body.get("size", "1024x1024")
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"error": {"message": "invalid request"}})
+            return
+        failed = self.server.count_request()
+        time.sleep(self.server.latency)
+        if failed:
+            self._reply(503, {"error": {"message": "stub: temporarily unavailable"}})
+            return
+        self._send(200, _response_body(prompt, size))
+
+    def _reply(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _send(self, status, data):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # 不逐筆印出請求
+
+
+class StubImageServer(ThreadingHTTPServer):
+    """在背景執行緒啟動：server = StubImageServer(latency=0.5).start()；server.base_url 為 API 位址。"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, seed=0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.max_in_flight = 0 # 同時處理中的請求數的最大值
+        self._in_flight = 0
+        self._rng = random.Random(seed)
+        self._count_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def count_request(self):
+        """記錄一個請求，回傳這個請求是否要模擬失敗。"""
+        with self._count_lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def process_request_thread(self, request, client_address):
+        with self._count_lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._count_lock:
+                self._in_flight -= 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-image-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.0, help="每個請求等待的秒數")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="回應 503 的比例")
+    args = parser.parse_args()
+    server = StubImageServer(args.port, args.latency, args.error_rate)
+    print(f"{server.base_url}/images/generations (延遲 {args.latency}s，錯誤率 {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Kuro家貓咪熱量計算機 - JSON HTTP API
+
+把第一步到第四步的計算以非同步 HTTP 服務提供給合作夥伴 (餵食器廠商、診所系統)，不必操作 Streamlit 介面。
+以 Starlette + uvicorn 實作 (Streamlit 本身已依賴這兩個套件，不需額外安裝)。
+
+端點 (皆為 POST，請求內容為 JSON；單筆傳物件，批次傳陣列，回應的格式與請求相同):
+    /v1/rer          {"weight_kg"}                                                   -> {"rer"}
+    /v1/multiplier   {"age_months", "is_neutered", "bcs", "is_pregnant", "is_lactating"} -> {"multiplier"}
+    /v1/der          {"weight_kg", "age_months", "is_neutered", "bcs", ...}          -> {"rer", "multiplier", "der"}
+    /v1/intake       {"der", "dry_food_grams", "dry_food_kcal_per_1000g", "wet_food_grams", "wet_food_kcal_per_100g"}
+    /v1/cost         {"dry_food_grams", "dry_food_package_weight", "dry_food_package_price", "wet_food_grams", ...}
+    /v1/plan         {"der", "wet_food_percentage", "dry_food_kcal_per_1000g", "wet_food_kcal_per_100g"}
+    /v1/report       一隻貓的全部輸入 (欄位同 cat_cli.py 的 JSONL) -> 第一步到第四步的結果與報告；
+                     ?format=text|markdown|html 指定報告格式
+    GET /healthz
+
+欄位名稱即 cat_core 對應函數的參數名稱，有預設值的參數可省略；不認得的欄位一律回應錯誤。
+數值範圍與 cat_core.normalize_cat_inputs、介面相同 (例如體重與年齡必須大於零、BCS 介於 1 到 9)。
+單筆請求的輸入錯誤回應 400 {"error"}；批次請求中個別項目的錯誤以 {"error"} 放在該項目的位置，整批仍回應 200。
+輸入雖是有限的數字、但計算結果溢位 (例如熱量密度 1e-320 時餵食量為無限大) 也視為輸入錯誤，JSON 無法表示這種結果。
+
+用法:
+    python cat_api.py --port 8000
+    python cat_api.py --port 8000 --workers 4
+    curl -X POST localhost:8000/v1/der -d '{"weight_kg": 4, "age_months": 24, "is_neutered": true, "bcs": 5}'
+"""
+import argparse
+import inspect
+import json
+import math
+import os
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from cat_core import (CAT_INPUT_DEFAULTS, analyze_intake, build_feeding_plan, calculate_der, calculate_monthly_cost,
+                      calculate_rer, get_activity_multiplier, normalize_cat_inputs, run_pipeline)
+from cat_report import REPORT_FORMATS, get_renderer
+
+MAX_BATCH_ITEMS = int(os.environ.get("KURO_API_MAX_BATCH_ITEMS", "10000"))
+# 每筆計算只需數微秒，直接在事件迴圈中執行比丟到執行緒更快；
+# 批次超過這個筆數時才移到執行緒池，避免單一大批次讓其他連線等太久。
+OFFLOAD_BATCH_ITEMS = 256
+_LIMITS = {"bcs": (1, 9), "wet_food_percentage": (0, 100)} # 與介面、cat_core.normalize_cat_inputs 相同的範圍
+# 必須大於零的欄位與錯誤訊息 (同 normalize_cat_inputs)
+_POSITIVE = {"weight_kg": "體重必須大於零。", "age_months": "貓咪總年齡必須大於 0 個月。"}
+# /v1/report 接受的欄位：cat_core 的輸入欄位，加上 cat_cli JSONL 中識別貓咪的 cat_id
+_REPORT_FIELDS = {*CAT_INPUT_DEFAULTS, "cat_id"}
+_TRUE_VALUES = {True, "是", "true", "yes", "y", "1"}
+_FALSE_VALUES = {False, "否", "false", "no", "n", "0"}
+
+
+class InputError(ValueError):
+    """請求內容有誤 (回應 400 或該批次項目的 error)。"""
+
+
+def _parse_number(name, value, kind):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise InputError(f"{name} 必須是數字，收到 {value!r}")
+    try:
+        number = float(value)
+    except ValueError:
+        raise InputError(f"{name} 必須是數字，收到 {value!r}") from None
+    if not math.isfinite(number):
+        raise InputError(f"{name} 必須是有限的數字，收到 {value!r}")
+    if number < 0:
+        raise InputError(f"{name} 不可為負數。")
+    if kind is int:
+        if number != int(number):
+            raise InputError(f"{name} 必須是整數，收到 {value!r}")
+        return int(number)
+    return number
+
+
+def _parse_bool(name, value):
+    # 只接受 true/false、0/1 與文字；陣列、物件等不可雜湊的值不能拿去查集合
+    if isinstance(value, str):
+        key = value.strip().lower()
+    elif isinstance(value, bool) or (isinstance(value, int) and value in (0, 1)):
+        key = bool(value)
+    else:
+        raise InputError(f"{name} 必須是 true/false，收到 {value!r}")
+    if key in _TRUE_VALUES:
+        return True
+    if key in _FALSE_VALUES:
+        return False
+    raise InputError(f"{name} 必須是 true/false，收到 {value!r}")
+
+
+def _arguments(func, types):
+    """由函數簽章取得 (參數名稱, 型別, 預設值) 清單；沒有預設值的參數為必填。"""
+    parameters = inspect.signature(func).parameters
+    return [(name, kind, parameters[name].default) for name, kind in types.items()]
+
+
+def _check_fields(item, allowed):
+    """每筆資料必須是 JSON 物件，且只含 allowed 中的欄位。"""
+    if not isinstance(item, dict):
+        raise InputError("每筆資料必須是 JSON 物件。")
+    unknown = set(item) - set(allowed)
+    if unknown:
+        raise InputError(f"不支援的欄位: {', '.join(sorted(unknown))}")
+
+
+def _call(func, arguments, item):
+    _check_fields(item, [name for name, _, _ in arguments])
+    kwargs = {}
+    for name, kind, default in arguments:
+        value = item.get(name)
+        if value is None:
+            if default is inspect.Parameter.empty:
+                raise InputError(f"缺少必填欄位 {name}。")
+            continue
+        kwargs[name] = _parse_bool(name, value) if kind is bool else _parse_number(name, value, kind)
+        if name in _LIMITS and not _LIMITS[name][0] <= kwargs[name] <= _LIMITS[name][1]:
+            raise InputError(f"{name} 必須介於 {_LIMITS[name][0]} 到 {_LIMITS[name][1]}。")
+        if name in _POSITIVE and kwargs[name] <= 0:
+            raise InputError(_POSITIVE[name])
+    return func(**kwargs)
+
+
+def _check_finite(value, name=None):
+    """計算結果中不可有 inf / nan (JSON 無法表示)；有時以 InputError 回報是哪個欄位。"""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise InputError(f"計算結果 {name} 超出可表示的範圍，請檢查輸入的數值 (例如熱量密度是否過小)。")
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _check_finite(item, key)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _check_finite(item, name)
+
+
+def _endpoint(func, result_key=None, **types):
+    """把 cat_core 的函數包成處理一筆資料的函數 (參數驗證 + 呼叫)。"""
+    arguments = _arguments(func, types)
+
+    def handle(item):
+        result = _call(func, arguments, item)
+        if result is None:
+            raise InputError("體重必須大於零。")
+        _check_finite(result, result_key)
+        return {result_key: result} if result_key else result
+    return handle
+
+
+_MULTIPLIER_TYPES = {"age_months": float, "is_neutered": bool, "bcs": int, "is_pregnant": bool, "is_lactating": bool}
+
+HANDLERS = {
+    "rer": _endpoint(calculate_rer, "rer", weight_kg=float),
+    "multiplier": _endpoint(get_activity_multiplier, "multiplier", **_MULTIPLIER_TYPES),
+    "der": _endpoint(calculate_der, weight_kg=float, **_MULTIPLIER_TYPES),
+    "intake": _endpoint(analyze_intake, der=float, dry_food_grams=float, dry_food_kcal_per_1000g=float,
+                        wet_food_grams=float, wet_food_kcal_per_100g=float),
+    "cost": _endpoint(calculate_monthly_cost, dry_food_grams=float, dry_food_package_weight=float,
+                      dry_food_package_price=float, wet_food_grams=float, wet_food_package_weight=float,
+                      wet_food_package_price=float),
+    "plan": _endpoint(build_feeding_plan, der=float, wet_food_percentage=float,
+                      dry_food_kcal_per_1000g=float, wet_food_kcal_per_100g=float),
+}
+
+
+def _report_handler(report_format):
+    renderer = get_renderer(report_format)
+    header = renderer.header(datetime.now()) # 同一個請求 (整批) 共用同一個產生時間，與 cat_cli 相同
+
+    def handle(item):
+        _check_fields(item, _REPORT_FIELDS)
+        try:
+            cat = normalize_cat_inputs(item)
+        except ValueError as e:
+            raise InputError(str(e)) from None
+        result = run_pipeline(cat, include_report=False)
+        _check_finite(result)
+        result["report"] = header + renderer.body(result["cat_info"], result["der_info"], result["intake_analysis"],
+                                                  result["monthly_cost_info"], result["feeding_plan"])
+        return result
+    return handle
+
+
+def _run_batch(handle, items):
+    results = []
+    for item in items:
+        try:
+            results.append(handle(item))
+        except InputError as e:
+            results.append({"error": str(e)})
+    return results
+
+
+async def _respond(request, handle):
+    try:
+        payload = json.loads(await request.body())
+    except ValueError as e:
+        return JSONResponse({"error": f"JSON 格式錯誤: {e}"}, status_code=400)
+    if not isinstance(payload, list):
+        try:
+            return JSONResponse(handle(payload))
+        except InputError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+    if len(payload) > MAX_BATCH_ITEMS:
+        return JSONResponse({"error": f"一次最多 {MAX_BATCH_ITEMS} 筆，收到 {len(payload)} 筆。"}, status_code=413)
+    if len(payload) > OFFLOAD_BATCH_ITEMS:
+        # 計算與 JSON 編碼 (在 JSONResponse 建構時進行) 都移到執行緒
+        return await run_in_threadpool(lambda: JSONResponse(_run_batch(handle, payload)))
+    return JSONResponse(_run_batch(handle, payload))
+
+
+def _calculation_route(name, handle):
+    async def endpoint(request):
+        return await _respond(request, handle)
+    return Route(f"/v1/{name}", endpoint, methods=["POST"], name=name)
+
+
+async def report(request):
+    report_format = request.query_params.get("format", "text")
+    if report_format not in REPORT_FORMATS:
+        return JSONResponse({"error": f"不支援的報告格式 {report_format!r} (可用: {', '.join(REPORT_FORMATS)})"},
+                            status_code=400)
+    return await _respond(request, _report_handler(report_format))
+
+
+async def healthz(request):
+    return JSONResponse({"status": "ok"})
+
+
+app = Starlette(routes=[
+    *(_calculation_route(name, handle) for name, handle in HANDLERS.items()),
+    Route("/v1/report", report, methods=["POST"]),
+    Route("/healthz", healthz, methods=["GET"]),
+])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址 (預設 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="埠號 (預設 8000)")
+    parser.add_argument("--workers", type=int, default=1, help="工作行程數 (預設 1；多核心機器可設為核心數)")
+    args = parser.parse_args(argv)
+    # httptools 解析器 (Streamlit 的依賴) 比純 Python 的 h11 快；關閉存取紀錄，避免每個請求都寫一行 log
+    uvicorn.run("cat_api:app", host=args.host, port=args.port, workers=args.workers,
+                http="httptools", access_log=False, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
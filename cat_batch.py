@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+import numpy as np
+
+from cat_rules import BCS_MAX, BCS_MIN, DEFAULT_RULE_SET, age_stage_index, table_index
+
+# --- 批次計算 (收容所 / 診所名冊) ---
+# 與 cat_core.calculate_rer / get_activity_multiplier 逐筆結果完全一致，
+# 但一次以 NumPy 陣列處理整批貓咪，不在 Python 迴圈中逐隻判斷。
+
+DerBatch = namedtuple("DerBatch", ["rer", "multiplier", "der"])
+
+
+def calculate_rer_batch(weight_kg):
+    """
+    批次計算 RER。公式與 calculate_rer 相同: RER = 70 * (體重kg ** 0.75)
+    體重 <= 0 的位置回傳 NaN (單筆版本回傳 None)。
+    """
+    weight = np.asarray(weight_kg, dtype=np.float64)
+    valid = weight > 0
+    # float_power 逐元素呼叫 libm 的 pow()，結果與 Python 的 float ** 0.75 位元一致；
+    # np.power 的 SIMD 版本會有 1 ulp 的差異。
+    rer = 70 * np.float_power(np.where(valid, weight, 1.0), 0.75)
+    return np.where(valid, rer, np.nan)
+
+
+def get_activity_multiplier_batch(age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False, rule_set=None):
+    """
+    批次版 get_activity_multiplier，所有參數可為純量或等長陣列。
+    以規則集查詢表做一次 gather，不做逐隻分支判斷。
+    """
+    rule_set = rule_set or DEFAULT_RULE_SET
+    table = np.asarray(rule_set.table, dtype=np.float64)
+    stage = age_stage_index(np.asarray(age_months, dtype=np.float64))
+    bcs = np.clip(np.asarray(bcs).astype(np.intp), BCS_MIN, BCS_MAX)
+    index = table_index(
+        stage, np.asarray(is_neutered, dtype=bool), bcs,
+        np.asarray(is_pregnant, dtype=bool), np.asarray(is_lactating, dtype=bool),
+    )
+    return table[index]
+
+
+def calculate_der_batch(weight_kg, age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False, rule_set=None):
+    """一次計算整批貓咪的 RER、活動係數與 DER，回傳 DerBatch(rer, multiplier, der)。"""
+    rer = calculate_rer_batch(weight_kg)
+    multiplier = get_activity_multiplier_batch(age_months, is_neutered, bcs, is_pregnant, is_lactating, rule_set)
+    return DerBatch(rer, multiplier, rer * multiplier)
@@ -0,0 +1,172 @@
+"""
+Kuro家貓咪熱量計算機 - BCS 評分指南圖示
+
+第一步 BCS 滑桿旁的體態示意圖 (俯視的黑貓輪廓：過瘦時腰身內凹、看得到肋骨，肥胖時腰腹向外突出)，
+每個 BCS 分級 (cat_images.BCS_CLASSES) 一張。圖檔在建置時產生並納入版本控制 (assets/bcs_guide/)：
+    - 以 GUIDE_SUPERSAMPLE 倍的解析度繪製後以 LANCZOS 縮小 (邊緣平滑)，輸出 GUIDE_WIDTHS 的每個寬度；
+    - 縮小後量化為 GUIDE_COLORS 色的調色盤 (圖只有幾種平塗的顏色與反鋸齒的邊緣)，再存成
+      無損 WebP (介面使用，約為 PNG 的三分之二) 與最佳化的 PNG (給不支援 WebP 的用途)。
+執行時只讀取需要的那一個檔案 (依顯示寬度與螢幕像素比挑選寬度)，每個行程讀一次後快取成 data URI，
+不需要 Pillow，也不會在每次重跑時縮放或重新編碼圖片。
+
+用法:
+    python cat_bcs_guide.py                      # 重新產生 assets/bcs_guide/ 下的所有圖檔
+    python cat_bcs_guide.py --widths 120 240 --output /tmp/bcs_guide
+"""
+import argparse
+import base64
+import functools
+import math
+import os
+
+from cat_images import BCS_CLASSES, bcs_class
+
+# --- 圖檔位置與規格 ---
+GUIDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "bcs_guide")
+GUIDE_WIDTHS = (120, 240, 480) # 產生的寬度 (像素)；高度為寬度的 GUIDE_ASPECT 倍
+GUIDE_ASPECT = 1.25
+GUIDE_FORMATS = ("webp", "png")
+GUIDE_MIME_TYPES = {"webp": "image/webp", "png": "image/png"}
+GUIDE_DISPLAY_WIDTH = 120 # 第一步的顯示寬度 (CSS 像素)
+GUIDE_PIXEL_RATIO = 2 # 以兩倍像素的圖顯示，高解析度螢幕上也清晰
+GUIDE_SUPERSAMPLE = 4
+GUIDE_COLORS = 16
+
+# --- 各分級的輪廓 (以畫布寬度為 1 的比例) ---
+# (肩寬, 腰寬, 臀寬, 肋骨線數)：腰寬小於肩、臀時有腰身，大於時腹部外突
+GUIDE_SHAPES = {
+    1: (0.34, 0.16, 0.30, 4),
+    4: (0.38, 0.28, 0.36, 0),
+    6: (0.42, 0.42, 0.42, 0),
+    8: (0.46, 0.60, 0.48, 0),
+}
+FUR_COLOR = (40, 40, 46, 255)
+RIB_COLOR = (120, 120, 130, 255)
+EAR_COLOR = (230, 150, 160, 255)
+
+
+def asset_name(bcs, width, fmt):
+    """BCS 分級在指定寬度與格式的檔名，例如 bcs-4-5-w240.webp。"""
+    low, high = bcs_class(bcs)[:2]
+    return f"bcs-{low}-{high}-w{width}.{fmt}"
+
+
+def variant_width(display_width=GUIDE_DISPLAY_WIDTH, pixel_ratio=GUIDE_PIXEL_RATIO, widths=GUIDE_WIDTHS):
+    """顯示寬度 x 像素比所需的最小寬度；都不夠大時用最大的寬度。"""
+    needed = display_width * pixel_ratio
+    return min((w for w in widths if w >= needed), default=max(widths))
+
+
+def asset_path(bcs, width=None, fmt="webp", directory=GUIDE_DIR):
+    """指南圖檔的路徑 (不檢查檔案是否存在)；width 為 None 時依第一步的顯示寬度挑選。"""
+    return os.path.join(directory, asset_name(bcs, width or variant_width(), fmt))
+
+
+@functools.lru_cache(maxsize=len(BCS_CLASSES) * len(GUIDE_FORMATS))
+def _data_uri(path, mime_type):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def guide_data_uri(bcs, width=None, fmt="webp"):
+    """BCS 所屬分級的指南圖示 (data URI，可直接放進 <img src>)；圖檔尚未產生時回傳 None。
+    每個檔案在行程中只讀取與編碼一次。"""
+    return _data_uri(asset_path(bcs, width, fmt), GUIDE_MIME_TYPES[fmt])
+
+
+# --- 建置：繪製與輸出圖檔 (需要 Pillow) ---
+
+def render_guide(bcs, width):
+    """繪製 BCS 所屬分級的俯視輪廓，回傳 width 像素寬、GUIDE_COLORS 色調色盤 (含透明) 的 PIL.Image。"""
+    from PIL import Image, ImageDraw # 只有建置圖檔時才需要
+
+    scale = width * GUIDE_SUPERSAMPLE
+    height = round(scale * GUIDE_ASPECT)
+    shoulders, waist, hips, ribs = GUIDE_SHAPES[bcs_class(bcs)[0]]
+    image = Image.new("RGBA", (scale, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    cx = scale / 2
+
+    # 身體輪廓的半寬：頸、肩、腰、臀之間以餘弦平滑內插，臀部以下收成圓弧
+    profile = [(0.30, 0.09), (0.44, shoulders / 2), (0.60, waist / 2), (0.76, hips / 2)]
+
+    def half_width(t):
+        if t >= profile[-1][0]:
+            return hips / 2 * math.sqrt(max(0.0, 1 - ((t - profile[-1][0]) / 0.12) ** 2))
+        for (t0, w0), (t1, w1) in zip(profile, profile[1:]):
+            if t <= t1:
+                k = (1 - math.cos(math.pi * (t - t0) / (t1 - t0))) / 2
+                return w0 + (w1 - w0) * k
+        return profile[0][1]
+
+    steps = [0.30 + 0.58 * i / 120 for i in range(121)]
+    right = [(cx + half_width(t) * scale, t * height) for t in steps]
+    left = [(2 * cx - x, y) for x, y in reversed(right)]
+    # 尾巴：從臀部往右下彎曲的粗線
+    tail = [(cx + 0.26 * scale * math.sin(i / 10 * math.pi / 2), height * (0.84 + 0.1 * math.sin(i / 10 * math.pi)))
+            for i in range(11)]
+    draw.line(tail, fill=FUR_COLOR, width=round(0.05 * scale), joint="curve")
+    draw.polygon(right + left, fill=FUR_COLOR)
+    # 頭與耳朵
+    head_y, head_w, head_h = height * 0.22, 0.32 * scale, 0.27 * scale
+    draw.ellipse((cx - head_w / 2, head_y - head_h / 2, cx + head_w / 2, head_y + head_h / 2), fill=FUR_COLOR)
+    for side in (-1, 1):
+        ear = [(cx + side * head_w * 0.12, head_y - head_h * 0.40), (cx + side * head_w * 0.44, head_y - head_h * 0.80),
+               (cx + side * head_w * 0.48, head_y - head_h * 0.05)]
+        draw.polygon(ear, fill=FUR_COLOR)
+        inner = [(cx + side * head_w * 0.24, head_y - head_h * 0.36), (cx + side * head_w * 0.42, head_y - head_h * 0.64),
+                 (cx + side * head_w * 0.42, head_y - head_h * 0.22)]
+        draw.polygon(inner, fill=EAR_COLOR)
+    # 過瘦：腰側看得到的肋骨 (沿著輪廓內側的短弧線)
+    for i in range(ribs):
+        t = 0.47 + 0.04 * i
+        y = t * height
+        for side in (-1, 1):
+            x = cx + side * (half_width(t) - 0.045) * scale
+            draw.line([(x - side * 0.05 * scale, y - 0.012 * scale), (x, y), (x + side * 0.025 * scale, y + 0.02 * scale)],
+                      fill=RIB_COLOR, width=round(0.01 * scale), joint="curve")
+    image = image.resize((width, round(width * GUIDE_ASPECT)), Image.LANCZOS)
+    return image.quantize(GUIDE_COLORS, method=Image.Quantize.FASTOCTREE)
+
+
+def save_guide(image, path, fmt):
+    """以最小的設定存檔 (WebP 無損、PNG optimize)；先寫暫存檔再改名。"""
+    tmp = f"{path}.tmp"
+    if fmt == "webp":
+        image.save(tmp, format="WEBP", lossless=True, method=6)
+    else:
+        image.save(tmp, format="PNG", optimize=True)
+    os.replace(tmp, path)
+
+
+def build_guide_assets(directory=GUIDE_DIR, widths=GUIDE_WIDTHS, formats=GUIDE_FORMATS):
+    """產生每個 BCS 分級在每個寬度與格式的圖檔，回傳 [(路徑, 位元組數)]。"""
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for low, *_ in BCS_CLASSES:
+        for width in widths:
+            image = render_guide(low, width)
+            for fmt in formats:
+                path = asset_path(low, width, fmt, directory)
+                save_guide(image, path, fmt)
+                written.append((path, os.path.getsize(path)))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=GUIDE_DIR, help="輸出目錄")
+    parser.add_argument("--widths", type=int, nargs="+", default=GUIDE_WIDTHS, help="產生的寬度 (像素)")
+    args = parser.parse_args()
+    written = build_guide_assets(args.output, args.widths)
+    for path, size in written:
+        print(f"{os.path.relpath(path)}  {size / 1e3:.1f} KB")
+    print(f"共 {len(written)} 個檔案，{sum(size for _, size in written) / 1e3:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
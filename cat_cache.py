@@ -0,0 +1,133 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from cat_core import REPORT_APP_NAME
+from cat_report import get_renderer
+
+# --- 跨 session 的計算結果快取 ---
+# Streamlit 每次互動都會從頭重跑 main()；很多使用者輸入的是相同的常見數值
+# (例如 4 公斤、已絕育、BCS 5、3600 大卡/公斤的乾乾)。
+# 這裡的快取放在模組層級，同一個伺服器行程內所有 session 共用；
+# 以正規化後的輸入為鍵，LRU + TTL 淘汰，並統計命中/未命中次數。
+# 目前只快取報告內容：DER、飲食分析與伙食費本身都在 1 微秒內算完，
+# 比建鍵加查表還快，快取它們反而更慢 (數據見 benchmarks/bench_cache.py)。
+
+CACHE_MAX_ENTRIES = int(os.environ.get("KURO_CACHE_MAX_ENTRIES", "4096"))
+CACHE_TTL_SECONDS = float(os.environ.get("KURO_CACHE_TTL_SECONDS", "3600"))
+_FLOAT_DIGITS = 6 # 浮點數正規化到小數第 6 位，避免 4 與 4.0000000001 被視為不同輸入
+
+
+class TTLCache:
+    """有容量上限 (LRU) 與存活時間 (TTL) 的執行緒安全快取。"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, timer=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._timer = timer
+        self._data = OrderedDict() # key -> (到期時間, 值)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """回傳 (是否命中, 值)。過期的項目視為未命中並移除。"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > self._timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[1]
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (self._timer() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data), "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def normalize_key(args):
+    """
+    把位置參數轉成可雜湊的快取鍵。
+    純量參數是使用者輸入：浮點數四捨五入、布林轉成 0/1。
+    dict 參數是 cat_core 由這些輸入算出的結果 (欄位順序與值都是確定的)，
+    直接以 tuple(items) 表示，不逐項處理，讓建鍵成本遠低於重新計算。
+    """
+    key = []
+    for value in args:
+        kind = type(value)
+        if kind is float:
+            value = round(value, _FLOAT_DIGITS)
+        elif kind is bool:
+            value = int(value)
+        elif kind is dict:
+            value = tuple(value.items())
+        key.append(value)
+    return tuple(key)
+
+
+def _detach(value):
+    # 回傳淺層複本，避免呼叫端修改到快取中的 dict
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, tuple):
+        return tuple(_detach(v) for v in value)
+    return value
+
+
+def memoize(cache):
+    """以 cache 快取函數結果的裝飾器，鍵為正規化後的位置參數。"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = normalize_key(args)
+            hit, value = cache.get(key)
+            if not hit:
+                value = func(*args)
+                cache.put(key, value)
+            return _detach(value)
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+report_cache = TTLCache()
+
+
+_text_renderer = get_renderer("text")
+_cached_report_body = memoize(report_cache)(_text_renderer.body)
+
+
+def cached_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=REPORT_APP_NAME):
+    """快取版 generate_text_report：報告內容來自快取，只有含時間的標題行每次重新產生。"""
+    return _text_renderer.header(datetime.now()) + _cached_report_body(
+        cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name)
+
+
+def cache_stats():
+    """所有快取的統計資料，可用於除錯面板或監控。"""
+    return {"report": report_cache.stats()}
@@ -0,0 +1,259 @@
+"""
+Kuro家貓咪熱量計算機 - 命令列批次模式
+
+讀入 CSV 或 JSONL (每列/每行一隻貓)，對每隻貓執行第一步到第四步
+(DER、目前飲食分析、每月伙食費、建議餵食計畫與文字報告)，結果逐筆寫出。
+讀取、計算、寫出串成產生器管線，無論檔案多大，記憶體用量都固定。
+--workers 大於 1 (或 0 代表 CPU 核心數) 時，資料列每 --chunk-size 筆一組分送到行程池平行計算，
+結果依原本的順序逐組寫出；同時送出的組數有上限，記憶體用量仍然固定。
+驗證失敗的資料列會寫到錯誤檔 (JSONL)，不會中斷整批處理。
+
+用法:
+    python cat_cli.py cats.csv -o plans.jsonl --errors errors.jsonl
+    python cat_cli.py cats.jsonl -o plans.csv --no-report
+    python cat_cli.py cats.csv -o plans.jsonl --report-format markdown
+    cat cats.csv | python cat_cli.py - --input-format csv > plans.jsonl
+    python cat_cli.py roster.csv -o reports.jsonl --workers 0    # 使用所有 CPU 核心平行處理
+
+欄位名稱見 cat_core.CAT_INPUT_DEFAULTS；另可加 cat_id 欄位，未提供時以資料列號代替。
+"""
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from cat_core import normalize_cat_inputs, run_pipeline
+from cat_report import REPORT_FORMATS, get_renderer
+
+CSV_OUTPUT_FIELDS = (
+    "cat_id", "rer", "multiplier", "der",
+    "dry_food_kcal", "wet_food_kcal", "total_intake", "calorie_difference",
+    "daily_dry_cost", "daily_wet_cost", "total_daily_cost", "total_monthly_cost",
+    "wet_food_percentage", "required_dry_grams", "required_wet_grams", "report",
+)
+DEFAULT_CHUNK_SIZE = 2000 # 平行處理時每組的資料列數：太小則行程間傳遞的開銷比例高，太大則第一筆結果出來得慢
+_CHUNKS_IN_FLIGHT_PER_WORKER = 2 # 每個行程最多排隊的組數 (讓行程不必等待下一組，又不會把整個檔案讀進記憶體)
+
+
+def _detect_format(path, explicit):
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _open(path, mode, fmt):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    # CSV 可能是 Excel 存的 (帶 BOM)，讀取時用 utf-8-sig
+    encoding = "utf-8-sig" if fmt == "csv" and mode == "r" else "utf-8"
+    return open(path, mode, encoding=encoding, newline="" if fmt == "csv" else None)
+
+
+def read_rows(stream, fmt):
+    """逐列讀取輸入，產生 (資料列號, 原始 dict)。JSONL 中無法解析的行產生 (列號, ValueError)。"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for line_no, row in enumerate(reader, start=2): # 第 1 列是標題
+            yield line_no, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("每行必須是一個 JSON 物件")
+        except ValueError as e:
+            yield line_no, ValueError(f"JSON 格式錯誤: {e}")
+            continue
+        yield line_no, row
+
+
+def _process_row(line_no, row, renderer, header):
+    """處理一列，回傳 (cat_id, 結果 dict) 或錯誤 (列號, cat_id, 訊息, 原始資料)，以第一個元素是否為 None 區分。"""
+    if isinstance(row, Exception):
+        return None, (line_no, None, str(row), None)
+    cat_id = row.get("cat_id")
+    if cat_id is None or cat_id == "": # 0 或 "0" 是合法的 cat_id，只有缺少或空白時才以列號代替
+        cat_id = str(line_no)
+    try:
+        cat = normalize_cat_inputs(row)
+    except ValueError as e:
+        return None, (line_no, cat_id, str(e), row)
+    result = run_pipeline(cat, include_report=False)
+    if renderer is not None:
+        result["report"] = header + renderer.body(result["cat_info"], result["der_info"], result["intake_analysis"],
+                                                  result["monthly_cost_info"], result["feeding_plan"])
+    return cat_id, result
+
+
+def process_rows(rows, on_error, include_report=True, report_format="text"):
+    """
+    對每一列執行驗證與計算，產生 (cat_id, 結果 dict)；錯誤交給 on_error(列號, cat_id, 訊息, 原始資料)。
+    報告以 cat_report 產生 (report_format 為 text、markdown 或 html)，整批共用同一個產生時間。
+    """
+    renderer = get_renderer(report_format) if include_report else None
+    header = renderer.header(datetime.now()) if include_report else ""
+    for line_no, row in rows:
+        cat_id, outcome = _process_row(line_no, row, renderer, header)
+        if cat_id is None:
+            on_error(*outcome)
+        else:
+            yield cat_id, outcome
+
+
+def _flatten(cat_id, result):
+    record = {"cat_id": cat_id, "report": result.get("report", "")}
+    for section in ("der_info", "intake_analysis", "monthly_cost_info", "feeding_plan"):
+        for key, value in result[section].items():
+            if key in CSV_OUTPUT_FIELDS:
+                record[key] = value
+    return record
+
+
+def _csv_writer(stream):
+    return csv.DictWriter(stream, fieldnames=CSV_OUTPUT_FIELDS, extrasaction="ignore")
+
+
+def _write_records(results, stream, fmt):
+    """逐筆寫出結果 (CSV 不含標題列)，回傳寫出的筆數。"""
+    count = 0
+    if fmt == "csv":
+        writer = _csv_writer(stream)
+        for cat_id, result in results:
+            writer.writerow(_flatten(cat_id, result))
+            count += 1
+        return count
+    for cat_id, result in results:
+        stream.write(json.dumps({"cat_id": cat_id, **result}, ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_results(results, stream, fmt):
+    """逐筆寫出結果，回傳寫出的筆數。"""
+    if fmt == "csv":
+        _csv_writer(stream).writeheader()
+    return _write_records(results, stream, fmt)
+
+
+def _process_chunk(chunk, include_report, report_format, header, output_format):
+    """
+    在子行程中處理一組資料列，回傳 (UTF-8 編碼的輸出, 成功筆數, 錯誤清單)。
+    結果在子行程中就編碼成輸出格式與 UTF-8 位元組：JSON/CSV 編碼的時間與計算相當，留在主行程會成為瓶頸；
+    傳回一整段 bytes 的 pickle 幾乎只是記憶體複製，比傳回許多 dict 或含中文的 str 快得多。
+    renderer 內含編譯好的函數無法 pickle，依格式名稱在子行程中取得。
+    """
+    renderer = get_renderer(report_format) if include_report else None
+    errors = []
+
+    def successes():
+        # 逐筆產生、逐筆編碼，不必同時保留整組的結果 dict
+        for line_no, row in chunk:
+            cat_id, outcome = _process_row(line_no, row, renderer, header)
+            if cat_id is None:
+                errors.append(outcome)
+            else:
+                yield cat_id, outcome
+
+    buffer = io.StringIO(newline="")
+    count = _write_records(successes(), buffer, output_format)
+    return buffer.getvalue().encode("utf-8"), count, errors
+
+
+def _write_encoded(stream, data, fmt):
+    # 輸出檔是 UTF-8 且不需要換行轉換時直接寫入底層的二進位檔，省下主行程解碼再編碼的時間
+    encoding = (getattr(stream, "encoding", None) or "").lower().replace("-", "")
+    if hasattr(stream, "buffer") and encoding == "utf8" and (fmt == "csv" or os.linesep == "\n"):
+        stream.flush()
+        stream.buffer.write(data)
+    else:
+        stream.write(data.decode("utf-8"))
+
+
+def write_results_parallel(rows, stream, fmt, on_error, include_report=True, report_format="text", workers=0,
+                           chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    與 process_rows + write_results 的輸出完全相同，但把資料列每 chunk_size 筆一組送到行程池
+    (workers 為 0 時使用所有 CPU 核心) 平行計算與編碼，回傳寫出的筆數。
+    結果與錯誤依輸入順序寫出；最多只有 workers x 2 組在處理中，讀取與記憶體用量不會超前太多。
+    """
+    if workers < 0 or chunk_size < 1:
+        raise ValueError(f"workers 必須 >= 0、chunk_size 必須 >= 1，收到 {workers}、{chunk_size}")
+    workers = workers or os.cpu_count() or 1
+    header = get_renderer(report_format).header(datetime.now()) if include_report else ""
+    rows = iter(rows)
+    chunks = iter(lambda: list(itertools.islice(rows, chunk_size)), [])
+    if fmt == "csv":
+        _csv_writer(stream).writeheader()
+    count = 0
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(_process_chunk, chunk, include_report, report_format, header, fmt)
+                        for chunk in itertools.islice(chunks, workers * _CHUNKS_IN_FLIGHT_PER_WORKER))
+        while pending:
+            data, written, errors = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(pool.submit(_process_chunk, chunk, include_report, report_format, header, fmt))
+            for error in errors:
+                on_error(*error)
+            _write_encoded(stream, data, fmt)
+            count += written
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="輸入檔 (CSV 或 JSONL)，- 代表標準輸入")
+    parser.add_argument("-o", "--output", default="-", help="輸出檔 (CSV 或 JSONL)，預設為標準輸出")
+    parser.add_argument("--errors", default="errors.jsonl", help="驗證錯誤的輸出檔 (預設 errors.jsonl)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="輸入格式 (預設依副檔名判斷)")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), help="輸出格式 (預設依副檔名判斷)")
+    parser.add_argument("--no-report", action="store_true", help="不產生文字報告，只輸出數值")
+    parser.add_argument("--report-format", choices=REPORT_FORMATS, default="text", help="報告格式 (預設 text)")
+    parser.add_argument("--workers", type=int, default=1, help="平行處理的行程數 (預設 1 不平行；0 代表 CPU 核心數)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"平行處理時每組的資料列數 (預設 {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error(f"--workers 必須 >= 0 (0 代表 CPU 核心數)，收到 {args.workers}")
+    if args.chunk_size < 1:
+        parser.error(f"--chunk-size 必須 >= 1，收到 {args.chunk_size}")
+
+    input_format = _detect_format(args.input, args.input_format)
+    output_format = _detect_format(args.output, args.output_format)
+    error_count = 0
+
+    with _open(args.input, "r", input_format) as source, _open(args.output, "w", output_format) as sink, \
+            open(args.errors, "w", encoding="utf-8") as error_sink:
+
+        def on_error(line_no, cat_id, message, row):
+            nonlocal error_count
+            error_count += 1
+            error_sink.write(json.dumps({"line": line_no, "cat_id": cat_id, "error": message, "row": row},
+                                        ensure_ascii=False))
+            error_sink.write("\n")
+
+        rows = read_rows(source, input_format)
+        if args.workers == 1:
+            results = process_rows(rows, on_error, include_report=not args.no_report, report_format=args.report_format)
+            written = write_results(results, sink, output_format)
+        else:
+            written = write_results_parallel(rows, sink, output_format, on_error, include_report=not args.no_report,
+                                             report_format=args.report_format, workers=args.workers,
+                                             chunk_size=args.chunk_size)
+
+    print(f"完成：成功 {written} 筆，錯誤 {error_count} 筆 (錯誤明細: {args.errors})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
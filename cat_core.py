@@ -0,0 +1,266 @@
+import math
+from datetime import datetime
+
+from cat_rules import DEFAULT_RULE_SET, lookup_multiplier
+
+# --- 核心計算 (不依賴 Streamlit) ---
+# catv1 / catv3 的介面只負責輸入與顯示，所有計算都在這裡。
+# 本模組只用到標準函式庫與 cat_rules，匯入只需數毫秒；
+# 函數皆為無副作用的純函數，不保存任何全域可變狀態，可安全地在多執行緒或多行程中呼叫。
+
+REPORT_APP_NAME = "Kuro家貓咪熱量計算機"
+DAYS_PER_MONTH = 30 # 每月伙食費以30天計
+CALORIE_TOLERANCE = 5 # 攝取量與建議量相差 5 大卡以內視為接近建議值
+ENERGY_PER_KG = 7700.0 # 每增減 1 公斤體重約需的熱量 (大卡)，常用的能量平衡近似值
+
+# 一隻貓從第一步到第四步所需的全部輸入，預設值與 catv3 介面相同
+CAT_INPUT_DEFAULTS = {
+    "weight": None, "age_years": 0, "age_months": 0, "is_neutered": True, "bcs": 5,
+    "is_pregnant": False, "is_lactating": False,
+    "dry_food_grams": 0.0, "dry_food_kcal_per_1000g": 3600.0,
+    "dry_food_package_weight": 1500.0, "dry_food_package_price": 300.0,
+    "wet_food_grams": 0.0, "wet_food_kcal_per_100g": 100.0,
+    "wet_food_package_weight": 80.0, "wet_food_package_price": 30.0,
+    "wet_food_percentage": 50,
+}
+_FLOAT_INPUTS = ("weight", "dry_food_grams", "dry_food_kcal_per_1000g", "dry_food_package_weight", "dry_food_package_price",
+                 "wet_food_grams", "wet_food_kcal_per_100g", "wet_food_package_weight", "wet_food_package_price")
+_INT_INPUTS = ("age_years", "age_months", "bcs", "wet_food_percentage")
+_BOOL_INPUTS = ("is_neutered", "is_pregnant", "is_lactating")
+_TRUE_TEXT = {"是", "true", "yes", "y", "1"}
+_FALSE_TEXT = {"否", "false", "no", "n", "0"}
+
+
+def calculate_rer(weight_kg):
+    """
+    計算貓咪的休息能量需求 (Resting Energy Requirement, RER)。
+    公式: RER = 70 * (體重kg ** 0.75)
+    體重 <= 0 時回傳 None，由呼叫端決定如何顯示錯誤。
+    """
+    if weight_kg <= 0:
+        return None
+    return 70 * (float(weight_kg)**0.75)
+
+def get_activity_multiplier(age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False, rule_set=None):
+    """
+    根據貓咪的年齡、絕育狀態、BCS、懷孕/哺乳狀態，返回活動係數。
+    係數來自規則集查詢表 (預設 rules/kuro_v1.json)，詳見 cat_rules.py。
+    """
+    return lookup_multiplier(rule_set or DEFAULT_RULE_SET, age_months, is_neutered, bcs, is_pregnant, is_lactating)
+
+def calculate_der(weight_kg, age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False, rule_set=None):
+    """計算每日建議熱量 (DER)，回傳 der_info: {"rer", "multiplier", "der"}；體重無效時回傳 None。"""
+    rer = calculate_rer(weight_kg)
+    if rer is None:
+        return None
+    multiplier = get_activity_multiplier(age_months, is_neutered, bcs, is_pregnant, is_lactating, rule_set)
+    return {"rer": rer, "multiplier": multiplier, "der": rer * multiplier}
+
+def analyze_intake(der, dry_food_grams, dry_food_kcal_per_1000g, wet_food_grams, wet_food_kcal_per_100g):
+    """分析目前每日的熱量攝取，並與 DER 比較。"""
+    dry_food_calories = (dry_food_grams / 1000.0) * dry_food_kcal_per_1000g
+    wet_food_calories = (wet_food_grams / 100.0) * wet_food_kcal_per_100g
+    total_intake = dry_food_calories + wet_food_calories
+    return {
+        "dry_food_grams": dry_food_grams, "dry_food_kcal": dry_food_calories,
+        "wet_food_grams": wet_food_grams, "wet_food_kcal": wet_food_calories,
+        "total_intake": total_intake, "calorie_difference": total_intake - der
+    }
+
+def calculate_monthly_cost(dry_food_grams, dry_food_package_weight, dry_food_package_price,
+                           wet_food_grams, wet_food_package_weight, wet_food_package_price):
+    """根據包裝價格與每日餵食量估算每日與每月伙食費。"""
+    daily_dry_cost = 0.0
+    if dry_food_package_weight > 0:
+        cost_per_gram_dry = dry_food_package_price / dry_food_package_weight
+        daily_dry_cost = dry_food_grams * cost_per_gram_dry
+
+    daily_wet_cost = 0.0
+    if wet_food_package_weight > 0:
+        cost_per_gram_wet = wet_food_package_price / wet_food_package_weight
+        daily_wet_cost = wet_food_grams * cost_per_gram_wet
+
+    total_daily_cost = daily_dry_cost + daily_wet_cost
+    return {
+        "daily_dry_cost": daily_dry_cost,
+        "daily_wet_cost": daily_wet_cost,
+        "total_daily_cost": total_daily_cost,
+        "total_monthly_cost": total_daily_cost * DAYS_PER_MONTH
+    }
+
+def build_feeding_plan(der, wet_food_percentage, dry_food_kcal_per_1000g, wet_food_kcal_per_100g):
+    """依乾濕食熱量佔比，計算達到 DER 所需的每日乾食與濕食公克數。"""
+    target_wet_calories = der * (wet_food_percentage / 100.0)
+    target_dry_calories = der * ((100 - wet_food_percentage) / 100.0)
+
+    required_dry_grams = 0.0
+    if dry_food_kcal_per_1000g > 0:
+        required_dry_grams = (target_dry_calories / dry_food_kcal_per_1000g) * 1000.0
+
+    required_wet_grams = 0.0
+    if wet_food_kcal_per_100g > 0:
+        required_wet_grams = (target_wet_calories / wet_food_kcal_per_100g) * 100.0
+
+    return {
+        "wet_food_percentage": wet_food_percentage,
+        "required_dry_grams": required_dry_grams,
+        "required_wet_grams": required_wet_grams,
+        "target_kcal": der
+    }
+
+def generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=REPORT_APP_NAME):
+    """產生可複製的純文字飲食報告；app_name 顯示在報告最後一行。"""
+    return (report_header(datetime.now())
+            + report_body(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name))
+
+def report_header(generated_at):
+    """報告的第一行 (含產生時間)。"""
+    return f"--- 🐱 貓咪飲食報告 - {generated_at.strftime('%Y-%m-%d %H:%M:%S')} ---\n\n"
+
+def report_body(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=REPORT_APP_NAME):
+    """報告標題行之後的內容；只取決於輸入資料，可被快取。"""
+    report_text = "📋 貓咪基本資料:\n"
+    report_text += f"- 體重: {cat_info.get('weight', 0):.2f} 公斤\n"
+    report_text += f"- 年齡: {cat_info.get('age_years', 0)} 歲 {cat_info.get('age_months', 0)} 個月\n"
+    report_text += f"- BCS: {cat_info.get('bcs', 0)} / 9\n"
+    report_text += f"- 絕育狀態: {cat_info.get('is_neutered', '未知')}\n"
+    if cat_info.get('is_pregnant', False):
+        report_text += f"- 生理狀態: 懷孕中\n"
+    if cat_info.get('is_lactating', False):
+        report_text += f"- 生理狀態: 哺乳中\n"
+    report_text += "--------------------------------------\n\n"
+
+    report_text += "📈 每日建議攝取:\n"
+    report_text += f"- 建議熱量 (DER): {der_info.get('der', 0):.2f} 大卡/天\n"
+    report_text += "--------------------------------------\n\n"
+
+    if intake_analysis:
+        report_text += "📊 目前飲食分析:\n"
+        report_text += f"- 從乾乾攝取的熱量: {intake_analysis.get('dry_food_kcal', 0):.2f} 大卡\n"
+        report_text += f"- 從濕食攝取的熱量: {intake_analysis.get('wet_food_kcal', 0):.2f} 大卡\n"
+        report_text += f"- 每日總攝取熱量: {intake_analysis.get('total_intake', 0):.2f} 大卡\n"
+        diff = intake_analysis.get('calorie_difference', 0)
+        report_text += f"- 與建議量差異: {diff:+.2f} 大卡\n"
+        if diff > CALORIE_TOLERANCE:
+            report_text += "(攝取超標，建議調整)\n"
+        elif diff < -CALORIE_TOLERANCE:
+            report_text += "(攝取不足，建議調整)\n"
+        else:
+            report_text += "(熱量攝取接近建議值)\n"
+        report_text += "--------------------------------------\n\n"
+    else:
+        report_text += "📊 目前飲食分析: 尚未輸入餵食資訊，無法分析。\n"
+        report_text += "--------------------------------------\n\n"
+    
+    # 將伙食費顯示在飲食分析後面
+    if monthly_cost_info and monthly_cost_info.get('total_monthly_cost') is not None:
+        report_text += "💰 目前每月伙食費:\n" # 修改標題
+        report_text += f"- 每日乾食花費: {monthly_cost_info.get('daily_dry_cost', 0):.2f} 元\n"
+        report_text += f"- 每日濕食花費: {monthly_cost_info.get('daily_wet_cost', 0):.2f} 元\n"
+        report_text += f"- 每月總伙食費: {monthly_cost_info.get('total_monthly_cost', 0):.2f} 元 (以30天計)\n"
+        report_text += "--------------------------------------\n\n"
+    else:
+        report_text += "💰 目前每月伙食費: 尚未輸入食物價格資訊，無法估算。\n" # 修改標題
+        report_text += "--------------------------------------\n\n"
+
+    if feeding_plan and feeding_plan.get('target_kcal') is not None:
+        report_text += "🥗 建議餵食計畫:\n"
+        report_text += f"目標熱量約: {feeding_plan.get('target_kcal', 0):.0f} 大卡/天\n"
+        report_text += f"熱量佔比: {100 - feeding_plan.get('wet_food_percentage', 0)}% 乾食 / {feeding_plan.get('wet_food_percentage', 0)}% 濕食\n"
+        report_text += f"- 建議乾食餵食量: {feeding_plan.get('required_dry_grams', 0):.1f} 公克/天\n"
+        report_text += f"- 建議濕食餵食量: {feeding_plan.get('required_wet_grams', 0):.1f} 公克/天\n"
+        report_text += "--------------------------------------\n\n"
+    else:
+        report_text += "🥗 建議餵食計畫: 尚未計算或無有效食物熱量資訊。\n"
+        report_text += "--------------------------------------\n\n"
+    
+    report_text += "ℹ️ 免責聲明與重要提示：\n"
+    report_text += """
+此工具提供的熱量需求為估算值，基於常用公式和參考數據。
+每隻貓咪的代謝、活動量、健康狀況、品種及個別差異都可能影響實際熱量需求。
+在任何飲食調整（特別是增重或減重計畫）前，請務必諮詢您的獸醫或專業寵物營養師，
+獲取最精確的建議與指導，以確保貓咪的健康與安全。
+本工具不提供醫療診斷或治療建議。
+"""
+    report_text += "\n--------------------------------------"
+    report_text += f"\n{app_name} (僅供參考)"
+
+    return report_text
+
+def _parse_bool(name, value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_TEXT:
+        return True
+    if text in _FALSE_TEXT:
+        return False
+    raise ValueError(f"{name} 必須是 是/否 (或 true/false)，收到 {value!r}")
+
+def normalize_cat_inputs(raw):
+    """
+    把一隻貓的原始輸入 (CSV 欄位字串、JSON 值皆可) 轉成型別正確的 dict。
+    缺少或空白的欄位使用 CAT_INPUT_DEFAULTS；輸入不合理時拋出 ValueError，規則與介面一致。
+    """
+    cat = dict(CAT_INPUT_DEFAULTS)
+    for name in CAT_INPUT_DEFAULTS:
+        value = raw.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        if name in _BOOL_INPUTS:
+            cat[name] = _parse_bool(name, value)
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} 不是有效的數字: {value!r}") from None
+        if not math.isfinite(number):
+            raise ValueError(f"{name} 不是有效的數字: {value!r}")
+        if name in _INT_INPUTS:
+            if number != int(number):
+                raise ValueError(f"{name} 必須是整數: {value!r}")
+            number = int(number)
+        cat[name] = number
+
+    if cat["weight"] is None or cat["weight"] <= 0:
+        raise ValueError("體重必須大於零。")
+    if cat["age_years"] < 0 or cat["age_months"] < 0:
+        raise ValueError("年齡不可為負數。")
+    if cat["age_years"] * 12 + cat["age_months"] <= 0:
+        raise ValueError("貓咪總年齡必須大於 0 個月。")
+    if not 1 <= cat["bcs"] <= 9:
+        raise ValueError("BCS 必須介於 1 到 9。")
+    if not 0 <= cat["wet_food_percentage"] <= 100:
+        raise ValueError("濕食熱量佔比必須介於 0 到 100。")
+    for name in _FLOAT_INPUTS[1:]:
+        if cat[name] < 0:
+            raise ValueError(f"{name} 不可為負數。")
+    if cat["dry_food_kcal_per_1000g"] == 0 and cat["wet_food_kcal_per_100g"] == 0:
+        raise ValueError("請輸入至少一種食物的熱量資訊。")
+    return cat
+
+def run_pipeline(cat, include_report=True, app_name=REPORT_APP_NAME):
+    """
+    對一隻已正規化 (normalize_cat_inputs) 的貓咪依序執行第一步到第四步：
+    DER、目前飲食分析、每月伙食費、建議餵食計畫與文字報告。
+    """
+    age = cat["age_years"] * 12 + cat["age_months"]
+    der_info = calculate_der(cat["weight"], age, cat["is_neutered"], cat["bcs"], cat["is_pregnant"], cat["is_lactating"])
+    cat_info = {
+        "weight": cat["weight"], "age_years": cat["age_years"], "age_months": cat["age_months"],
+        "is_neutered": "是" if cat["is_neutered"] else "否", "is_neutered_bool": cat["is_neutered"],
+        "bcs": cat["bcs"], "is_pregnant": cat["is_pregnant"], "is_lactating": cat["is_lactating"]
+    }
+    der = der_info["der"]
+    intake_analysis = analyze_intake(der, cat["dry_food_grams"], cat["dry_food_kcal_per_1000g"],
+                                     cat["wet_food_grams"], cat["wet_food_kcal_per_100g"])
+    monthly_cost_info = calculate_monthly_cost(cat["dry_food_grams"], cat["dry_food_package_weight"], cat["dry_food_package_price"],
+                                               cat["wet_food_grams"], cat["wet_food_package_weight"], cat["wet_food_package_price"])
+    feeding_plan = build_feeding_plan(der, cat["wet_food_percentage"], cat["dry_food_kcal_per_1000g"], cat["wet_food_kcal_per_100g"])
+    result = {
+        "cat_info": cat_info, "der_info": der_info, "intake_analysis": intake_analysis,
+        "monthly_cost_info": monthly_cost_info, "feeding_plan": feeding_plan
+    }
+    if include_report:
+        result["report"] = generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name)
+    return result
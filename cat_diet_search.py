@@ -0,0 +1,102 @@
+import heapq
+
+from cat_core import build_feeding_plan, calculate_monthly_cost
+
+# --- 最省錢的飲食組合搜尋 ---
+# 在商品資料庫中找出能滿足 DER、且濕食熱量佔比不低於下限的最便宜組合 (一種乾食 + 一種濕食，或只吃濕食)。
+# 每種商品先換算成「每大卡的價格」c：
+#   - 只吃濕食 w：每日花費 = DER x c_w
+#   - 乾食 d + 濕食 w，濕食佔比 s：每日花費 = DER x (s x c_w + (1 - s) x c_d)。
+#     花費對 s 是線性的，所以最佳的 s 必在端點：c_d < c_w 時取下限 s，否則只吃濕食更便宜 (該組合不需考慮)。
+#   - 濕食佔比下限為 0 時，也考慮只吃乾食。
+# 乾食、濕食各自依 c 由低到高排序後，以大小為 N 的 max-heap 保存目前最好的 N 個方案；
+# 組合的花費對 c_d、c_w 都是遞增的，一旦下界超過 heap 中最差的方案就可以整段跳過 (剪枝)，
+# 數千種商品也只需要檢查極少數的組合。
+
+DEFAULT_TOP_N = 5
+
+
+def cost_per_kcal(product):
+    """每大卡的價格；熱量或包裝重量無效時回傳 None。"""
+    if product.kcal_per_1000g <= 0 or product.package_weight <= 0:
+        return None
+    return product.package_price / (product.package_weight * product.kcal_per_1000g / 1000.0)
+
+
+def _sorted_by_cost(products, kind):
+    ranked = [(c, i, p) for i, p in enumerate(products) if p.kind == kind and (c := cost_per_kcal(p)) is not None]
+    ranked.sort()
+    return [(c, p) for c, _, p in ranked]
+
+
+def _build_plan(der, dry, wet, wet_share):
+    """以 cat_core 的公式算出組合的每日公克數與伙食費，與第二步、第三步的數字一致。"""
+    wet_percentage = wet_share * 100.0
+    plan = build_feeding_plan(der, wet_percentage,
+                              dry.kcal_per_1000g if dry else 0.0, wet.kcal_per_1000g / 10 if wet else 0.0)
+    cost = calculate_monthly_cost(plan["required_dry_grams"], dry.package_weight if dry else 0.0, dry.package_price if dry else 0.0,
+                                  plan["required_wet_grams"], wet.package_weight if wet else 0.0, wet.package_price if wet else 0.0)
+    return {"dry": dry, "wet": wet, "wet_food_percentage": wet_percentage,
+            "required_dry_grams": plan["required_dry_grams"], "required_wet_grams": plan["required_wet_grams"], **cost}
+
+
+def find_cheapest_plans(der, products, min_wet_percentage=0, top_n=DEFAULT_TOP_N):
+    """
+    從 products (cat_catalog.Product 清單，可先依品牌白名單篩選) 找出每月伙食費最低的 top_n 個方案，依花費由低到高排列。
+    每個方案為 dict：dry / wet (Product 或 None)、wet_food_percentage、required_dry_grams、required_wet_grams，
+    以及 calculate_monthly_cost 的 daily_dry_cost … total_monthly_cost。
+    """
+    if der is None or der <= 0:
+        raise ValueError("每日建議熱量 (DER) 必須大於 0。")
+    if not 0 <= min_wet_percentage <= 100:
+        raise ValueError("濕食熱量佔比下限必須介於 0 到 100。")
+    if top_n <= 0:
+        return []
+    share = min_wet_percentage / 100.0
+    dry_ranked = _sorted_by_cost(products, "dry")
+    wet_ranked = _sorted_by_cost(products, "wet")
+
+    heap = [] # (-每大卡花費, -序號, 乾食, 濕食, 濕食佔比)；heap[0] 是目前入選方案中最貴的
+    counter = 0
+
+    def worst():
+        return -heap[0][0] if len(heap) == top_n else float("inf")
+
+    def offer(cost, dry, wet, wet_share):
+        nonlocal counter
+        counter += 1
+        entry = (-cost, -counter, dry, wet, wet_share) # 同價時先找到的 (排序較前的) 優先
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+
+    # 只吃濕食
+    for c_wet, wet in wet_ranked:
+        if c_wet >= worst():
+            break
+        offer(c_wet, None, wet, 1.0)
+
+    # 只吃乾食 (沒有濕食佔比下限時)
+    if share == 0:
+        for c_dry, dry in dry_ranked:
+            if c_dry >= worst():
+                break
+            offer(c_dry, dry, None, 0.0)
+
+    # 乾食 + 濕食，濕食佔比取下限
+    if 0 < share < 1 and dry_ranked:
+        cheapest_dry = dry_ranked[0][0]
+        for c_wet, wet in wet_ranked:
+            if share * c_wet + (1 - share) * cheapest_dry >= worst():
+                break # 之後的濕食更貴，下界只會更高
+            for c_dry, dry in dry_ranked:
+                if c_dry >= c_wet:
+                    break # 乾食比濕食貴時，只吃濕食更便宜 (已列入候選)
+                cost = share * c_wet + (1 - share) * c_dry
+                if cost >= worst():
+                    break
+                offer(cost, dry, wet, share)
+
+    ranked = sorted(heap, key=lambda entry: (-entry[0], -entry[1]))
+    return [_build_plan(der, dry, wet, wet_share) for _, _, dry, wet, wet_share in ranked]
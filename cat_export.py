@@ -0,0 +1,220 @@
+import functools
+import io
+import os
+from datetime import datetime
+
+from PIL import Image, ImageDraw, ImageFont
+
+from cat_cache import TTLCache, memoize
+from cat_core import REPORT_APP_NAME
+from cat_report import get_renderer
+
+# --- 報告匯出 (PDF / PNG) ---
+# 把第四步的報告排版成一張圖，直接寫進 io.BytesIO，不產生暫存檔。
+# 只用 Pillow (Streamlit 本身就依賴它)：PNG 直接存檔，PDF 以同一張圖輸出成單頁 PDF。
+# 版面依 prompt1.md 的回饋：App 名稱放在標題上方、只印日期不印時間、日期與其他字保持距離、
+# 各段的圖示 (emoji) 以彩色 emoji 字型繪製。
+# 中文與 emoji 需要系統字型，可用 KURO_REPORT_FONT / KURO_REPORT_EMOJI_FONT 指定；
+# 找不到 emoji 字型時略過圖示，不會畫出方框。部署時的字型見 packages.txt。
+
+EXPORT_FORMATS = ("pdf", "png")
+EXPORT_MIME_TYPES = {"pdf": "application/pdf", "png": "image/png"}
+EXPORT_CACHE_MAX_ENTRIES = int(os.environ.get("KURO_EXPORT_CACHE_MAX_ENTRIES", "64"))
+
+PAGE_WIDTH = 1240 # A4 寬度 @ 150 dpi
+PAGE_DPI = 150
+MARGIN = 80
+
+# (字級, 顏色, 上方間距)
+_STYLES = {
+    "app": (26, (110, 110, 110), 0),
+    "title": (48, (30, 30, 30), 12),
+    "date": (24, (120, 120, 120), 18),
+    "heading": (32, (30, 30, 30), 28),
+    "text": (26, (50, 50, 50), 10),
+    "footer": (22, (120, 120, 120), 16),
+}
+_LINE_SPACING = 1.35
+_RULE_COLOR = (210, 210, 210)
+_BACKGROUND = (255, 255, 255)
+
+_CJK_FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "C:/Windows/Fonts/msjh.ttc",
+)
+_EMOJI_FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
+    "/usr/share/fonts/noto/NotoColorEmoji.ttf",
+    "/System/Library/Fonts/Apple Color Emoji.ttc",
+    "C:/Windows/Fonts/seguiemj.ttf",
+)
+_EMOJI_NATIVE_SIZES = (109, 137, 160) # 點陣彩色 emoji 字型只接受固定字級
+_VARIATION_SELECTOR = "\ufe0f"
+
+
+def _find_font(env_name, candidates):
+    path = os.environ.get(env_name)
+    if path:
+        return path
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _text_font(size):
+    path = _find_font("KURO_REPORT_FONT", _CJK_FONT_CANDIDATES)
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size) # 沒有中文字型時仍可輸出，但中文會顯示為方框
+
+
+@functools.lru_cache(maxsize=None)
+def _emoji_font():
+    path = _find_font("KURO_REPORT_EMOJI_FONT", _EMOJI_FONT_CANDIDATES)
+    if not path:
+        return None
+    for size in _EMOJI_NATIVE_SIZES:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return None
+
+
+def _is_emoji(ch):
+    return ord(ch) >= 0x1F000 or ch in "ℹ⚠✅"
+
+
+def _runs(text):
+    """把一行拆成 (是否為 emoji, 字串) 片段。"""
+    runs = []
+    for ch in text.replace(_VARIATION_SELECTOR, ""):
+        emoji = _is_emoji(ch)
+        if runs and runs[-1][0] == emoji and not emoji:
+            runs[-1][1] += ch
+        else:
+            runs.append([emoji, ch])
+    return runs
+
+
+def layout_lines(body, app_name, generated_at):
+    """
+    把 cat_report 的純文字報告內容 (不含標題行) 轉成版面：[(樣式, 文字)]，分隔線的樣式為 "rule"。
+    以 emoji 開頭的行是段落標題；最後一行 (App 名稱) 改放在最上方。
+    """
+    lines = [("app", app_name), ("title", "🐱 貓咪飲食報告"), ("date", f"產生日期: {generated_at:%Y-%m-%d}"), ("rule", "")]
+    separator = "-" * 38
+    for line in body.split("\n")[:-1]:
+        if not line.strip():
+            continue
+        if line == separator:
+            lines.append(("rule", ""))
+        elif _is_emoji(line[0]):
+            lines.append(("heading", line))
+        else:
+            lines.append(("text", line))
+    lines.append(("footer", f"{app_name} (僅供參考)"))
+    return lines
+
+
+def _measure(run_text, emoji, size):
+    if emoji:
+        return size * len(run_text) if _emoji_font() else 0
+    return _text_font(size).getlength(run_text)
+
+
+def _wrap(text, size, width):
+    """依寬度逐字換行 (中文沒有空白可斷)。"""
+    wrapped, current = [], ""
+    for ch in text:
+        if current and _measure(current + ch, False, size) > width:
+            wrapped.append(current)
+            current = ch
+        else:
+            current += ch
+    wrapped.append(current)
+    return wrapped
+
+
+def _draw_emoji(image, xy, text, size):
+    font = _emoji_font()
+    if font is None:
+        return
+    for i, ch in enumerate(text):
+        glyph = Image.new("RGBA", (font.size * 2, font.size * 2), (0, 0, 0, 0))
+        ImageDraw.Draw(glyph).text((0, 0), ch, font=font, embedded_color=True)
+        box = glyph.getbbox()
+        if box is None:
+            continue
+        glyph = glyph.crop(box).resize((size, size), Image.LANCZOS)
+        image.paste(glyph, (int(xy[0] + i * size), int(xy[1])), glyph)
+
+
+def render_report_image(body, app_name=REPORT_APP_NAME, generated_at=None):
+    """把報告內容畫成一張 RGB 圖 (寬 PAGE_WIDTH，高度依內容而定)。"""
+    lines = layout_lines(body, app_name, generated_at or datetime.now())
+    content_width = PAGE_WIDTH - 2 * MARGIN
+
+    # 先算出每一行的位置，決定畫布高度
+    placed, y = [], MARGIN
+    for style, text in lines:
+        if style == "rule":
+            y += 18
+            placed.append((style, None, y))
+            y += 18
+            continue
+        size, color, space_before = _STYLES[style]
+        y += space_before
+        for part in _wrap(text, size, content_width):
+            placed.append((style, part, y))
+            y += int(size * _LINE_SPACING)
+
+    image = Image.new("RGB", (PAGE_WIDTH, y + MARGIN), _BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for style, text, y in placed:
+        if style == "rule":
+            draw.line((MARGIN, y, PAGE_WIDTH - MARGIN, y), fill=_RULE_COLOR, width=2)
+            continue
+        size, color, _ = _STYLES[style]
+        x = MARGIN
+        for emoji, run_text in _runs(text):
+            if emoji:
+                _draw_emoji(image, (x, y), run_text, size)
+            else:
+                draw.text((x, y), run_text, font=_text_font(size), fill=color)
+            x += _measure(run_text, emoji, size)
+    return image
+
+
+def _export_bytes(body, app_name, date_text, fmt):
+    image = render_report_image(body, app_name, datetime.strptime(date_text, "%Y-%m-%d"))
+    buffer = io.BytesIO()
+    if fmt == "pdf":
+        image.save(buffer, format="PDF", resolution=PAGE_DPI)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+# 同一份報告 (同一天) 重複下載時直接回傳已產生的檔案
+export_cache = TTLCache(max_entries=EXPORT_CACHE_MAX_ENTRIES)
+_cached_export_bytes = memoize(export_cache)(_export_bytes)
+
+
+def export_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, fmt="pdf",
+                  app_name=REPORT_APP_NAME, generated_at=None):
+    """
+    產生報告檔案，回傳 bytes (fmt 為 pdf 或 png)。
+    可用 functools.partial 綁定參數後交給 st.download_button(data=...)，只在使用者按下時才產生。
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支援的匯出格式: {fmt!r} (可用: {', '.join(EXPORT_FORMATS)})")
+    body = get_renderer("text").body(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name)
+    date_text = f"{generated_at or datetime.now():%Y-%m-%d}"
+    return _cached_export_bytes(body, app_name, date_text, fmt)
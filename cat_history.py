@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import date as date_type, datetime
+
+# --- 計算歷史紀錄 (SQLite) ---
+# 第一步到第三步的結果依「貓咪 + 日期」存進本機 SQLite 檔，session 結束後仍可查詢。
+# 每隻貓每天一列：第一步寫入體重、BCS、DER，第二步寫入攝取熱量與伙食費，第三步寫入建議餵食量；
+# 同一天重複計算時以新值覆蓋 (UPSERT，沒有提供的欄位保留原值)。
+#   - 主鍵 (cat_id, date) 的 WITHOUT ROWID 表：資料依主鍵叢集存放，同一隻貓的紀錄在 B-tree 中相鄰，
+#     載入全部歷史或最近 N 筆都是一次索引範圍掃描，不需要再回表查詢；
+#   - 寫入不在 Streamlit 重跑的執行緒進行：record() 只把資料放進佇列，由背景執行緒
+#     把佇列中累積的資料一次以單一交易寫入 (批次)，重跑不必等待磁碟；
+#   - 開啟 WAL，讀寫使用不同的連線，讀取不會被寫入擋住；
+#   - 讀取不等待寫入佇列：還沒寫進資料庫的資料另外保存在記憶體 (_pending，每隻貓每天一筆，已合併)，
+#     讀取時合併進查詢結果，自己剛記錄的資料立即讀得到，也不必等其他 session 的寫入。
+# 診所規模 (數百隻貓、每天一筆、數年) 的查詢時間見 benchmarks/bench_history.py。
+# 共用方式：同一個伺服器行程的所有 session 共用一個資料庫檔，因此介面不直接以貓咪名字當 cat_id
+# (任何人輸入同樣的「小黑」就會看到、覆蓋別人的紀錄)。每個瀏覽器 session 有一個無法猜測的擁有者代碼
+# (new_owner_token，放在網址的 ?owner=)，cat_id = history_key(擁有者代碼, 名字)：
+# 持有同一個網址的人 (書籤、分享給家人) 看到同一份紀錄，其他人輸入相同名字也只會得到另一個 cat_id。
+# 本模組不依賴 Streamlit。
+
+HISTORY_DB = os.environ.get("KURO_HISTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "kuro_history.db"))
+HISTORY_FIELDS = ("weight", "bcs", "der", "total_intake", "daily_cost", "monthly_cost",
+                  "wet_food_percentage", "required_dry_grams", "required_wet_grams")
+WRITE_BATCH_SIZE = 5000 # 每個交易最多寫入的筆數 (積壓時一次多寫一些，commit 次數越少越快)
+FLUSH_TIMEOUT = 30 # flush() 預設最多等待的秒數
+OWNER_TOKEN_BYTES = 16 # 擁有者代碼的亂數位元組數 (128 位元)
+_OWNER_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{22,64}")
+
+HistoryEntry = namedtuple("HistoryEntry", ("cat_id", "date") + HISTORY_FIELDS)
+HistoryEntry.__doc__ = """一隻貓一天的紀錄；date 為 ISO 日期字串 (YYYY-MM-DD)，尚未計算的欄位為 None。"""
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS history (
+    cat_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    weight REAL,
+    bcs INTEGER,
+    der REAL,
+    total_intake REAL,
+    daily_cost REAL,
+    monthly_cost REAL,
+    wet_food_percentage INTEGER,
+    required_dry_grams REAL,
+    required_wet_grams REAL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (cat_id, date)
+) WITHOUT ROWID;
+"""
+_COLUMNS = ", ".join(("cat_id", "date") + HISTORY_FIELDS)
+_UPSERT = (
+    f"INSERT INTO history ({_COLUMNS}, updated_at) VALUES ({', '.join('?' * (len(HISTORY_FIELDS) + 3))})"
+    " ON CONFLICT (cat_id, date) DO UPDATE SET "
+    + ", ".join(f"{field} = coalesce(excluded.{field}, {field})" for field in HISTORY_FIELDS)
+    + ", updated_at = excluded.updated_at"
+)
+_STOP = object()
+
+
+def new_owner_token():
+    """新的擁有者代碼 (網址安全的亂數字串)。"""
+    return secrets.token_urlsafe(OWNER_TOKEN_BYTES)
+
+
+def is_owner_token(text):
+    """text 是否為格式正確的擁有者代碼 (new_owner_token 產生的長度與字元)。"""
+    return isinstance(text, str) and _OWNER_TOKEN_PATTERN.fullmatch(text) is not None
+
+
+def history_key(owner, name):
+    """擁有者代碼 + 貓咪名字對應的 cat_id (SHA-256)；不知道擁有者代碼就無法由名字推得。"""
+    return hashlib.sha256(json.dumps([owner, name], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL") # WAL 模式下只在 checkpoint 時 fsync，斷電最多遺失最後幾筆
+    return conn
+
+
+class HistoryStore:
+    """計算歷史紀錄；寫入由背景執行緒批次處理，讀取有鎖保護，可在多個 session 執行緒間共用。"""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._conn = _connect(path)
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        # 尚未寫入的資料：{cat_id: {date: [序號, {欄位: 值}]}}；寫入後若沒有更新的紀錄就移除
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._sequence = 0
+        self.batches_written = 0
+        self.last_error = None # 背景寫入失敗時的例外 (不會中斷使用者的操作)
+        self._writer = threading.Thread(target=self._write_loop, name="kuro-history-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, cat_id, date=None, **values):
+        """
+        記錄一隻貓某天 (預設今天) 的結果，values 的鍵為 HISTORY_FIELDS 的子集。
+        只放進寫入佇列，立即返回；同一天已有紀錄時只覆蓋有提供的欄位。
+        """
+        unknown = set(values) - set(HISTORY_FIELDS)
+        if unknown:
+            raise ValueError(f"不支援的歷史紀錄欄位: {', '.join(sorted(unknown))}")
+        if not cat_id:
+            raise ValueError("請提供貓咪名稱或編號。")
+        date = date or date_type.today()
+        day = date if isinstance(date, str) else f"{date:%Y-%m-%d}"
+        with self._pending_lock:
+            self._sequence += 1
+            pending = self._pending.setdefault(cat_id, {}).setdefault(day, [0, {}])
+            pending[0] = self._sequence
+            pending[1].update((field, value) for field, value in values.items() if value is not None)
+            self._queue.put((self._sequence, (cat_id, day, *(values.get(field) for field in HISTORY_FIELDS),
+                                              datetime.now().isoformat(timespec="seconds"))))
+
+    def _write_loop(self):
+        try:
+            conn = _connect(self.path) # 寫入用獨立的連線，不與讀取共用鎖
+            conn.execute("PRAGMA cache_size=-32000") # 32 MB 頁快取：許多貓咪交錯寫入時，各自的 B-tree 葉頁留在記憶體中
+        except sqlite3.Error as e:
+            self.last_error = e # 寫入執行緒結束；flush() 不會一直等下去，未寫入的資料仍可從 _pending 讀到
+            return
+        while True:
+            batch = [self._queue.get()]
+            # 把佇列中已累積的資料一起寫入，一個交易只 commit 一次
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            items = [item for item in batch if item is not _STOP]
+            # 依主鍵排序後寫入，同一隻貓的資料落在相鄰的 B-tree 頁，少翻動頁面
+            rows = sorted((row for _, row in items), key=lambda row: (row[0], row[1]))
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(_UPSERT, rows)
+                    self.batches_written += 1
+                except sqlite3.Error as e:
+                    self.last_error = e
+                self._clear_pending(items)
+            for _ in batch:
+                self._queue.task_done()
+            if len(items) < len(batch):
+                conn.close()
+                return
+
+    def _clear_pending(self, items):
+        # 只移除之後沒有再記錄過的日期 (序號相同)；有更新的紀錄時留給下一批
+        with self._pending_lock:
+            for sequence, (cat_id, day, *_) in items:
+                days = self._pending.get(cat_id)
+                if days is not None and day in days and days[day][0] == sequence:
+                    del days[day]
+                    if not days:
+                        del self._pending[cat_id]
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        等待佇列中的資料全部寫入，最多 timeout 秒 (None 表示不限)；全部寫入時回傳 True。
+        寫入執行緒已結束 (例如無法開啟資料庫) 時立即回傳 False，不會一直等下去。
+        一般讀取不需要呼叫：未寫入的資料會合併進查詢結果。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._writer.is_alive():
+                    return False
+                remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """寫完佇列中的資料後關閉。"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._conn.close()
+
+    def _select(self, cat_id, sql, params, since=""):
+        """查詢一隻貓的紀錄，合併尚未寫入的資料 (與 UPSERT 相同：有提供的欄位覆蓋)，依日期由舊到新。"""
+        # 先取未寫入資料的快照再查詢：期間剛好寫入的資料兩邊都有，合併的結果相同，不會漏掉
+        with self._pending_lock:
+            pending = {day: dict(values) for day, (_, values) in self._pending.get(cat_id, {}).items() if day >= since}
+        with self._lock:
+            rows = {row[1]: row for row in self._conn.execute(sql, params)}
+        for day, values in pending.items():
+            row = rows.get(day) or (cat_id, day) + (None,) * len(HISTORY_FIELDS)
+            rows[day] = row[:2] + tuple(values.get(field, value) for field, value in zip(HISTORY_FIELDS, row[2:]))
+        return [HistoryEntry(*rows[day]) for day in sorted(rows)]
+
+    def history(self, cat_id, since=None):
+        """一隻貓的全部紀錄 (或 since 日期之後)，依日期由舊到新。"""
+        since = since.isoformat() if isinstance(since, date_type) else since or ""
+        return self._select(cat_id, f"SELECT {_COLUMNS} FROM history WHERE cat_id = ? AND date >= ?", (cat_id, since), since)
+
+    def latest(self, cat_id, n=30):
+        """一隻貓最近 n 筆紀錄，依日期由舊到新 (由主鍵索引尾端反向讀取 n 筆，不掃描整段歷史)。"""
+        entries = self._select(cat_id, f"SELECT {_COLUMNS} FROM history WHERE cat_id = ? ORDER BY date DESC LIMIT ?", (cat_id, n))
+        return entries[-n:] if n > 0 else []
+
+    def cat_ids(self):
+        """有紀錄的所有貓咪 (排序後，含尚未寫入的)。"""
+        with self._pending_lock:
+            pending = set(self._pending)
+        with self._lock:
+            stored = {row[0] for row in self._conn.execute("SELECT DISTINCT cat_id FROM history")}
+        return sorted(stored | pending)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """本行程共用的歷史紀錄 (第一次呼叫時開啟 HISTORY_DB)。"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(HISTORY_DB)
+    return _store
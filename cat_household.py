@@ -0,0 +1,227 @@
+from collections import namedtuple
+from dataclasses import dataclass
+
+from cat_core import CAT_INPUT_DEFAULTS, DAYS_PER_MONTH, build_feeding_plan, calculate_der, calculate_monthly_cost
+
+# --- 多貓家庭 ---
+# 一個家庭有多隻貓 (各自的基本資料與乾濕食熱量比例)，共用同一份食物清單 (同一包乾乾、同一箱罐頭)。
+# 每隻貓的 DER、建議餵食量與伙食費以 cat_core 的公式計算 (與第一步、第三步、第二步相同) 並快取：
+#   - 修改一隻貓只重算那一隻；
+#   - 修改一種食物只重算有吃那種食物的貓；
+#   - 家庭合計 (每日/每月伙食費、每種食物的每日用量與一包可吃幾天) 直接加總各貓的快取結果，不重算 DER。
+# 本模組不依賴 Streamlit。
+
+FOOD_KINDS = ("dry", "wet")
+
+CatResult = namedtuple("CatResult", ["der_info", "feeding_plan", "cost_info"])
+CatResult.__doc__ = """一隻貓的計算結果：calculate_der、build_feeding_plan、calculate_monthly_cost 的回傳值 (沒有食物時 feeding_plan 為 None)。"""
+
+
+@dataclass(slots=True)
+class HouseholdFood:
+    """共用的一種食物；熱量統一以每 1000 公克計 (與 cat_catalog.Product 相同)，重量單位為公克。"""
+    name: str
+    kind: str
+    kcal_per_1000g: float
+    package_weight: float
+    package_price: float
+
+
+@dataclass(slots=True)
+class HouseholdCat:
+    """家庭中的一隻貓：基本資料 (cat_state.CatProfile)、吃的乾食與濕食 (食物 id，None 表示不吃) 與濕食熱量佔比。"""
+    name: str
+    profile: object
+    dry_food_id: int = None
+    wet_food_id: int = None
+    wet_food_percentage: int = CAT_INPUT_DEFAULTS["wet_food_percentage"]
+
+
+def foods_from_inputs(food):
+    """由第二步的 cat_state.FoodInputs 建立共用食物清單 (一種乾食、一種濕食)。"""
+    return [
+        HouseholdFood("乾乾", "dry", food.dry_food_kcal_per_1000g, food.dry_food_package_weight, food.dry_food_package_price),
+        HouseholdFood("主食罐", "wet", food.wet_food_kcal_per_100g * 10, food.wet_food_package_weight, food.wet_food_package_price),
+    ]
+
+
+def compute_cat(cat, dry, wet):
+    """計算一隻貓的 CatResult；dry / wet 為 HouseholdFood 或 None。"""
+    profile = cat.profile
+    der_info = calculate_der(profile.weight, profile.total_age_months, profile.is_neutered, profile.bcs,
+                             profile.is_pregnant, profile.is_lactating)
+    if der_info is None or (dry is None and wet is None):
+        return CatResult(der_info, None, calculate_monthly_cost(0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
+    # 只有一種食物時全部熱量都由它提供，不套用乾濕比例
+    wet_percentage = 0 if wet is None else 100 if dry is None else cat.wet_food_percentage
+    plan = build_feeding_plan(der_info["der"], wet_percentage,
+                              dry.kcal_per_1000g if dry else 0.0, wet.kcal_per_1000g / 10 if wet else 0.0)
+    cost_info = calculate_monthly_cost(
+        plan["required_dry_grams"], dry.package_weight if dry else 0.0, dry.package_price if dry else 0.0,
+        plan["required_wet_grams"], wet.package_weight if wet else 0.0, wet.package_price if wet else 0.0,
+    )
+    return CatResult(der_info, plan, cost_info)
+
+
+def _cell(value):
+    # 表格空白格可能是 None、NaN 或空字串
+    if value is None or value != value or (isinstance(value, str) and not value.strip()):
+        return None
+    return value
+
+
+class Household:
+    """多貓家庭：貓咪與共用食物各以遞增的 id 識別，各貓的計算結果快取在 results。"""
+
+    __slots__ = ("foods", "cats", "results", "_next_id")
+
+    def __init__(self, foods=()):
+        self.foods = {} # id -> HouseholdFood
+        self.cats = {} # id -> HouseholdCat
+        self.results = {} # 貓咪 id -> CatResult
+        self._next_id = 1
+        for food in foods:
+            self.add_food(food)
+
+    def _new_id(self):
+        new_id = self._next_id
+        self._next_id += 1
+        return new_id
+
+    def _food(self, food_id, kind):
+        food = self.foods.get(food_id)
+        return food if food is not None and food.kind == kind else None
+
+    def _recompute(self, cat_id):
+        cat = self.cats[cat_id]
+        self.results[cat_id] = compute_cat(cat, self._food(cat.dry_food_id, "dry"), self._food(cat.wet_food_id, "wet"))
+
+    def _eaters(self, food_id):
+        return [cat_id for cat_id, cat in self.cats.items() if food_id in (cat.dry_food_id, cat.wet_food_id)]
+
+    # --- 貓咪 ---
+    def add_cat(self, cat):
+        cat_id = self._new_id()
+        self.cats[cat_id] = cat
+        self._recompute(cat_id)
+        return cat_id
+
+    def update_cat(self, cat_id, cat):
+        """更新一隻貓的資料；資料沒變時不重算。"""
+        if self.cats[cat_id] == cat:
+            return
+        self.cats[cat_id] = cat
+        self._recompute(cat_id)
+
+    def remove_cat(self, cat_id):
+        del self.cats[cat_id]
+        del self.results[cat_id]
+
+    # --- 共用食物 ---
+    def add_food(self, food):
+        if food.kind not in FOOD_KINDS:
+            raise ValueError(f"食物種類必須是 {' / '.join(FOOD_KINDS)}：{food.kind!r}")
+        food_id = self._new_id()
+        self.foods[food_id] = food
+        return food_id
+
+    def update_food(self, food_id, food):
+        """更新一種食物；只重算有吃這種食物的貓。"""
+        if self.foods[food_id] == food:
+            return
+        if food.kind not in FOOD_KINDS:
+            raise ValueError(f"食物種類必須是 {' / '.join(FOOD_KINDS)}：{food.kind!r}")
+        self.foods[food_id] = food
+        for cat_id in self._eaters(food_id):
+            self._recompute(cat_id)
+
+    def remove_food(self, food_id):
+        """移除一種食物；原本吃這種食物的貓改為不吃 (並重算)。"""
+        del self.foods[food_id]
+        for cat_id in self._eaters(food_id):
+            cat = self.cats[cat_id]
+            if cat.dry_food_id == food_id:
+                cat.dry_food_id = None
+            if cat.wet_food_id == food_id:
+                cat.wet_food_id = None
+            self._recompute(cat_id)
+
+    def food_rows(self):
+        """食物清單的表格資料列 (id、name、kind、kcal、per_grams、package_weight、package_price)，濕食熱量以每 100 公克顯示。"""
+        return [
+            {"id": food_id, "name": f.name, "kind": f.kind,
+             "kcal": f.kcal_per_1000g if f.kind == "dry" else f.kcal_per_1000g / 10,
+             "per_grams": 1000.0 if f.kind == "dry" else 100.0,
+             "package_weight": f.package_weight, "package_price": f.package_price}
+            for food_id, f in self.foods.items()
+        ]
+
+    def apply_food_rows(self, rows):
+        """
+        以編輯後的表格資料列 (格式同 food_rows) 同步食物清單：有 id 的列更新、沒有 id 的列新增、不在表格中的食物移除。
+        先檢查全部資料列，有任何一列無效就拋出 ValueError 且不做任何修改。
+        """
+        parsed = []
+        for i, row in enumerate(rows, start=1):
+            name = _cell(row.get("name"))
+            kind = _cell(row.get("kind"))
+            try:
+                values = [_cell(row.get(key)) for key in ("kcal", "per_grams", "package_weight", "package_price")]
+                kcal, per_grams, package_weight, package_price = (None if v is None else float(v) for v in values)
+            except (TypeError, ValueError):
+                raise ValueError(f"第 {i} 列的數值無效。") from None
+            if name is None and kcal is None:
+                continue # 空白列
+            if kind not in FOOD_KINDS or kcal is None or kcal < 0:
+                raise ValueError(f"第 {i} 列「{name or '未命名'}」需填寫種類 (乾食/濕食) 與熱量。")
+            per_grams = per_grams or (1000.0 if kind == "dry" else 100.0)
+            food = HouseholdFood(str(name or f"食物 {i}").strip(), kind, kcal * 1000.0 / per_grams,
+                                 package_weight or 0.0, package_price or 0.0)
+            food_id = _cell(row.get("id"))
+            parsed.append((int(food_id) if food_id is not None and int(food_id) in self.foods else None, food))
+
+        kept = {food_id for food_id, _ in parsed if food_id is not None}
+        for food_id in [food_id for food_id in self.foods if food_id not in kept]:
+            self.remove_food(food_id)
+        for food_id, food in parsed:
+            if food_id is None:
+                self.add_food(food)
+            else:
+                self.update_food(food_id, food)
+
+    # --- 家庭合計 ---
+    def totals(self):
+        """
+        由各貓的快取結果加總，回傳 {"cats": [...], "foods": [...], "total_daily_cost", "total_monthly_cost"}。
+        cats 每項為 {"id", "name", "der", "dry_grams", "wet_grams", "daily_cost", "monthly_cost"}；
+        foods 每項為 {"id", "name", "daily_grams", "days_per_package", "daily_cost", "monthly_cost"}。
+        """
+        cats = []
+        grams = dict.fromkeys(self.foods, 0.0)
+        for cat_id, cat in self.cats.items():
+            result = self.results[cat_id]
+            plan = result.feeding_plan or {}
+            dry_grams, wet_grams = plan.get("required_dry_grams", 0.0), plan.get("required_wet_grams", 0.0)
+            if dry_grams:
+                grams[cat.dry_food_id] += dry_grams
+            if wet_grams:
+                grams[cat.wet_food_id] += wet_grams
+            cats.append({
+                "id": cat_id, "name": cat.name, "der": result.der_info["der"] if result.der_info else None,
+                "dry_grams": dry_grams, "wet_grams": wet_grams,
+                "daily_cost": result.cost_info["total_daily_cost"], "monthly_cost": result.cost_info["total_monthly_cost"],
+            })
+
+        foods = []
+        for food_id, food in self.foods.items():
+            daily_grams = grams[food_id]
+            daily_cost = daily_grams * food.package_price / food.package_weight if food.package_weight > 0 else 0.0
+            foods.append({
+                "id": food_id, "name": food.name, "daily_grams": daily_grams,
+                "days_per_package": food.package_weight / daily_grams if daily_grams > 0 else None,
+                "daily_cost": daily_cost, "monthly_cost": daily_cost * DAYS_PER_MONTH,
+            })
+
+        total_daily_cost = sum(c["daily_cost"] for c in cats)
+        return {"cats": cats, "foods": foods,
+                "total_daily_cost": total_daily_cost, "total_monthly_cost": total_daily_cost * DAYS_PER_MONTH}
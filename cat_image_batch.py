@@ -0,0 +1,324 @@
+"""
+Kuro家貓咪熱量計算機 - 批次產生報告插圖
+
+03_Images_Generation_API.ipynb 一次只送一個提示、等圖片回來才送下一個；這裡以 asyncio 一次處理整批提示：
+    - 同時進行的請求數有上限 (--concurrency 個 worker 從佇列取工作)；
+    - 以 token bucket 限制每分鐘的請求數 (--rate-per-minute，含重試)，可容許 --concurrency 個請求的突發；
+    - 連線錯誤、逾時、429 與 5xx 以指數退避 (加上隨機抖動) 重試，回應有 Retry-After 時依其等待；
+      其他 4xx (提示被拒、金鑰錯誤) 不重試；
+    - 回應一邊接收一邊從 JSON 中找出 b64_json 字串、分段解碼寫入暫存檔，不必把整個回應
+      (一張 1024x1024 的圖約 4 MB 的 base64) 與解碼後的圖同時放在記憶體；寫完才改名為快取檔。
+結果存進 cat_images 的內容定址快取 (IMAGE_CACHE_DIR)：已快取的提示直接略過，相同的提示只送一次。
+HTTP 以 asyncio 的串流連線實作 (每個請求一條連線，不需安裝 aiohttp / httpx)。
+
+預設產生計算機可能用到的所有報告插圖 (BCS 1~9 x 四個年齡階段 x 是否絕育，依 cat_images.illustration_prompt
+去除重複後共 16 張)，可在部署前先把快取補齊。
+
+用法:
+    python cat_image_batch.py                                  # 所有報告插圖
+    python cat_image_batch.py --prompts prompts.txt --concurrency 8 --rate-per-minute 50
+    KURO_IMAGE_API_BASE=http://127.0.0.1:8100/v1 KURO_IMAGE_API_KEY=stub python cat_image_batch.py
+
+API 位址、金鑰、模型與快取目錄與 cat_images 相同 (KURO_IMAGE_API_BASE、KURO_IMAGE_API_KEY 等環境變數)。
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import random
+import ssl
+import sys
+import time
+import urllib.parse
+from collections import namedtuple
+
+from cat_images import (IMAGE_API_BASE, IMAGE_API_KEY, IMAGE_MODEL, IMAGE_SIZE, REQUEST_TIMEOUT, ImageGenerationError,
+                        cache_key, get_image_cache, illustration_prompt)
+from cat_rules import AGE_STAGES, BCS_MAX, BCS_MIN
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_MINUTE = 50
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 1.0 # 秒；第 n 次重試前等待 0 ~ BACKOFF_BASE x 2^n 秒 (full jitter)
+BACKOFF_MAX = 60.0
+READ_CHUNK_SIZE = 64 * 1024
+STAGE_AGE_MONTHS = {"kitten": 2, "junior": 6, "adult": 36, "senior": 120} # 各年齡階段的代表月齡
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_B64_MARKER = b'"b64_json"'
+
+BatchResult = namedtuple("BatchResult", ["prompt", "path", "attempts", "error"])
+BatchResult.__doc__ = """一個提示的結果：圖檔路徑 (失敗時為 None)、送出的請求數 (已快取為 0)、錯誤訊息。"""
+
+
+class RetryableError(ImageGenerationError):
+    """可重試的錯誤 (連線中斷、逾時、429、5xx)；retry_after 為伺服器要求等待的秒數。"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def report_prompts():
+    """計算機可能產生的每個 BCS x 年齡階段 x 絕育組合的插圖提示 (依組合順序，可能重複)。"""
+    return [illustration_prompt(bcs, STAGE_AGE_MONTHS[stage])
+            for bcs in range(BCS_MIN, BCS_MAX + 1) for stage in AGE_STAGES for _neutered in (True, False)]
+
+
+# --- 速率限制 ---
+class TokenBucket:
+    """每秒補充 rate 個 token、最多存 capacity 個；acquire() 取得一個 token，不足時等待 (先來先取)。"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# --- 串流解碼 ---
+class B64JsonWriter:
+    """
+    從分段收到的 JSON 回應中找出第一個 "b64_json" 字串，邊收邊解碼寫入二進位檔 f。
+    只保留不足 4 個字元的 base64 尾巴，記憶體用量與回應大小無關。
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.state = "search" # search -> value (找到鍵，等字串開頭) -> string -> done
+        self.buffer = b""
+        self.written = 0
+
+    def feed(self, data):
+        if self.state == "done":
+            return
+        data = self.buffer + data
+        self.buffer = b""
+        if self.state == "search":
+            start = data.find(_B64_MARKER)
+            if start < 0:
+                self.buffer = data[-(len(_B64_MARKER) - 1):] # 鍵可能被切在兩段之間
+                return
+            data = data[start + len(_B64_MARKER):]
+            self.state = "value"
+        if self.state == "value":
+            stripped = data.lstrip(b" \t\r\n:")
+            if not stripped:
+                return
+            if stripped[:1] != b'"':
+                raise ImageGenerationError("回應中的 b64_json 不是字串。")
+            data = stripped[1:]
+            self.state = "string"
+        end = data.find(b'"')
+        if end >= 0:
+            data, self.state = data[:end], "done"
+        hold = b""
+        if self.state == "string":
+            if data.endswith(b"\\"): # "\/" 被切在兩段之間
+                data, hold = data[:-1], b"\\"
+            data = data.replace(b"\\/", b"/") # JSON 可以把 / 寫成 \/
+            cut = len(data) - len(data) % 4
+            data, self.buffer = data[:cut], data[cut:] + hold
+        else:
+            data = data.replace(b"\\/", b"/")
+        try:
+            self.written += self.f.write(base64.b64decode(data))
+        except binascii.Error as e:
+            raise ImageGenerationError(f"b64_json 不是有效的 base64: {e}") from None
+
+    def close(self):
+        if self.state != "done":
+            raise ImageGenerationError("圖片生成 API 的回應沒有完整的 b64_json。")
+
+
+# --- HTTP (asyncio 串流) ---
+async def _read_body(reader, headers, timeout):
+    """依 Content-Length、chunked 或讀到連線結束，逐段產生回應內容。"""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await asyncio.wait_for(reader.readline(), timeout)).split(b";")[0], 16)
+            if size == 0:
+                while (await asyncio.wait_for(reader.readline(), timeout)) not in (b"\r\n", b""):
+                    pass # trailer
+                return
+            while size > 0:
+                data = await asyncio.wait_for(reader.read(min(size, READ_CHUNK_SIZE)), timeout)
+                if not data:
+                    raise RetryableError("連線在回應結束前中斷。")
+                size -= len(data)
+                yield data
+            await asyncio.wait_for(reader.readline(), timeout)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            data = await asyncio.wait_for(reader.read(min(remaining, READ_CHUNK_SIZE)), timeout)
+            if not data:
+                raise RetryableError("連線在回應結束前中斷。")
+            remaining -= len(data)
+            yield data
+    else:
+        while data := await asyncio.wait_for(reader.read(READ_CHUNK_SIZE), timeout):
+            yield data
+
+
+async def _post_to_file(url, payload, api_key, f, timeout):
+    """POST JSON 到圖片生成 API，把回應中的圖片串流解碼寫入 f。"""
+    parts = urllib.parse.urlsplit(url)
+    secure = parts.scheme == "https"
+    body = json.dumps(payload).encode("utf-8")
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            parts.hostname, parts.port or (443 if secure else 80), ssl=ssl.create_default_context() if secure else None),
+            timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise RetryableError(f"無法連線到圖片生成 API: {e!r}") from None
+    try:
+        writer.write((f"POST {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                      f"Authorization: Bearer {api_key}\r\nContent-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise RetryableError(f"無效的 HTTP 回應: {status_line[:100]!r}") from None
+        headers = {}
+        while (line := await asyncio.wait_for(reader.readline(), timeout)) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if status != 200:
+            message = b""
+            async for data in _read_body(reader, headers, timeout):
+                message += data[:500 - len(message)]
+            text = f"圖片生成 API 回應 {status}: {message.decode('utf-8', 'replace')}"
+            if status in _RETRY_STATUS:
+                retry_after = headers.get("retry-after")
+                raise RetryableError(text, float(retry_after) if retry_after and retry_after.isdigit() else None)
+            raise ImageGenerationError(text)
+        sink = B64JsonWriter(f)
+        async for data in _read_body(reader, headers, timeout):
+            sink.feed(data)
+        sink.close()
+        return sink.written
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        raise RetryableError(f"讀取回應失敗: {e!r}") from None
+    except ValueError as e: # 無效的 Content-Length 或 chunk 大小 (int() 解析失敗)
+        raise RetryableError(f"無效的 HTTP 回應: {e}") from None
+    finally:
+        writer.close()
+
+
+# --- 批次管線 ---
+async def generate_batch(prompts, cache=None, *, base_url=IMAGE_API_BASE, api_key=IMAGE_API_KEY, model=IMAGE_MODEL,
+                         size=IMAGE_SIZE, concurrency=DEFAULT_CONCURRENCY, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                         max_retries=DEFAULT_MAX_RETRIES, timeout=REQUEST_TIMEOUT, on_result=None):
+    """
+    產生 prompts 中每個提示的圖片並存進 cache (預設 cat_images 的共用快取)，依輸入順序回傳 BatchResult。
+    已快取的提示不送出請求；重複的提示只送一次。on_result(result) 在每張圖完成 (或放棄) 時呼叫。
+    """
+    cache = cache or get_image_cache()
+    url = base_url.rstrip("/") + "/images/generations"
+    payload_base = {"model": model, "n": 1, "size": size}
+    if not model.startswith("gpt-image"):
+        payload_base["response_format"] = "b64_json" # gpt-image-1 一律回傳 b64_json，不接受這個參數
+    keys = {}
+    for prompt in prompts:
+        keys.setdefault(cache_key(model, prompt, size), prompt)
+    done = {}
+    queue = asyncio.Queue()
+    for key, prompt in keys.items():
+        if cache.get(key) is not None:
+            done[key] = BatchResult(prompt, cache.path(key), 0, None)
+        else:
+            queue.put_nowait((key, prompt))
+    bucket = TokenBucket(rate_per_minute / 60, concurrency)
+
+    async def generate(key, prompt):
+        path = cache.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for attempt in range(1, max_retries + 2):
+            await bucket.acquire()
+            tmp = f"{path}.{os.getpid()}.{id(asyncio.current_task())}.tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    await _post_to_file(url, {**payload_base, "prompt": prompt}, api_key, f, timeout)
+                os.replace(tmp, path)
+                return BatchResult(prompt, path, attempt, None)
+            except RetryableError as e:
+                if attempt > max_retries:
+                    return BatchResult(prompt, None, attempt, str(e))
+                delay = e.retry_after if e.retry_after is not None else random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                await asyncio.sleep(delay)
+            except ImageGenerationError as e:
+                return BatchResult(prompt, None, attempt, str(e))
+            except Exception as e: # 未預期的錯誤 (例如無法寫入暫存檔) 只讓這個提示失敗
+                return BatchResult(prompt, None, attempt, f"{type(e).__name__}: {e}")
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    async def worker():
+        while not queue.empty():
+            key, prompt = queue.get_nowait()
+            try:
+                result = await generate(key, prompt)
+            except Exception as e: # 例如無法建立快取目錄：只讓這個提示失敗，例外不會經由 gather 中斷整批
+                result = BatchResult(prompt, None, 0, f"{type(e).__name__}: {e}")
+            done[key] = result
+            if on_result is not None:
+                on_result(result)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, queue.qsize()))))
+    return [done[cache_key(model, prompt, size)]._replace(prompt=prompt) for prompt in prompts]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", help="提示檔 (每行一個提示)；未指定時產生所有報告插圖")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同時進行的請求數")
+    parser.add_argument("--rate-per-minute", type=float, default=DEFAULT_RATE_PER_MINUTE, help="每分鐘最多送出的請求數")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="每個提示最多重試幾次")
+    parser.add_argument("--model", default=IMAGE_MODEL)
+    parser.add_argument("--size", default=IMAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.prompts:
+        with open(args.prompts, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+    else:
+        prompts = report_prompts()
+    if not IMAGE_API_KEY:
+        print("請設定 KURO_IMAGE_API_KEY (或 OPENAI_API_KEY)。", file=sys.stderr)
+        return 2
+
+    def report(result):
+        status = f"完成 ({result.attempts} 次請求)" if result.error is None else f"失敗: {result.error}"
+        print(f"{status}  {result.prompt[:60]}", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = asyncio.run(generate_batch(prompts, model=args.model, size=args.size, concurrency=args.concurrency,
+                                         rate_per_minute=args.rate_per_minute, max_retries=args.max_retries,
+                                         on_result=report))
+    unique = {r.prompt: r for r in results}.values()
+    failed = sum(r.error is not None for r in unique)
+    print(f"完成：{len(prompts)} 個提示 (不重複 {len(unique)} 個)，新產生 {sum(r.attempts > 0 and r.error is None for r in unique)} 張，"
+          f"已快取 {sum(r.attempts == 0 for r in unique)} 張，失敗 {failed} 張，耗時 {time.perf_counter() - start:.1f} 秒",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from cat_rules import AGE_STAGES, age_stage_index
+
+# --- 報告插圖 (圖片生成 API + 內容定址的磁碟快取) ---
+# 依 03_Images_Generation_API.ipynb 的 client.images.generate(..., response_format="b64_json") 產生插圖，
+# 直接以 HTTP 呼叫相容 OpenAI Images API 的端點 POST {IMAGE_API_BASE}/images/generations (不需安裝 openai 套件)。
+# 快取：
+#   - 鍵 = sha256(JSON [model, prompt, size])，圖檔存在 IMAGE_CACHE_DIR/<鍵的前兩碼>/<鍵>.png。
+#     內容相同的請求只產生一次；換模型、提示或尺寸就是另一個檔案，不需要失效機制；
+#   - 未命中時把回應的 b64_json 分段解碼寫進暫存檔，寫完才改名 (os.replace)，其他行程不會讀到寫到一半的圖；
+#   - 命中時直接回傳檔案路徑，由呼叫端從磁碟讀出 (Streamlit 的 st.image、HTTP 的檔案回應)，不再經過 base64；
+#   - 介面顯示用的縮圖 (<鍵>-w<寬度>.jpg) 第一次需要時由原圖產生一次並存檔。
+#     st.image 收到比顯示寬度大的圖時，每次重跑都會解碼、縮小、重新編碼 (3 MB 的原圖約數十毫秒)；
+#     寬度剛好的 JPEG 則原封不動送出；
+#   - 多個 session 同時要同一張圖時只呼叫一次 API (每個鍵一把鎖)。
+# 介面 (report_illustration) 只顯示已在磁碟上的圖；原圖或縮圖還沒有時交給背景執行緒產生 (每個鍵一個)，
+# 這次重跑先不顯示，不會讓 Streamlit 的腳本執行緒等 API (最多 REQUEST_TIMEOUT 秒)。
+# 產生失敗時記住錯誤 FAILURE_TTL 秒，期間的重跑直接回報同一個錯誤，不會每次都重新呼叫 API。
+# 設定 KURO_IMAGE_API_KEY (或 OPENAI_API_KEY) 時才會呼叫 API；未設定時只使用已快取的圖片。
+# 離線時可用 benchmarks/stub_image_server.py 模擬 API (KURO_IMAGE_API_BASE=http://127.0.0.1:8100/v1)。
+# 本模組不依賴 Streamlit。
+
+IMAGE_CACHE_DIR = os.environ.get("KURO_IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache"))
+IMAGE_API_BASE = os.environ.get("KURO_IMAGE_API_BASE", "https://api.openai.com/v1")
+IMAGE_API_KEY = os.environ.get("KURO_IMAGE_API_KEY") or os.environ.get("OPENAI_API_KEY", "")
+IMAGE_MODEL = os.environ.get("KURO_IMAGE_MODEL", "gpt-image-1")
+IMAGE_SIZE = "1024x1024"
+REQUEST_TIMEOUT = 120 # 秒；生圖通常要 10~30 秒
+VARIANT_QUALITY = 85 # 縮圖的 JPEG 品質
+FAILURE_TTL = 300 # 秒；產生失敗後這段時間內不再重試同一張圖
+_B64_CHUNK = 4 * 16384 # 分段解碼的長度 (base64 以 4 個字元為一組，必須是 4 的倍數)
+
+# 與第一步 BCS 說明相同的分級：(最低分, 最高分, 名稱, 提示中的體態描述)
+BCS_CLASSES = (
+    (1, 3, "過瘦", "very thin, ribs and spine clearly visible"),
+    (4, 5, "理想", "slim and healthy, with a visible waist"),
+    (6, 7, "過重", "a little chubby, waist barely visible"),
+    (8, 9, "肥胖", "very round, with a hanging belly"),
+)
+STAGE_DESCRIPTIONS = {
+    "kitten": "a tiny kitten",
+    "junior": "a young cat",
+    "adult": "an adult cat",
+    "senior": "a senior cat with a slightly grey muzzle",
+}
+ILLUSTRATION_PROMPT = ("A warm children's book illustration of Kuro, {stage}, a black cat that is {body}, "
+                       "sitting next to a food bowl. Soft colours, plain light background, no text.")
+
+
+class ImageGenerationError(RuntimeError):
+    """圖片生成 API 回應錯誤、逾時或回應格式不符。"""
+
+
+def cache_key(model, prompt, size):
+    """內容定址的快取鍵：(model, prompt, size) 的 SHA-256。"""
+    return hashlib.sha256(json.dumps([model, prompt, size], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def bcs_class(bcs):
+    """BCS 1~9 所屬的 BCS_CLASSES 項目。"""
+    for entry in BCS_CLASSES:
+        if entry[0] <= bcs <= entry[1]:
+            return entry
+    raise ValueError(f"BCS 必須介於 1 到 9，收到 {bcs!r}")
+
+
+def illustration_prompt(bcs, age_months):
+    """依 BCS 分級與年齡階段產生插圖提示；同一分級、同一階段的貓咪共用一張圖。"""
+    stage = AGE_STAGES[age_stage_index(age_months)]
+    return ILLUSTRATION_PROMPT.format(stage=STAGE_DESCRIPTIONS[stage], body=bcs_class(bcs)[3])
+
+
+def decode_b64_to_file(b64_text, f):
+    """把 base64 字串分段解碼寫入二進位檔 f，不必一次配置整張圖的位元組；回傳寫入的位元組數。"""
+    written = 0
+    try:
+        for start in range(0, len(b64_text), _B64_CHUNK):
+            written += f.write(base64.b64decode(b64_text[start:start + _B64_CHUNK]))
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ImageGenerationError(f"b64_json 不是有效的 base64: {e}") from None
+    return written
+
+
+class ImageClient:
+    """相容 OpenAI Images API 的最小用戶端，只支援 response_format="b64_json"。"""
+
+    def __init__(self, base_url=IMAGE_API_BASE, api_key=IMAGE_API_KEY, timeout=REQUEST_TIMEOUT):
+        self.url = base_url.rstrip("/") + "/images/generations"
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def generate_b64(self, model, prompt, size=IMAGE_SIZE):
+        """產生一張圖，回傳 base64 字串。"""
+        body = {"model": model, "prompt": prompt, "n": 1, "size": size}
+        if not model.startswith("gpt-image"):
+            body["response_format"] = "b64_json" # gpt-image-1 一律回傳 b64_json，不接受這個參數
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"), method="POST", headers={
+            "Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise ImageGenerationError(f"圖片生成 API 回應 {e.code}: {e.read()[:200].decode('utf-8', 'replace')}") from None
+        except (urllib.error.URLError, TimeoutError, ValueError) as e:
+            raise ImageGenerationError(f"無法取得圖片: {e}") from None
+        try:
+            return payload["data"][0]["b64_json"]
+        except (KeyError, IndexError, TypeError):
+            raise ImageGenerationError("圖片生成 API 的回應沒有 b64_json。") from None
+
+
+class ImageCache:
+    """以 cache_key 為檔名的磁碟快取，可在多個執行緒與行程間共用。"""
+
+    def __init__(self, directory=IMAGE_CACHE_DIR):
+        self.directory = directory
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def variant_path(self, key, width):
+        return os.path.join(self.directory, key[:2], f"{key}-w{width}.jpg")
+
+    def get(self, key):
+        """已快取時回傳圖檔路徑，否則回傳 None。"""
+        path = self.path(key)
+        return path if os.path.exists(path) else None
+
+    def put_b64(self, key, b64_text):
+        """解碼 base64 並存檔，回傳圖檔路徑。"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                decode_b64_to_file(b64_text, f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return path
+
+    def variant(self, key, width):
+        """寬度為 width 的 JPEG 縮圖路徑 (原圖已快取時才有)；第一次需要時由原圖產生。
+        原圖無法解碼時刪除原圖 (之後可重新產生) 並拋出 ImageGenerationError。"""
+        path = self.variant_path(key, width)
+        if os.path.exists(path):
+            return path
+        original = self.get(key)
+        if original is None:
+            return None
+        from PIL import Image # 只有產生縮圖時才需要
+
+        try:
+            with Image.open(original) as image:
+                height = round(image.height * width / image.width)
+                thumbnail = image.convert("RGB").resize((width, height), Image.LANCZOS)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            os.remove(original)
+            raise ImageGenerationError(f"快取的圖檔無法解碼: {e}") from None
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            thumbnail.save(tmp, format="JPEG", quality=VARIANT_QUALITY, optimize=True)
+            os.replace(tmp, path)
+        except OSError as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise ImageGenerationError(f"無法寫入縮圖: {e}") from None
+        return path
+
+    def get_or_generate(self, client, model, prompt, size=IMAGE_SIZE):
+        """回傳 (model, prompt, size) 的圖檔路徑；未快取時以 client 產生 (同一張圖同時只產生一次)。"""
+        key = cache_key(model, prompt, size)
+        path = self.get(key)
+        if path is not None:
+            return path
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            path = self.get(key) # 等鎖的期間可能已由其他執行緒產生
+            if path is None:
+                path = self.put_b64(key, client.generate_b64(model, prompt, size))
+        with self._lock:
+            self._locks.pop(key, None)
+        return path
+
+
+_cache = None
+_client = None
+_cache_lock = threading.Lock()
+_jobs = {} # 快取鍵 -> 背景產生插圖的執行緒
+_failures = {} # 快取鍵 -> (失敗的時間, 錯誤訊息)
+_jobs_lock = threading.Lock()
+
+
+def get_image_cache():
+    """本行程共用的插圖快取 (IMAGE_CACHE_DIR)。"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache(IMAGE_CACHE_DIR)
+    return _cache
+
+
+def _generate_illustration(key, prompt, width, model, size):
+    """背景執行緒：產生原圖 (未快取時) 與縮圖；失敗時記在 _failures。"""
+    global _client
+    try:
+        if _client is None:
+            _client = ImageClient()
+        get_image_cache().get_or_generate(_client, model, prompt, size)
+        if width is not None:
+            get_image_cache().variant(key, width)
+    except Exception as e: # 背景執行緒沒有呼叫端可以接住例外
+        message = str(e) if isinstance(e, ImageGenerationError) else f"{type(e).__name__}: {e}"
+        with _jobs_lock:
+            _failures[key] = (time.monotonic(), message)
+    finally:
+        with _jobs_lock:
+            _jobs.pop(key, None)
+
+
+def illustration_pending(bcs, age_months, model=IMAGE_MODEL, size=IMAGE_SIZE):
+    """這張插圖是否正在背景產生。"""
+    return cache_key(model, illustration_prompt(bcs, age_months), size) in _jobs
+
+
+def report_illustration(bcs, age_months, width=None, model=IMAGE_MODEL, size=IMAGE_SIZE):
+    """
+    報告插圖的圖檔路徑 (指定 width 時為該寬度的縮圖)，只回傳已在磁碟上的圖，不會等待 API。
+    還沒有時：設定了 API 金鑰就在背景產生 (illustration_pending 為 True)，回傳 None；沒有金鑰時回傳 None。
+    FAILURE_TTL 秒內產生失敗過的圖拋出 ImageGenerationError (同一個錯誤訊息)，不重新呼叫 API。
+    """
+    prompt = illustration_prompt(bcs, age_months)
+    key = cache_key(model, prompt, size)
+    cache = get_image_cache()
+    path = cache.path(key) if width is None else cache.variant_path(key, width)
+    if os.path.exists(path):
+        return path # 最常見的情況：只檢查一個檔案
+    if cache.get(key) is None and not IMAGE_API_KEY:
+        return None
+    with _jobs_lock:
+        failure = _failures.get(key)
+        if failure is not None:
+            if time.monotonic() - failure[0] < FAILURE_TTL:
+                raise ImageGenerationError(failure[1])
+            del _failures[key]
+        if key not in _jobs:
+            _jobs[key] = threading.Thread(target=_generate_illustration, args=(key, prompt, width, model, size),
+                                          name="kuro-illustration", daemon=True)
+            _jobs[key].start()
+    return None
@@ -0,0 +1,126 @@
+from collections import namedtuple
+
+import numpy as np
+
+# --- 多種食物的餵食計畫 ---
+# 第三步原本只處理一種乾食 + 一種濕食；這裡可同時排入任意 N 種食物 (乾乾、主食罐、餐包、凍乾 ...)。
+# 每種食物可指定熱量佔比 (%) 與每日公克數上下限，求出各食物公克數，使總熱量剛好等於 DER。
+#
+# 以「熱量」為變數 e_i (= 公克數 x 每公克熱量)，目標 e*_i = DER x 佔比：
+#     最小化 Σ (e_i - e*_i)^2，限制 Σ e_i = DER、L_i <= e_i <= U_i (由公克數上下限換算)
+# 最佳解為 e_i = clip(e*_i + λ, L_i, U_i)，Σ e_i 對 λ 是分段線性遞增函數，
+# 只要在 2N 個轉折點上一次以 NumPy 計算總和、找出跨過 DER 的區間再線性內插即可，沒有迭代。
+# 未觸及上下限時 λ = 0，結果就是按佔比分配 (與 cat_core.build_feeding_plan 相同)。
+
+Food = namedtuple("Food", ["name", "kcal_per_gram", "share", "min_grams", "max_grams"],
+                  defaults=(None, 0.0, None))
+Food.__doc__ = """一種食物：每公克熱量、熱量佔比 (%，None 表示平分剩餘佔比)、每日公克數上下限 (None 表示不限)。"""
+
+
+def make_food(name, kcal, per_grams=100, share=None, min_grams=0.0, max_grams=None):
+    """依包裝標示建立 Food，例如乾乾 make_food("乾乾", 3600, per_grams=1000)、主食罐 make_food("罐頭", 100)。"""
+    return Food(name, kcal / per_grams, share, min_grams, max_grams)
+
+
+def resolve_shares(foods):
+    """
+    回傳每種食物的熱量佔比 (%，總和 100)。
+    全部都有指定時依比例換算 (例如 1:1:2)；部分未指定時，未指定者平分 100 減去已指定的部分。
+    """
+    given = [f.share for f in foods if f.share is not None]
+    if any(s < 0 for s in given):
+        raise ValueError("熱量佔比不可為負數。")
+    missing = len(foods) - len(given)
+    if missing == 0:
+        total = sum(given)
+        if total <= 0:
+            raise ValueError("熱量佔比總和必須大於 0。")
+        return np.array([f.share for f in foods], dtype=np.float64) * (100.0 / total)
+    remainder = 100.0 - sum(given)
+    if remainder < 0:
+        raise ValueError(f"已指定的熱量佔比總和為 {sum(given):g}%，超過 100%。")
+    return np.array([f.share if f.share is not None else remainder / missing for f in foods], dtype=np.float64)
+
+
+def solve_feeding_plan(der, foods):
+    """
+    計算達到 DER 所需的各食物每日公克數。
+    回傳 {"target_kcal", "total_kcal", "foods": [{"name", "grams", "kcal", "share"}]}，share 為實際熱量佔比 (%)；
+    食物清單或上下限無法湊出 DER 時拋出 ValueError。
+    """
+    if not foods:
+        raise ValueError("請至少輸入一種食物。")
+    if der is None or der <= 0:
+        raise ValueError("每日建議熱量 (DER) 必須大於 0。")
+    kcal_per_gram = np.array([f.kcal_per_gram for f in foods], dtype=np.float64)
+    if not np.all(kcal_per_gram > 0):
+        raise ValueError("每種食物的熱量都必須大於 0。")
+    min_grams = np.array([f.min_grams or 0.0 for f in foods], dtype=np.float64)
+    max_grams = np.array([np.inf if f.max_grams is None else f.max_grams for f in foods], dtype=np.float64)
+    if np.any(min_grams < 0) or np.any(max_grams < min_grams):
+        raise ValueError("公克數上下限不合理 (下限不可為負數，上限不可小於下限)。")
+
+    target = der * resolve_shares(foods) / 100.0 # 各食物的目標熱量 e*
+    low, high = kcal_per_gram * min_grams, kcal_per_gram * max_grams # 熱量上下限 L、U
+    if low.sum() > der * (1 + 1e-12):
+        raise ValueError(f"各食物的最低餵食量合計已達 {low.sum():.1f} 大卡，超過每日建議熱量 {der:.1f} 大卡。")
+    if high.sum() < der * (1 - 1e-12):
+        raise ValueError(f"各食物的最高餵食量合計只有 {high.sum():.1f} 大卡，不足每日建議熱量 {der:.1f} 大卡。")
+
+    if np.all((target >= low) & (target <= high)):
+        energy = target # 上下限都沒有影響，直接按佔比分配
+    else:
+        breakpoints = np.concatenate((low - target, high - target))
+        breakpoints = np.sort(breakpoints[np.isfinite(breakpoints)])
+        totals = np.clip(target + breakpoints[:, None], low, high).sum(axis=1)
+        k = int(np.searchsorted(totals, der))
+        if k == len(breakpoints):
+            # 超過最後一個轉折點：只剩沒有上限的食物繼續增加，斜率為其數量
+            lam = breakpoints[-1] + (der - totals[-1]) / np.count_nonzero(np.isinf(high))
+        elif k == 0 or totals[k] == totals[k - 1]:
+            lam = breakpoints[k]
+        else:
+            lam = breakpoints[k - 1] + (der - totals[k - 1]) * (breakpoints[k] - breakpoints[k - 1]) / (totals[k] - totals[k - 1])
+        energy = np.clip(target + lam, low, high)
+
+    grams = energy / kcal_per_gram
+    total_kcal = float(energy.sum())
+    shares = energy * (100.0 / total_kcal)
+    return {
+        "target_kcal": der,
+        "total_kcal": total_kcal,
+        "foods": [
+            {"name": f.name, "grams": float(g), "kcal": float(e), "share": float(s)}
+            for f, g, e, s in zip(foods, grams, energy, shares)
+        ],
+    }
+
+
+def _cell(value):
+    # 表格空白格可能是 None、NaN 或空字串
+    if value is None or value != value or (isinstance(value, str) and not value.strip()):
+        return None
+    return float(value)
+
+
+def foods_from_rows(rows):
+    """
+    把表格資料列 (dict：name、kcal、per_grams、share、min_grams、max_grams) 轉成 Food 清單。
+    名稱與熱量都空白的列視為未使用而略過；數值無效時拋出 ValueError。
+    """
+    foods = []
+    for i, row in enumerate(rows, start=1):
+        name = row.get("name")
+        name = name.strip() if isinstance(name, str) else ""
+        try:
+            kcal = _cell(row.get("kcal"))
+            if kcal is None:
+                if name:
+                    raise ValueError("未填熱量")
+                continue
+            per_grams = _cell(row.get("per_grams")) or 100.0
+            foods.append(make_food(name or f"食物 {i}", kcal, per_grams, _cell(row.get("share")),
+                                   _cell(row.get("min_grams")) or 0.0, _cell(row.get("max_grams"))))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"第 {i} 列「{name or '未命名'}」的數值無效: {e}") from None
+    return foods
@@ -0,0 +1,285 @@
+import atexit
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import nullcontext
+from datetime import datetime
+
+# --- 每次重跑的效能紀錄 ---
+# 設定環境變數 KURO_PROFILE=1 (或 KURO_PROFILE_FILE) 時啟用，記錄每一次重跑的時間分布：
+#   - span(name) / profiled(name) 計時一段程式或一個函數，可以巢狀；
+#     執行緒上最外層的 span 就是一次重跑 (main() 或單獨重跑的 fragment)，結束時整理成一筆 RerunRecord；
+#   - 結束時呼叫 set_collector 設定的函數取得 widget 數與 session_state 大小等數值 (由 catv3 提供，本模組不依賴 Streamlit)，
+#     然後把紀錄放進佇列就返回；彙總、JSON 編碼與寫檔都由背景執行緒處理，不佔用重跑的時間。
+#     collector 回傳的值若是函數 (例如 pickle 整個 session 狀態來量大小)，也延到背景執行緒才呼叫；
+#   - 最近 RECENT_RERUNS 筆留在記憶體供除錯面板顯示 (只讀取已處理完的紀錄，不等待佇列)；
+#   - 處理一筆紀錄時的任何例外都只記在 last_error，背景執行緒繼續處理下一筆；
+#     KURO_PROFILE_FILE 以 .prom 結尾時每 PROMETHEUS_WRITE_INTERVAL 秒改寫一次 Prometheus 文字格式
+#     (給 node_exporter 的 textfile collector)，其他副檔名則每次重跑附加一行 JSON (JSON Lines)。
+# 開銷：每個 span 約 3 微秒，加上每次重跑一次的 collector 與放進佇列 (見 benchmarks/bench_profiling.py)，
+# 在重跑時間的 1% 以內。未啟用時 span 回傳共用的 nullcontext、profiled 直接回傳原函數，沒有任何開銷。
+
+PROFILE_FILE = os.environ.get("KURO_PROFILE_FILE", "")
+ENABLED = bool(PROFILE_FILE) or os.environ.get("KURO_PROFILE", "") not in ("", "0")
+RECENT_RERUNS = 200 # 記憶體中保留的重跑筆數 (所有 session 合計)
+PROMETHEUS_WRITE_INTERVAL = 5.0 # 秒
+FLUSH_TIMEOUT = 5.0 # 秒；結束時寫出 Prometheus 檔最多等背景執行緒這麼久
+MAX_EXPORTED_SESSIONS = 50 # Prometheus 只輸出最近活動的幾個 session 的數值，避免標籤無限增加
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0) # 重跑時間直方圖的上界 (秒)
+
+
+class RerunRecord:
+    """
+    一次重跑的紀錄：kind 為最外層 span 的名稱，spans 為 [名稱, 深度, 開始時間 (毫秒), 耗時 (毫秒)] 依開始順序排列，
+    status 為 "ok" 或結束時的例外名稱 (st.rerun() 會以 RerunException 結束)，
+    gauges 為 collector 的回傳值，overhead_ms 為重跑結束時 (在重跑的執行緒上) 整理紀錄與 collector 的時間。
+    """
+
+    __slots__ = ("kind", "started_at", "total_ms", "spans", "status", "gauges", "overhead_ms", "_start")
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+        self.status = "ok"
+        self.gauges = {}
+        self.overhead_ms = 0.0
+
+    @property
+    def session_id(self):
+        return self.gauges.get("session_id")
+
+    def to_dict(self):
+        return {
+            "time": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            "kind": self.kind, "status": self.status, "total_ms": round(self.total_ms, 3),
+            "spans": [{"name": name, "depth": depth, "start_ms": round(start, 3), "ms": round(ms, 3)}
+                      for name, depth, start, ms in self.spans],
+            **self.gauges, "overhead_ms": round(self.overhead_ms, 3),
+        }
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "entry")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        local = self.profiler._local
+        record = getattr(local, "record", None)
+        if record is None:
+            record = local.record = RerunRecord(self.name)
+            local.depth = 0
+        now = time.perf_counter()
+        self.entry = [self.name, local.depth, (now - record._start) * 1e3, now]
+        record.spans.append(self.entry)
+        local.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        entry = self.entry
+        entry[3] = (time.perf_counter() - entry[3]) * 1e3
+        local = self.profiler._local
+        local.depth -= 1
+        if local.depth == 0:
+            record, local.record = local.record, None
+            self.profiler._finish(record, exc_type)
+        return False
+
+
+class Profiler:
+    """收集重跑紀錄；可在多個 session 執行緒間共用。path 為匯出檔 (.prom 或 JSON Lines)，空字串表示不匯出。"""
+
+    def __init__(self, path=PROFILE_FILE, recent=RECENT_RERUNS):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._collector = None
+        self.recent = deque(maxlen=recent)
+        # Prometheus 的累計值
+        self._span_totals = defaultdict(lambda: [0, 0.0]) # 名稱 -> [次數, 秒數合計]
+        self._rerun_buckets = defaultdict(lambda: [0] * (len(RERUN_BUCKETS) + 2)) # kind -> 各桶次數 + [次數, 秒數合計]
+        self._sessions = OrderedDict() # session id -> gauges
+        self._jsonl = None
+        self._prometheus = path.endswith(".prom")
+        self._last_write = 0.0
+        self.last_error = None # 背景執行緒處理紀錄時最後一次的例外 (不會中斷使用者的操作)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._export_loop, name="kuro-profile-writer", daemon=True)
+        self._worker.start()
+        if self._prometheus:
+            atexit.register(self.write_prometheus)
+
+    def set_collector(self, collector):
+        """
+        collector() 在每次重跑結束時 (同一個執行緒) 呼叫，回傳要記錄的數值 dict (例如 session_id、widgets)；
+        值為函數時在背景執行緒呼叫、以回傳值記錄 (例外時記為 None)，適合較花時間的量測。
+        """
+        self._collector = collector
+
+    def span(self, name):
+        """計時一段程式：with profiler.span("名稱"): ..."""
+        return _Span(self, name)
+
+    def profiled(self, name):
+        """計時整個函數的裝飾器。"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _finish(self, record, exc_type):
+        start = time.perf_counter()
+        record.total_ms = (start - record._start) * 1e3
+        if exc_type is not None:
+            record.status = exc_type.__name__
+        if self._collector is not None:
+            record.gauges = self._collector()
+        record.overhead_ms = (time.perf_counter() - start) * 1e3
+        self._queue.put(record)
+
+    def _export_loop(self):
+        while True:
+            record = self._queue.get()
+            try:
+                record.gauges = {key: _resolve(value) for key, value in record.gauges.items()}
+                with self._lock:
+                    self._aggregate(record)
+                    if self._prometheus:
+                        now = time.perf_counter()
+                        if now - self._last_write >= PROMETHEUS_WRITE_INTERVAL:
+                            self._last_write = now
+                            self._write_prometheus_locked()
+                    elif self.path:
+                        if self._jsonl is None:
+                            self._jsonl = open(self.path, "a", encoding="utf-8")
+                        self._jsonl.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+                        self._jsonl.flush()
+            except Exception as e: # 寫檔失敗或 collector 的數值無法編碼：略過這筆的匯出，繼續處理下一筆
+                self.last_error = e
+            finally:
+                self._queue.task_done()
+
+    def _aggregate(self, record):
+        self.recent.append(record)
+        for name, _, _, ms in record.spans[1:]:
+            totals = self._span_totals[name]
+            totals[0] += 1
+            totals[1] += ms / 1e3
+        buckets = self._rerun_buckets[record.kind]
+        seconds = record.total_ms / 1e3
+        for i, bound in enumerate(RERUN_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        buckets[-2] += 1
+        buckets[-1] += seconds
+        if record.session_id is not None:
+            self._sessions[record.session_id] = record.gauges
+            self._sessions.move_to_end(record.session_id)
+            while len(self._sessions) > MAX_EXPORTED_SESSIONS:
+                self._sessions.popitem(last=False)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """
+        等待佇列中的紀錄全部處理完，最多 timeout 秒 (None 表示不限)；全部處理完時回傳 True。
+        背景執行緒已結束時立即回傳 False。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._worker.is_alive():
+                    return False
+                remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def reruns(self, session_id=None):
+        """
+        最近已處理完的重跑紀錄 (由舊到新)；指定 session_id 時只回傳該 session 的紀錄。
+        不等待佇列：剛結束、背景執行緒還沒處理的重跑要到下一次呼叫才會出現。
+        """
+        with self._lock:
+            return [r for r in self.recent if session_id is None or r.session_id == session_id]
+
+    # --- Prometheus 文字格式 ---
+    def prometheus_text(self):
+        with self._lock:
+            return self._prometheus_text_locked()
+
+    def _prometheus_text_locked(self):
+        lines = ["# HELP kuro_rerun_seconds 每次重跑的時間 (kind 為 main 或單獨重跑的 fragment)",
+                 "# TYPE kuro_rerun_seconds histogram"]
+        for kind, buckets in sorted(self._rerun_buckets.items()):
+            for bound, count in zip(RERUN_BUCKETS, buckets):
+                lines.append(f'kuro_rerun_seconds_bucket{{kind="{kind}",le="{bound}"}} {count}')
+            lines.append(f'kuro_rerun_seconds_bucket{{kind="{kind}",le="+Inf"}} {buckets[-2]}')
+            lines.append(f'kuro_rerun_seconds_sum{{kind="{kind}"}} {buckets[-1]:.6f}')
+            lines.append(f'kuro_rerun_seconds_count{{kind="{kind}"}} {buckets[-2]}')
+        lines += ["# HELP kuro_span_seconds 重跑中各區段 (輸入表單、計算、報告) 的時間",
+                  "# TYPE kuro_span_seconds summary"]
+        for name, (count, seconds) in sorted(self._span_totals.items()):
+            lines.append(f'kuro_span_seconds_sum{{span="{name}"}} {seconds:.6f}')
+            lines.append(f'kuro_span_seconds_count{{span="{name}"}} {count}')
+        gauge_names = sorted({key for gauges in self._sessions.values() for key, value in gauges.items()
+                              if isinstance(value, (int, float)) and not isinstance(value, bool)})
+        for key in gauge_names:
+            lines += [f"# HELP kuro_{key} 各 session 最近一次重跑的 {key}", f"# TYPE kuro_{key} gauge"]
+            for session_id, gauges in self._sessions.items():
+                if gauges.get(key) is not None:
+                    lines.append(f'kuro_{key}{{session="{session_id}"}} {gauges[key]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        self.flush()
+        with self._lock:
+            self._write_prometheus_locked()
+
+    def _write_prometheus_locked(self):
+        # 先寫暫存檔再改名，讀取端不會讀到寫到一半的檔案
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self._prometheus_text_locked())
+        os.replace(tmp, self.path)
+
+
+def _resolve(value):
+    if not callable(value):
+        return value
+    try:
+        return value()
+    except Exception: # 量測失敗 (例如 session 狀態在背景量測時剛好被修改) 只記為 None
+        return None
+
+
+_NULL_SPAN = nullcontext()
+_profiler = Profiler(PROFILE_FILE) if ENABLED else None
+
+
+def get_profiler():
+    """本行程共用的 Profiler；未啟用時為 None。"""
+    return _profiler
+
+
+def span(name):
+    """計時一段程式 (未啟用時不做任何事)。"""
+    return _profiler.span(name) if _profiler is not None else _NULL_SPAN
+
+
+def profiled(name):
+    """計時整個函數的裝飾器；未啟用時直接回傳原函數。"""
+    if _profiler is None:
+        return lambda func: func
+    return _profiler.profiled(name)
@@ -0,0 +1,247 @@
+import functools
+import html
+import string
+from datetime import datetime
+
+from cat_core import CALORIE_TOLERANCE, REPORT_APP_NAME
+
+# --- 多格式報告引擎 ---
+# 同一份資料可輸出純文字 (與 cat_core.generate_text_report 逐字相同)、Markdown 與 HTML。
+# 每種格式的樣板在建立 ReportRenderer 時就檢查並綁定成 str.format_map 填值函數 (見 compile_template)，
+# 產生報告時只做「選片段 -> 填值 -> 一次 join」，不再逐段 += 與逐欄 .get()。
+# 批次產生 (render_many) 時，含時間的標題只格式化一次，所有報告共用。
+# 本模組不依賴 Streamlit。
+
+REPORT_FORMATS = ("text", "markdown", "html")
+
+_SEPARATOR = "--------------------------------------"
+_TEXT_SECTION_END = _SEPARATOR + "\n\n"
+_DISCLAIMER_LINES = (
+    "此工具提供的熱量需求為估算值，基於常用公式和參考數據。",
+    "每隻貓咪的代謝、活動量、健康狀況、品種及個別差異都可能影響實際熱量需求。",
+    "在任何飲食調整（特別是增重或減重計畫）前，請務必諮詢您的獸醫或專業寵物營養師，",
+    "獲取最精確的建議與指導，以確保貓咪的健康與安全。",
+    "本工具不提供醫療診斷或治療建議。",
+)
+
+# 每種格式的樣板片段。含 {欄位} 的片段以對應的 dict 填值 (cat_info、der_info ...)；
+# plan_head 與 plan_tail 之間插入乾食百分比；footer_head 與 footer_tail 之間插入 app_name。
+TEMPLATES = {
+    "text": {
+        "header": "--- 🐱 貓咪飲食報告 - {0} ---\n\n",
+        "cat": "📋 貓咪基本資料:\n- 體重: {weight:.2f} 公斤\n- 年齡: {age_years} 歲 {age_months} 個月\n"
+               "- BCS: {bcs} / 9\n- 絕育狀態: {is_neutered}\n",
+        "pregnant": "- 生理狀態: 懷孕中\n",
+        "lactating": "- 生理狀態: 哺乳中\n",
+        "cat_end": _TEXT_SECTION_END,
+        "der": "📈 每日建議攝取:\n- 建議熱量 (DER): {der:.2f} 大卡/天\n" + _TEXT_SECTION_END,
+        "intake": "📊 目前飲食分析:\n- 從乾乾攝取的熱量: {dry_food_kcal:.2f} 大卡\n"
+                  "- 從濕食攝取的熱量: {wet_food_kcal:.2f} 大卡\n- 每日總攝取熱量: {total_intake:.2f} 大卡\n"
+                  "- 與建議量差異: {calorie_difference:+.2f} 大卡\n",
+        "intake_over": "(攝取超標，建議調整)\n" + _TEXT_SECTION_END,
+        "intake_under": "(攝取不足，建議調整)\n" + _TEXT_SECTION_END,
+        "intake_ok": "(熱量攝取接近建議值)\n" + _TEXT_SECTION_END,
+        "intake_missing": "📊 目前飲食分析: 尚未輸入餵食資訊，無法分析。\n" + _TEXT_SECTION_END,
+        "cost": "💰 目前每月伙食費:\n- 每日乾食花費: {daily_dry_cost:.2f} 元\n- 每日濕食花費: {daily_wet_cost:.2f} 元\n"
+                "- 每月總伙食費: {total_monthly_cost:.2f} 元 (以30天計)\n" + _TEXT_SECTION_END,
+        "cost_missing": "💰 目前每月伙食費: 尚未輸入食物價格資訊，無法估算。\n" + _TEXT_SECTION_END,
+        "plan_head": "🥗 建議餵食計畫:\n目標熱量約: {target_kcal:.0f} 大卡/天\n熱量佔比: ",
+        "plan_tail": "% 乾食 / {wet_food_percentage}% 濕食\n- 建議乾食餵食量: {required_dry_grams:.1f} 公克/天\n"
+                     "- 建議濕食餵食量: {required_wet_grams:.1f} 公克/天\n" + _TEXT_SECTION_END,
+        "plan_missing": "🥗 建議餵食計畫: 尚未計算或無有效食物熱量資訊。\n" + _TEXT_SECTION_END,
+        "footer_head": "ℹ️ 免責聲明與重要提示：\n\n" + "\n".join(_DISCLAIMER_LINES) + "\n\n" + _SEPARATOR + "\n",
+        "footer_tail": " (僅供參考)",
+    },
+    "markdown": {
+        "header": "# 🐱 貓咪飲食報告\n\n_產生時間: {0}_\n\n",
+        "cat": "## 📋 貓咪基本資料\n\n- 體重: {weight:.2f} 公斤\n- 年齡: {age_years} 歲 {age_months} 個月\n"
+               "- BCS: {bcs} / 9\n- 絕育狀態: {is_neutered}\n",
+        "pregnant": "- 生理狀態: 懷孕中\n",
+        "lactating": "- 生理狀態: 哺乳中\n",
+        "cat_end": "\n",
+        "der": "## 📈 每日建議攝取\n\n- 建議熱量 (DER): **{der:.2f}** 大卡/天\n\n",
+        "intake": "## 📊 目前飲食分析\n\n| 項目 | 熱量 (大卡) |\n| --- | ---: |\n"
+                  "| 從乾乾攝取 | {dry_food_kcal:.2f} |\n| 從濕食攝取 | {wet_food_kcal:.2f} |\n"
+                  "| 每日總攝取 | {total_intake:.2f} |\n| 與建議量差異 | {calorie_difference:+.2f} |\n\n",
+        "intake_over": "> ⚠️ 攝取超標，建議調整\n\n",
+        "intake_under": "> ⚠️ 攝取不足，建議調整\n\n",
+        "intake_ok": "> ✅ 熱量攝取接近建議值\n\n",
+        "intake_missing": "## 📊 目前飲食分析\n\n尚未輸入餵食資訊，無法分析。\n\n",
+        "cost": "## 💰 目前每月伙食費\n\n- 每日乾食花費: {daily_dry_cost:.2f} 元\n- 每日濕食花費: {daily_wet_cost:.2f} 元\n"
+                "- 每月總伙食費: **{total_monthly_cost:.2f} 元** (以30天計)\n\n",
+        "cost_missing": "## 💰 目前每月伙食費\n\n尚未輸入食物價格資訊，無法估算。\n\n",
+        "plan_head": "## 🥗 建議餵食計畫\n\n目標熱量約 **{target_kcal:.0f}** 大卡/天，熱量佔比 ",
+        "plan_tail": "% 乾食 / {wet_food_percentage}% 濕食\n\n- 建議乾食餵食量: **{required_dry_grams:.1f}** 公克/天\n"
+                     "- 建議濕食餵食量: **{required_wet_grams:.1f}** 公克/天\n\n",
+        "plan_missing": "## 🥗 建議餵食計畫\n\n尚未計算或無有效食物熱量資訊。\n\n",
+        "footer_head": "## ℹ️ 免責聲明與重要提示\n\n" + "".join(f"> {line}\n" for line in _DISCLAIMER_LINES) + "\n---\n\n_",
+        "footer_tail": " (僅供參考)_\n",
+    },
+    "html": {
+        "header": '<article class="kuro-report">\n<h1>🐱 貓咪飲食報告</h1>\n<p class="generated-at">產生時間: {0}</p>\n',
+        "cat": '<section class="cat-info">\n<h2>📋 貓咪基本資料</h2>\n<ul>\n<li>體重: {weight:.2f} 公斤</li>\n'
+               "<li>年齡: {age_years} 歲 {age_months} 個月</li>\n<li>BCS: {bcs} / 9</li>\n<li>絕育狀態: {is_neutered}</li>\n",
+        "pregnant": "<li>生理狀態: 懷孕中</li>\n",
+        "lactating": "<li>生理狀態: 哺乳中</li>\n",
+        "cat_end": "</ul>\n</section>\n",
+        "der": '<section class="der">\n<h2>📈 每日建議攝取</h2>\n<ul>\n'
+               "<li>建議熱量 (DER): <strong>{der:.2f}</strong> 大卡/天</li>\n</ul>\n</section>\n",
+        "intake": '<section class="intake">\n<h2>📊 目前飲食分析</h2>\n<table>\n'
+                  "<tr><th>從乾乾攝取的熱量</th><td>{dry_food_kcal:.2f} 大卡</td></tr>\n"
+                  "<tr><th>從濕食攝取的熱量</th><td>{wet_food_kcal:.2f} 大卡</td></tr>\n"
+                  "<tr><th>每日總攝取熱量</th><td>{total_intake:.2f} 大卡</td></tr>\n"
+                  "<tr><th>與建議量差異</th><td>{calorie_difference:+.2f} 大卡</td></tr>\n</table>\n",
+        "intake_over": '<p class="status over">攝取超標，建議調整</p>\n</section>\n',
+        "intake_under": '<p class="status under">攝取不足，建議調整</p>\n</section>\n',
+        "intake_ok": '<p class="status ok">熱量攝取接近建議值</p>\n</section>\n',
+        "intake_missing": '<section class="intake">\n<h2>📊 目前飲食分析</h2>\n<p>尚未輸入餵食資訊，無法分析。</p>\n</section>\n',
+        "cost": '<section class="cost">\n<h2>💰 目前每月伙食費</h2>\n<ul>\n'
+                "<li>每日乾食花費: {daily_dry_cost:.2f} 元</li>\n<li>每日濕食花費: {daily_wet_cost:.2f} 元</li>\n"
+                "<li>每月總伙食費: <strong>{total_monthly_cost:.2f} 元</strong> (以30天計)</li>\n</ul>\n</section>\n",
+        "cost_missing": '<section class="cost">\n<h2>💰 目前每月伙食費</h2>\n<p>尚未輸入食物價格資訊，無法估算。</p>\n</section>\n',
+        "plan_head": '<section class="plan">\n<h2>🥗 建議餵食計畫</h2>\n'
+                     "<p>目標熱量約 <strong>{target_kcal:.0f}</strong> 大卡/天，熱量佔比 ",
+        "plan_tail": "% 乾食 / {wet_food_percentage}% 濕食</p>\n<ul>\n"
+                     "<li>建議乾食餵食量: <strong>{required_dry_grams:.1f}</strong> 公克/天</li>\n"
+                     "<li>建議濕食餵食量: <strong>{required_wet_grams:.1f}</strong> 公克/天</li>\n</ul>\n</section>\n",
+        "plan_missing": '<section class="plan">\n<h2>🥗 建議餵食計畫</h2>\n<p>尚未計算或無有效食物熱量資訊。</p>\n</section>\n',
+        "footer_head": '<section class="disclaimer">\n<h2>ℹ️ 免責聲明與重要提示</h2>\n<p>'
+                       + "<br>\n".join(_DISCLAIMER_LINES) + '</p>\n</section>\n<footer>',
+        "footer_tail": " (僅供參考)</footer>\n</article>\n",
+    },
+}
+
+
+def compile_template(template):
+    """
+    檢查 "{欄位:格式}" 樣板並回傳填值函數 (template.format_map，參數 d 為 dict)。
+    欄位只能是單純的名稱 (不可有索引、屬性或 !r 轉換)，樣板內容不會被當成程式碼執行。
+    """
+    for _, field, _, conversion in string.Formatter().parse(template):
+        if field is not None and (not field.isidentifier() or conversion):
+            raise ValueError(f"樣板欄位必須是單純的名稱: {field!r}")
+    return template.format_map
+
+
+class _MissingAsDefault(dict):
+    """資料缺欄位時的後備：與舊版 .get() 的預設值相同 (絕育狀態為「未知」，其餘為 0)。"""
+
+    def __missing__(self, key):
+        return "未知" if key == "is_neutered" else 0
+
+
+def _fill(template, data):
+    # 一般情況資料欄位齊全，直接填值；缺欄位時才退回有預設值的版本
+    try:
+        return template(data)
+    except KeyError:
+        return template(_MissingAsDefault(data))
+
+
+class ReportRenderer:
+    """某一種格式的報告產生器；樣板在建立時預先綁定，之後可重複使用 (執行緒安全，無可變狀態)。"""
+
+    def __init__(self, fmt):
+        if fmt not in TEMPLATES:
+            raise ValueError(f"不支援的報告格式: {fmt!r} (可用: {', '.join(REPORT_FORMATS)})")
+        self.fmt = fmt
+        t = TEMPLATES[fmt]
+        self._header = t["header"].format
+        self._cat = compile_template(t["cat"])
+        self._der = compile_template(t["der"])
+        self._intake = compile_template(t["intake"])
+        self._cost = compile_template(t["cost"])
+        self._plan_head = compile_template(t["plan_head"])
+        self._plan_tail = compile_template(t["plan_tail"])
+        self._pregnant, self._lactating, self._cat_end = t["pregnant"], t["lactating"], t["cat_end"]
+        self._intake_over, self._intake_under, self._intake_ok = t["intake_over"], t["intake_under"], t["intake_ok"]
+        self._intake_missing, self._cost_missing, self._plan_missing = t["intake_missing"], t["cost_missing"], t["plan_missing"]
+        self._footer_head, self._footer_tail = t["footer_head"], t["footer_tail"]
+        self._escape = _escape_html if fmt == "html" else None
+
+    def header(self, generated_at):
+        """含產生時間的標題。"""
+        return self._header(generated_at.strftime('%Y-%m-%d %H:%M:%S'))
+
+    def body(self, cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=REPORT_APP_NAME):
+        """標題之後的內容；只取決於輸入資料 (與 cat_core.report_body 相同的判斷規則)。"""
+        if self._escape is not None:
+            cat_info = dict(cat_info, is_neutered=self._escape(str(cat_info.get("is_neutered", "未知"))))
+            app_name = self._escape(app_name)
+        parts = [_fill(self._cat, cat_info)]
+        if cat_info.get("is_pregnant", False):
+            parts.append(self._pregnant)
+        if cat_info.get("is_lactating", False):
+            parts.append(self._lactating)
+        parts.append(self._cat_end)
+        parts.append(_fill(self._der, der_info))
+
+        if intake_analysis:
+            parts.append(_fill(self._intake, intake_analysis))
+            diff = intake_analysis.get("calorie_difference", 0)
+            if diff > CALORIE_TOLERANCE:
+                parts.append(self._intake_over)
+            elif diff < -CALORIE_TOLERANCE:
+                parts.append(self._intake_under)
+            else:
+                parts.append(self._intake_ok)
+        else:
+            parts.append(self._intake_missing)
+
+        if monthly_cost_info and monthly_cost_info.get("total_monthly_cost") is not None:
+            parts.append(_fill(self._cost, monthly_cost_info))
+        else:
+            parts.append(self._cost_missing)
+
+        if feeding_plan and feeding_plan.get("target_kcal") is not None:
+            parts.append(_fill(self._plan_head, feeding_plan))
+            parts.append(str(100 - feeding_plan.get("wet_food_percentage", 0)))
+            parts.append(_fill(self._plan_tail, feeding_plan))
+        else:
+            parts.append(self._plan_missing)
+
+        parts.append(self._footer_head)
+        parts.append(app_name)
+        parts.append(self._footer_tail)
+        return "".join(parts)
+
+    def render(self, cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan,
+               app_name=REPORT_APP_NAME, generated_at=None):
+        """產生完整報告；generated_at 未指定時使用現在時間。"""
+        return (self.header(generated_at or datetime.now())
+                + self.body(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name))
+
+    def render_many(self, results, app_name=REPORT_APP_NAME, generated_at=None):
+        """
+        批次產生報告：results 為 cat_core.run_pipeline 回傳的 dict (可為產生器)，逐筆產生報告字串。
+        整批共用同一個產生時間，標題只格式化一次。
+        """
+        header = self.header(generated_at or datetime.now())
+        body = self.body
+        for r in results:
+            yield header + body(r["cat_info"], r["der_info"], r["intake_analysis"],
+                                r["monthly_cost_info"], r["feeding_plan"], app_name)
+
+
+@functools.lru_cache(maxsize=256)
+def _escape_html(text):
+    # 絕育狀態與 app_name 只有少數幾種值，跳脫結果可以快取
+    return html.escape(text)
+
+
+_RENDERERS = {fmt: ReportRenderer(fmt) for fmt in REPORT_FORMATS}
+
+
+def get_renderer(fmt="text"):
+    """取得共用的 ReportRenderer；fmt 為 text、markdown 或 html。"""
+    try:
+        return _RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"不支援的報告格式: {fmt!r} (可用: {', '.join(REPORT_FORMATS)})") from None
+
+
+def render_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, fmt="text",
+                  app_name=REPORT_APP_NAME, generated_at=None):
+    """以指定格式產生一份報告。"""
+    return get_renderer(fmt).render(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan,
+                                    app_name, generated_at)
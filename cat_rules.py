@@ -0,0 +1,81 @@
+import json
+import os
+from collections import namedtuple
+
+# --- 活動係數規則集 ---
+# 規則集是放在 rules/ 底下、帶版本號的 JSON 資料，載入時一次編譯成查詢表：
+#   (年齡階段 4) x (是否絕育 2) x (BCS 1-9) x (懷孕 2) x (哺乳 2) = 288 格
+# 查詢只需算出索引後取值，沒有任何分支；同一個索引公式也能直接用在 NumPy 陣列上。
+# 診所可用 load_rule_set() 載入自己的係數，或設定環境變數 KURO_RULE_SET 取代預設規則集。
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+DEFAULT_RULE_FILE = os.path.join(RULES_DIR, "kuro_v1.json")
+
+SCHEMA_VERSION = 1
+AGE_STAGES = ("kitten", "junior", "adult", "senior") # <4 個月 / 4-12 個月 / 1-7 歲 / 7 歲以上
+NEUTER_STATES = ("intact", "neutered")
+BCS_MIN, BCS_MAX = 1, 9
+TABLE_SIZE = len(AGE_STAGES) * len(NEUTER_STATES) * BCS_MAX * 2 * 2
+
+RuleSet = namedtuple("RuleSet", ["name", "version", "description", "table"])
+
+
+def age_stage_index(age_months):
+    """年齡 (月) -> 年齡階段索引 0-3。純量與 NumPy 陣列皆適用。"""
+    return (age_months >= 4) * 1 + (age_months > 12) + (age_months >= 84)
+
+
+def table_index(stage, neutered, bcs, pregnant, lactating):
+    """查詢表的平面索引。bcs 需已是 1-9 的整數；純量與 NumPy 陣列皆適用。"""
+    return (((stage * 2 + neutered) * BCS_MAX + (bcs - BCS_MIN)) * 2 + pregnant) * 2 + lactating
+
+
+def compile_rule_set(data):
+    """把規則集資料 (dict) 驗證並編譯成 RuleSet。資料格式見 rules/kuro_v1.json。"""
+    if data.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"不支援的規則集格式版本: {data.get('schema')!r}")
+    for key in ("name", "version", "pregnant", "lactating", "stages"):
+        if key not in data:
+            raise ValueError(f"規則集缺少欄位: {key}")
+
+    pregnant = float(data["pregnant"])
+    lactating = float(data["lactating"])
+    table = [0.0] * TABLE_SIZE
+    for stage, stage_name in enumerate(AGE_STAGES):
+        stage_rules = data["stages"].get(stage_name)
+        if stage_rules is None:
+            raise ValueError(f"規則集缺少年齡階段: {stage_name}")
+        for neutered, neuter_name in enumerate(NEUTER_STATES):
+            by_bcs = stage_rules.get(neuter_name)
+            if by_bcs is None or len(by_bcs) != BCS_MAX:
+                raise ValueError(f"規則集 {stage_name}.{neuter_name} 必須有 {BCS_MAX} 個 BCS 係數")
+            for bcs in range(BCS_MIN, BCS_MAX + 1):
+                base = float(by_bcs[bcs - BCS_MIN])
+                # 懷孕優先於哺乳，兩者皆優先於年齡/BCS 規則
+                table[table_index(stage, neutered, bcs, 0, 0)] = base
+                table[table_index(stage, neutered, bcs, 0, 1)] = lactating
+                table[table_index(stage, neutered, bcs, 1, 0)] = pregnant
+                table[table_index(stage, neutered, bcs, 1, 1)] = pregnant
+
+    return RuleSet(str(data["name"]), str(data["version"]), data.get("description", ""), tuple(table))
+
+
+def load_rule_set(path):
+    """從 JSON 檔載入並編譯規則集。"""
+    with open(path, encoding="utf-8") as f:
+        return compile_rule_set(json.load(f))
+
+
+def lookup_multiplier(rule_set, age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False):
+    """以查詢表取得活動係數 (O(1)，無分支)。BCS 會被限制在 1-9 的整數。"""
+    if not BCS_MIN <= bcs <= BCS_MAX:
+        bcs = min(max(bcs, BCS_MIN), BCS_MAX)
+    # 與 table_index(age_stage_index(...), ...) 相同，展開成單一運算式以減少函式呼叫
+    stage = (age_months >= 4) * 1 + (age_months > 12) + (age_months >= 84)
+    return rule_set.table[
+        (((stage * 2 + (not not is_neutered)) * BCS_MAX + int(bcs) - BCS_MIN) * 2 + (not not is_pregnant)) * 2
+        + (not not is_lactating)
+    ]
+
+
+DEFAULT_RULE_SET = load_rule_set(os.environ.get("KURO_RULE_SET", DEFAULT_RULE_FILE))
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+import numpy as np
+
+from cat_batch import calculate_rer_batch, get_activity_multiplier_batch
+from cat_core import ENERGY_PER_KG
+
+# --- 體重變化模擬 ---
+# 依每日攝取熱量與 DER 的差距，逐週推估體重：
+#     下週體重 = 本週體重 + (每日攝取 - 本週 DER) x 7 / ENERGY_PER_KG
+# RER = 70 x 體重^0.75 會隨體重改變，所以 DER 每一週都以當週體重重新計算；
+# 活動係數依當週年齡 (月齡隨週數增加，可能跨過幼貓/成貓/熟齡階段) 由規則集查詢表取得。
+# 所有貓咪 x 所有週數的活動係數一次以查詢表 gather 算好；週與週之間有先後關係，
+# 只沿時間軸迴圈 (每一步都是整批貓咪的 NumPy 運算)。
+# 這是能量平衡的粗略估算，實際體重變化還受活動量、體組成與健康狀況影響。
+# ENERGY_PER_KG 定義在 cat_core：第一步的體重紀錄 (cat_weight_log) 也要用，不必為了一個常數載入 NumPy。
+
+DAYS_PER_WEEK = 7
+DAYS_PER_MONTH = 30.4375 # 平均每月天數，用來把週數換算成月齡
+MIN_WEIGHT_KG = 0.1 # 體重下限，避免極端輸入產生負數體重
+
+WeightTrajectory = namedtuple("WeightTrajectory", ["weeks", "weight", "der"])
+WeightTrajectory.__doc__ = """模擬結果：weeks 為 0..N 週；weight 形狀 (貓咪數, N+1)，第 0 欄為起始體重；der 形狀 (貓咪數, N)，為每週使用的 DER。"""
+
+
+def simulate_weight(weight_kg, intake_kcal, age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False,
+                    weeks=52, energy_per_kg=ENERGY_PER_KG, rule_set=None):
+    """
+    批次模擬整群貓咪未來 weeks 週的體重。參數可為純量或等長陣列 (每隻貓一個值)；
+    intake_kcal 也可是形狀 (貓咪數, weeks) 的陣列，表示每週不同的每日攝取熱量。
+    BCS、懷孕與哺乳狀態在模擬期間視為不變。回傳 WeightTrajectory。
+    """
+    weight = np.atleast_1d(np.asarray(weight_kg, dtype=np.float64))
+    if np.any(~(weight > 0)):
+        raise ValueError("體重必須大於零。")
+    animals = np.broadcast_shapes(weight.shape, np.shape(age_months), np.shape(is_neutered), np.shape(bcs),
+                                  np.shape(is_pregnant), np.shape(is_lactating))
+    weight = np.broadcast_to(weight, animals)
+    intake = np.asarray(intake_kcal, dtype=np.float64)
+    if intake.ndim <= len(animals): # 每隻貓一個值 -> 每週相同
+        intake = intake[..., None]
+    intake = np.broadcast_to(intake, animals + (weeks,))
+
+    # 每隻貓每一週的月齡與活動係數，一次查表
+    week_index = np.arange(weeks)
+    age = np.asarray(age_months, dtype=np.float64)[..., None] + week_index * (DAYS_PER_WEEK / DAYS_PER_MONTH)
+    multiplier = get_activity_multiplier_batch(
+        age, np.asarray(is_neutered)[..., None], np.asarray(bcs)[..., None],
+        np.asarray(is_pregnant)[..., None], np.asarray(is_lactating)[..., None], rule_set,
+    )
+    multiplier = np.broadcast_to(multiplier, animals + (weeks,))
+
+    weights = np.empty(animals + (weeks + 1,))
+    ders = np.empty(animals + (weeks,))
+    weights[..., 0] = weight
+    scale = DAYS_PER_WEEK / energy_per_kg
+    for week in range(weeks):
+        current = weights[..., week]
+        der = calculate_rer_batch(current) * multiplier[..., week]
+        ders[..., week] = der
+        weights[..., week + 1] = np.maximum(current + (intake[..., week] - der) * scale, MIN_WEIGHT_KG)
+    return WeightTrajectory(np.arange(weeks + 1), weights, ders)
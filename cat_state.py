@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+
+from cat_core import CAT_INPUT_DEFAULTS
+
+# --- 每個 session 的狀態模型 ---
+# 取代原本散落在 st.session_state 的十幾個鍵：整個 session 只存一個 SessionModel。
+# 所有類別都使用 __slots__ (dataclass slots=True)，同時開著數千個 session 時每個佔用的記憶體較少；
+# 重新開始時直接換成新的 SessionModel()，不必逐一刪除鍵。
+# 本模組不依賴 Streamlit。
+
+
+@dataclass(slots=True)
+class CatProfile:
+    """第一步輸入的貓咪基本資料，預設值即表單的預設值。"""
+    weight: float = 4.0
+    age_years: int = 2
+    age_months: int = 0
+    is_neutered: bool = True
+    bcs: int = 5
+    is_pregnant: bool = False
+    is_lactating: bool = False
+    name: str = "" # 貓咪名字 (與 SessionModel.owner 組成歷史紀錄的鍵)；留白時不保存紀錄
+
+    @property
+    def total_age_months(self):
+        return self.age_years * 12 + self.age_months
+
+    def to_cat_info(self):
+        """轉成報告與 cat_core 使用的 cat_info dict。"""
+        return {
+            "weight": self.weight, "age_years": self.age_years, "age_months": self.age_months,
+            "is_neutered": "是" if self.is_neutered else "否", "is_neutered_bool": self.is_neutered,
+            "bcs": self.bcs, "is_pregnant": self.is_pregnant, "is_lactating": self.is_lactating
+        }
+
+
+@dataclass(slots=True)
+class FoodInputs:
+    """第二步的食物餵食量、熱量與價格，以及第三步的濕食熱量佔比。"""
+    dry_food_grams: float = CAT_INPUT_DEFAULTS["dry_food_grams"]
+    dry_food_kcal_per_1000g: float = CAT_INPUT_DEFAULTS["dry_food_kcal_per_1000g"]
+    dry_food_package_weight: float = CAT_INPUT_DEFAULTS["dry_food_package_weight"]
+    dry_food_package_price: float = CAT_INPUT_DEFAULTS["dry_food_package_price"]
+    wet_food_grams: float = CAT_INPUT_DEFAULTS["wet_food_grams"]
+    wet_food_kcal_per_100g: float = CAT_INPUT_DEFAULTS["wet_food_kcal_per_100g"]
+    wet_food_package_weight: float = CAT_INPUT_DEFAULTS["wet_food_package_weight"]
+    wet_food_package_price: float = CAT_INPUT_DEFAULTS["wet_food_package_price"]
+    wet_food_percentage: int = CAT_INPUT_DEFAULTS["wet_food_percentage"]
+    food_rows: list = None # 第三步「多種食物組合」表格內容，None 表示尚未編輯
+
+    @property
+    def has_kcal_info(self):
+        return self.dry_food_kcal_per_1000g != 0 or self.wet_food_kcal_per_100g != 0
+
+    def default_food_rows(self):
+        """多種食物表格的預設內容：第二步輸入的乾食與濕食。"""
+        return [
+            {"name": "乾乾", "kcal": self.dry_food_kcal_per_1000g, "per_grams": 1000.0,
+             "share": 100.0 - self.wet_food_percentage, "min_grams": None, "max_grams": None},
+            {"name": "主食罐", "kcal": self.wet_food_kcal_per_100g, "per_grams": 100.0,
+             "share": float(self.wet_food_percentage), "min_grams": None, "max_grams": None},
+        ]
+
+
+@dataclass(slots=True)
+class DerivedResults:
+    """各步驟的計算結果 (cat_core 回傳的 dict)，尚未計算時為 None。"""
+    der_info: dict = None
+    intake_analysis: dict = None
+    monthly_cost_info: dict = None
+    feeding_plan: dict = None
+    multi_food_plan: dict = None # cat_plan.solve_feeding_plan 的結果 (選用，不影響報告)
+    cheapest_plans: list = None # cat_diet_search.find_cheapest_plans 的結果 (選用，不影響報告)
+    uncertainty: dict = None # cat_uncertainty.simulate_uncertainty 的結果 (選用，不影響報告)
+
+    @property
+    def is_complete(self):
+        """產生第四步報告所需的結果是否都已算出。"""
+        return (self.der_info is not None and self.intake_analysis is not None
+                and self.monthly_cost_info is not None and self.feeding_plan is not None)
+
+
+@dataclass(slots=True)
+class SessionModel:
+    """一個使用者 session 的全部狀態。"""
+    current_step: int = 1
+    profile: CatProfile = field(default_factory=CatProfile)
+    food: FoodInputs = field(default_factory=FoodInputs)
+    results: DerivedResults = field(default_factory=DerivedResults)
+    household: object = None # cat_household.Household；第一次進入多貓家庭模式時才建立
+    owner: str = "" # 歷史紀錄的擁有者代碼 (網址的 ?owner=，見 cat_history.history_key)
+
+    @property
+    def der(self):
+        """目前的每日建議熱量；第一步尚未計算時為 None。"""
+        der_info = self.results.der_info
+        return der_info["der"] if der_info is not None else None
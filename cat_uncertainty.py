@@ -0,0 +1,104 @@
+import numpy as np
+
+from cat_core import DAYS_PER_MONTH
+
+# --- 不確定範圍 (蒙地卡羅模擬) ---
+# 第一步的 DER 與第三步的公克數都是單一估計值，實際上輸入本身就有誤差：
+#   - 體重：家用秤的誤差，以常態分布 N(體重, weight_sd_kg) 抽樣；
+#   - 熱量標示：包裝標示的熱量是估算值，乾食、濕食各自在 ±kcal_tolerance 內均勻抽樣；
+#   - 活動係數：個體差異，以對數常態分布 (中位數為查表值、標準差 multiplier_sd) 抽樣。
+# 一次抽 samples 組輸入 (預設 100 萬)，以 NumPy 向量運算算出 DER、每日乾濕食公克數與每月伙食費，
+# 再取百分位數作為範圍。公式與 cat_core.calculate_der / build_feeding_plan / calculate_monthly_cost 相同。
+# 速度 (100 萬組在 100 毫秒內，見 benchmarks/bench_uncertainty.py)：
+#   - 全程使用 float32，記憶體頻寬減半；百分位數只顯示到小數一位，精度足夠；
+#   - 百分位數不排序，而是以 16384 格的直方圖累積次數、在格內線性內插求得，
+#     誤差小於 (最大值 - 最小值) / 16384，比 np.percentile 的 partition 快數倍；
+#   - 體重與活動係數需要的兩組常態亂數以 Box-Muller 由同一組均勻亂數一次產生，
+#     比呼叫兩次 Generator.standard_normal 快一倍以上。
+# 使用固定的亂數種子，同樣的輸入每次重跑都得到同樣的範圍，介面上的數字不會跳動。
+
+DEFAULT_SAMPLES = 1_000_000
+PERCENTILES = (5, 25, 50, 75, 95)
+UNCERTAINTY_DEFAULTS = {"weight_sd_kg": 0.1, "kcal_tolerance": 0.10, "multiplier_sd": 0.15}
+UNCERTAINTY_LABELS = {"der": "每日建議熱量 (大卡)", "dry_grams": "乾食 (公克/天)",
+                      "wet_grams": "濕食 (公克/天)", "monthly_cost": "每月伙食費 (元)"}
+_MIN_WEIGHT_KG = 0.1
+_HISTOGRAM_BINS = 16384
+
+
+def _percentiles(values):
+    """以直方圖求 PERCENTILES 各百分位數 (與 np.percentile 的線性內插定義相同，差距在一格寬度內)。"""
+    low, high = float(values.min()), float(values.max())
+    if high == low:
+        return {q: low for q in PERCENTILES}
+    width = (high - low) / (_HISTOGRAM_BINS - 1)
+    index = ((values - np.float32(low)) * np.float32(1 / width)).astype(np.intp)
+    cumulative = np.cumsum(np.bincount(index, minlength=_HISTOGRAM_BINS))
+    result = {}
+    for q in PERCENTILES:
+        rank = q / 100 * (len(values) - 1)
+        k = min(int(np.searchsorted(cumulative, rank, side="right")), _HISTOGRAM_BINS - 1)
+        before = cumulative[k - 1] if k else 0
+        result[q] = float(low + (k + (rank - before) / (cumulative[k] - before)) * width)
+    return result
+
+
+def _standard_normal_pair(rng, samples):
+    """Box-Muller：回傳兩組互相獨立的標準常態亂數 (float32)。"""
+    radius = 1 - rng.random(samples, dtype=np.float32) # (0, 1]，避免 log(0)
+    np.log(radius, out=radius)
+    radius *= -2
+    np.sqrt(radius, out=radius)
+    angle = rng.random(samples, dtype=np.float32)
+    angle *= np.float32(2 * np.pi)
+    return radius * np.cos(angle), radius * np.sin(angle, out=angle)
+
+
+def simulate_uncertainty(weight_kg, multiplier, wet_food_percentage, dry_food_kcal_per_1000g, wet_food_kcal_per_100g,
+                         dry_food_package_weight=0.0, dry_food_package_price=0.0,
+                         wet_food_package_weight=0.0, wet_food_package_price=0.0,
+                         samples=DEFAULT_SAMPLES, weight_sd_kg=UNCERTAINTY_DEFAULTS["weight_sd_kg"],
+                         kcal_tolerance=UNCERTAINTY_DEFAULTS["kcal_tolerance"],
+                         multiplier_sd=UNCERTAINTY_DEFAULTS["multiplier_sd"], seed=0):
+    """
+    抽樣模擬輸入誤差，回傳 {"der", "dry_grams", "wet_grams", "monthly_cost"}，
+    每項為 {百分位數: 數值}，百分位數見 PERCENTILES。multiplier 為第一步查表得到的活動係數。
+    """
+    if weight_kg is None or weight_kg <= 0:
+        raise ValueError("體重必須大於零。")
+    if samples <= 0 or weight_sd_kg < 0 or multiplier_sd < 0 or not 0 <= kcal_tolerance < 1:
+        raise ValueError("模擬參數無效 (樣本數須大於 0，誤差不可為負數，熱量誤差須小於 100%)。")
+    rng = np.random.default_rng(seed)
+
+    # 體重小於下限的樣本 (只會出現在極端的秤重誤差設定) 以下限計
+    weight, factor = _standard_normal_pair(rng, samples)
+    weight *= np.float32(weight_sd_kg)
+    weight += np.float32(weight_kg)
+    np.maximum(weight, np.float32(_MIN_WEIGHT_KG), out=weight)
+    # RER = 70 x 體重^0.75；以 sqrt(w x sqrt(w)) 計算，比逐元素呼叫 pow() 快數倍
+    der = np.sqrt(weight * np.sqrt(weight))
+    factor *= np.float32(multiplier_sd)
+    der *= np.exp(factor, out=factor)
+    der *= np.float32(70 * multiplier)
+
+    wet_share = wet_food_percentage / 100.0
+    results = {"der": der}
+    costs = np.zeros(samples, dtype=np.float32)
+    for name, share, kcal_per_gram, package_weight, package_price in (
+        ("dry_grams", 1 - wet_share, dry_food_kcal_per_1000g / 1000.0, dry_food_package_weight, dry_food_package_price),
+        ("wet_grams", wet_share, wet_food_kcal_per_100g / 100.0, wet_food_package_weight, wet_food_package_price),
+    ):
+        if kcal_per_gram > 0 and share > 0:
+            # 實際熱量 = 標示熱量 x (1 + 誤差)，誤差在 ±kcal_tolerance 內均勻分布
+            true_kcal = rng.random(samples, dtype=np.float32)
+            true_kcal *= np.float32(2 * kcal_tolerance * kcal_per_gram)
+            true_kcal += np.float32((1 - kcal_tolerance) * kcal_per_gram)
+            grams = der * np.float32(share)
+            grams /= true_kcal
+        else:
+            grams = np.zeros(samples, dtype=np.float32) # 與 build_feeding_plan 相同：沒有熱量資訊或佔比為 0 時不餵
+        results[name] = grams
+        if package_weight > 0:
+            costs += grams * np.float32(package_price / package_weight)
+    results["monthly_cost"] = costs * np.float32(DAYS_PER_MONTH)
+    return {name: _percentiles(values) for name, values in results.items()}
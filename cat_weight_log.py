@@ -0,0 +1,187 @@
+import threading
+from collections import deque, namedtuple
+from datetime import date as date_type
+
+from cat_core import ENERGY_PER_KG
+from cat_history import get_history_store
+
+# --- 體重紀錄與趨勢 ---
+# 每隻貓每天的體重存在歷史紀錄 (cat_history，與第一步的計算結果同一列)。
+# 滾動統計 (7 天、28 天的平均體重、每週變化公斤數與每週變化百分比) 以增量方式維護：
+#   - 每個視窗保存視窗內的 (天數, 體重) 與 n、Σt、Σw、Σt²、Σtw 五個累加值；
+#   - 新增一筆時加進累加值，並從左端移除超出視窗的舊資料 (每筆資料只會被加入與移除各一次，攤銷 O(1))；
+#   - 平均 = Σw / n，每週變化 = 最小平方法斜率 x 7，完全不必重新掃描歷史；
+#   - 同一天再量一次時先移除最後一筆再加入新值，同樣是 O(1)。
+# t 以第一筆紀錄的日期為原點，數年的資料 Σt² 也不會大到損失浮點精度。
+# 只有補登比最後一筆更早的日期時，才需要從歷史紀錄重建 (O(n))。
+# 依趨勢給第一步的建議：健康的減重速度約為每週 0.5~2% 體重 (過快可能引起脂肪肝)。
+# 趨勢 (_trackers) 由本行程的所有 session 共用，以歷史紀錄的 cat_id 為鍵；介面傳入的是
+# cat_history.history_key(擁有者代碼, 名字)，不同使用者同名的貓不會混成同一條趨勢。
+
+ROLLING_WINDOWS = (7, 28) # 天
+TREND_WINDOW = 28 # 判斷趨勢與推估活動係數使用的視窗
+MIN_TREND_ENTRIES = 4 # 視窗內至少要有幾筆紀錄、且跨越至少 7 天才判斷趨勢
+MIN_TREND_SPAN_DAYS = 7
+SAFE_LOSS_PCT_PER_WEEK = (0.5, 2.0) # 建議的減重速度 (每週體重的百分比)
+
+WeightStats = namedtuple("WeightStats", ["days", "n", "span_days", "mean", "kg_per_week", "pct_per_week"])
+WeightStats.__doc__ = """一個滾動視窗的統計：視窗天數、筆數、第一筆到最後一筆相隔天數、平均體重、每週變化 (公斤、%)；資料不足時為 None。"""
+
+
+class RollingWindow:
+    """最近 days 天體重的滾動平均與線性迴歸斜率，新增一筆 O(1) (攤銷)。"""
+
+    __slots__ = ("days", "_entries", "_sum_t", "_sum_w", "_sum_tt", "_sum_tw")
+
+    def __init__(self, days):
+        self.days = days
+        self._entries = deque()
+        self._sum_t = self._sum_w = self._sum_tt = self._sum_tw = 0.0
+
+    def _add(self, t, weight, sign):
+        self._sum_t += sign * t
+        self._sum_w += sign * weight
+        self._sum_tt += sign * t * t
+        self._sum_tw += sign * t * weight
+
+    def push(self, t, weight):
+        self._entries.append((t, weight))
+        self._add(t, weight, 1)
+        while self._entries[0][0] <= t - self.days:
+            self._add(*self._entries.popleft(), -1)
+
+    def pop_last(self):
+        self._add(*self._entries.pop(), -1)
+
+    def stats(self):
+        n = len(self._entries)
+        if n == 0:
+            return WeightStats(self.days, 0, 0, None, None, None)
+        mean = self._sum_w / n
+        span = self._entries[-1][0] - self._entries[0][0]
+        if span == 0:
+            return WeightStats(self.days, n, 0, mean, None, None)
+        slope = (n * self._sum_tw - self._sum_t * self._sum_w) / (n * self._sum_tt - self._sum_t * self._sum_t) # 公斤/天
+        return WeightStats(self.days, n, span, mean, slope * 7, slope * 7 / mean * 100)
+
+
+class WeightTracker:
+    """一隻貓的體重趨勢 (各 ROLLING_WINDOWS 的滾動統計)，依日期順序加入體重。"""
+
+    __slots__ = ("windows", "count", "last_date", "last_weight", "_origin")
+
+    def __init__(self):
+        self.windows = {days: RollingWindow(days) for days in ROLLING_WINDOWS}
+        self.count = 0
+        self.last_date = None
+        self.last_weight = None
+        self._origin = None
+
+    def add(self, day, weight):
+        """加入一天的體重 (同一天再加入時取代)；日期早於最後一筆時拋出 ValueError。"""
+        if weight is None or weight <= 0:
+            raise ValueError("體重必須大於零。")
+        if self._origin is None:
+            self._origin = day.toordinal()
+        t = day.toordinal() - self._origin
+        if self.last_date is not None:
+            if day < self.last_date:
+                raise ValueError(f"日期 {day} 早於最後一筆紀錄 {self.last_date}。")
+            if day == self.last_date:
+                for window in self.windows.values():
+                    window.pop_last()
+                self.count -= 1
+        for window in self.windows.values():
+            window.push(t, weight)
+        self.count += 1
+        self.last_date, self.last_weight = day, weight
+
+    def stats(self, days=TREND_WINDOW):
+        return self.windows[days].stats()
+
+
+def _build_tracker(cat_id, store):
+    tracker = WeightTracker()
+    for entry in store.history(cat_id):
+        if entry.weight is not None:
+            tracker.add(date_type.fromisoformat(entry.date), entry.weight)
+    return tracker
+
+
+_trackers = {}
+_tracker_locks = {} # cat_id -> 這隻貓的鎖 (建立與更新趨勢時持有)
+_trackers_lock = threading.Lock() # 只保護 _tracker_locks，持有期間不做 I/O
+
+
+def _tracker_lock(cat_id):
+    with _trackers_lock:
+        return _tracker_locks.setdefault(cat_id, threading.Lock())
+
+
+def get_weight_tracker(cat_id, store=None):
+    """一隻貓的 WeightTracker (本行程共用；第一次使用時由歷史紀錄建立)。"""
+    tracker = _trackers.get(cat_id)
+    if tracker is None:
+        with _tracker_lock(cat_id): # 從歷史紀錄建立時只擋住同一隻貓
+            tracker = _trackers.get(cat_id)
+            if tracker is None:
+                tracker = _trackers[cat_id] = _build_tracker(cat_id, store or get_history_store())
+    return tracker
+
+
+def log_weight(cat_id, weight, day=None, store=None):
+    """記錄一天的體重 (存進歷史紀錄並更新趨勢)，回傳該貓的 WeightTracker；體重不大於零時拋出 ValueError。"""
+    if weight is None or not weight > 0:
+        raise ValueError("體重必須大於零。")
+    store = store or get_history_store()
+    day = day or date_type.today()
+    store.record(cat_id, day, weight=weight)
+    tracker = get_weight_tracker(cat_id, store)
+    with _tracker_lock(cat_id):
+        tracker = _trackers[cat_id]
+        if tracker.last_date is not None and day < tracker.last_date:
+            # 補登較早的日期：從歷史紀錄重建 (history() 已包含剛記錄、還沒寫進資料庫的體重)
+            tracker = _trackers[cat_id] = _build_tracker(cat_id, store)
+        else:
+            tracker.add(day, weight)
+    return tracker
+
+
+def has_trend(stats):
+    """視窗內的資料是否足以判斷趨勢。"""
+    return stats.n >= MIN_TREND_ENTRIES and stats.span_days >= MIN_TREND_SPAN_DAYS
+
+
+def implied_multiplier(stats, intake_kcal, rer):
+    """
+    由體重趨勢與每日攝取熱量反推實際的活動係數：
+    實際消耗 = 攝取 - 每日體重變化 x ENERGY_PER_KG，係數 = 實際消耗 / RER。資料不足時回傳 None。
+    """
+    if not has_trend(stats) or not intake_kcal or not rer:
+        return None
+    return (intake_kcal - stats.kg_per_week / 7 * ENERGY_PER_KG) / rer
+
+
+def trend_advice(stats, bcs):
+    """依體重趨勢與 BCS 給建議，回傳 [(等級, 訊息)]，等級為 success / info / warning；資料不足時回傳空清單。"""
+    if not has_trend(stats):
+        return []
+    pct = stats.pct_per_week
+    low, high = SAFE_LOSS_PCT_PER_WEEK
+    change = f"近 {stats.days} 天體重每週{'增加' if pct > 0 else '減少'} {abs(stats.kg_per_week):.2f} 公斤 ({abs(pct):.1f}%)"
+    if pct <= -high:
+        return [("warning", f"{change}，超過每週 {high:g}%。減重過快可能引起脂肪肝，請增加餵食量並諮詢獸醫師。")]
+    if bcs >= 6:
+        if pct > -low:
+            return [("info", f"{change}，但 BCS {bcs} 屬於過重。可將 BCS 維持在目前的評分或把餵食量減少約 10%，"
+                              f"目標是每週減少 {low:g}~{high:g}% 體重。")]
+        return [("success", f"{change}，在建議的減重速度 (每週 {low:g}~{high:g}%) 內，請維持目前的餵食量。")]
+    if bcs <= 4:
+        if pct < low:
+            return [("info", f"{change}，但 BCS {bcs} 偏瘦。可增加約 10% 餵食量，並確認 BCS 評分是否需要調整。")]
+        return [("success", f"{change}，偏瘦的貓咪體重正在回升。")]
+    if pct >= 1:
+        return [("info", f"{change}。BCS 雖為理想，但體重持續上升，請重新評估 BCS 或減少餵食量。")]
+    if pct <= -1:
+        return [("info", f"{change}。若不是刻意減重，建議諮詢獸醫師找出原因。")]
+    return [("success", f"{change}，體重穩定。")]
@@ -1,129 +1,14 @@
 import streamlit as st
 import io
 import os
-from datetime import datetime
+
+from cat_core import (analyze_intake, build_feeding_plan, calculate_der, calculate_monthly_cost,
+                      generate_text_report)
 
 # --- 常數定義 ---
 PAGE_TITLE = "Kuro家｜貓咪飲食計畫產生器"
 PAGE_ICON = "🐈‍"
 
-# --- 輔助函數 ---
-def calculate_rer(weight_kg):
-    """
-    計算貓咪的休息能量需求 (Resting Energy Requirement, RER)。
-    公式: RER = 70 * (體重kg ** 0.75)
-    """
-    if weight_kg <= 0:
-        st.error("體重必須大於零。")
-        return None
-    return 70 * (float(weight_kg)**0.75)
-
-def get_activity_multiplier(age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False):
-    """根據貓咪的年齡、絕育狀態、BCS、懷孕/哺乳狀態，返回活動係數。"""
-    multiplier = 1.0 # 預設值
-
-    if is_pregnant:
-        return 2.0 # 懷孕貓咪
-    if is_lactating:
-        return 3.0 # 哺乳貓咪 (簡化，可以根據幼貓數量調整)
-
-    if age_months < 4:
-        multiplier = 3.0
-    elif age_months >= 4 and age_months <= 12:
-        multiplier = 2.0
-    elif age_months > 12 and age_months < 84: # 假設1到7歲是成貓
-        if is_neutered:
-            multiplier = 1.2 # 絕育成貓
-            if bcs > 5: # 體重過重，目標減肥
-                multiplier = 0.8
-            elif bcs < 4: # 體重過輕，目標增重
-                multiplier = 1.6
-        else:
-            multiplier = 1.4 # 未絕育成貓
-            if bcs > 5: # 體重過重
-                multiplier = 1.0
-            elif bcs < 4: # 體重過輕
-                multiplier = 1.8
-    else: # age_months >= 84 (老年貓)
-        multiplier = 1.0
-        if bcs > 5: # 體重過重
-            multiplier = 0.8
-        elif bcs < 4: # 體重過輕
-            multiplier = 1.2
-
-    return multiplier
-
-def generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan): # 調整參數順序
-    report_text = f"--- 🐱 貓咪飲食報告 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n\n"
-
-    report_text += "📋 貓咪基本資料:\n"
-    report_text += f"- 體重: {cat_info.get('weight', 0):.2f} 公斤\n"
-    report_text += f"- 年齡: {cat_info.get('age_years', 0)} 歲 {cat_info.get('age_months', 0)} 個月\n"
-    report_text += f"- BCS: {cat_info.get('bcs', 0)} / 9\n"
-    report_text += f"- 絕育狀態: {cat_info.get('is_neutered', '未知')}\n"
-    if cat_info.get('is_pregnant', False):
-        report_text += f"- 生理狀態: 懷孕中\n"
-    if cat_info.get('is_lactating', False):
-        report_text += f"- 生理狀態: 哺乳中\n"
-    report_text += "--------------------------------------\n\n"
-
-    report_text += "📈 每日建議攝取:\n"
-    report_text += f"- 建議熱量 (DER): {der_info.get('der', 0):.2f} 大卡/天\n"
-    report_text += "--------------------------------------\n\n"
-
-    if intake_analysis:
-        report_text += "📊 目前飲食分析:\n"
-        report_text += f"- 從乾乾攝取的熱量: {intake_analysis.get('dry_food_kcal', 0):.2f} 大卡\n"
-        report_text += f"- 從濕食攝取的熱量: {intake_analysis.get('wet_food_kcal', 0):.2f} 大卡\n"
-        report_text += f"- 每日總攝取熱量: {intake_analysis.get('total_intake', 0):.2f} 大卡\n"
-        diff = intake_analysis.get('calorie_difference', 0)
-        report_text += f"- 與建議量差異: {diff:+.2f} 大卡\n"
-        if diff > 5:
-            report_text += "(攝取超標，建議調整)\n"
-        elif diff < -5:
-            report_text += "(攝取不足，建議調整)\n"
-        else:
-            report_text += "(熱量攝取接近建議值)\n"
-        report_text += "--------------------------------------\n\n"
-    else:
-        report_text += "📊 目前飲食分析: 尚未輸入餵食資訊，無法分析。\n"
-        report_text += "--------------------------------------\n\n"
-    
-    # 將伙食費顯示在飲食分析後面
-    if monthly_cost_info and monthly_cost_info.get('total_monthly_cost') is not None:
-        report_text += "💰 目前每月伙食費:\n" # 修改標題
-        report_text += f"- 每日乾食花費: {monthly_cost_info.get('daily_dry_cost', 0):.2f} 元\n"
-        report_text += f"- 每日濕食花費: {monthly_cost_info.get('daily_wet_cost', 0):.2f} 元\n"
-        report_text += f"- 每月總伙食費: {monthly_cost_info.get('total_monthly_cost', 0):.2f} 元 (以30天計)\n"
-        report_text += "--------------------------------------\n\n"
-    else:
-        report_text += "💰 目前每月伙食費: 尚未輸入食物價格資訊，無法估算。\n" # 修改標題
-        report_text += "--------------------------------------\n\n"
-
-    if feeding_plan and feeding_plan.get('target_kcal') is not None:
-        report_text += "🥗 建議餵食計畫:\n"
-        report_text += f"目標熱量約: {feeding_plan.get('target_kcal', 0):.0f} 大卡/天\n"
-        report_text += f"熱量佔比: {100 - feeding_plan.get('wet_food_percentage', 0)}% 乾食 / {feeding_plan.get('wet_food_percentage', 0)}% 濕食\n"
-        report_text += f"- 建議乾食餵食量: {feeding_plan.get('required_dry_grams', 0):.1f} 公克/天\n"
-        report_text += f"- 建議濕食餵食量: {feeding_plan.get('required_wet_grams', 0):.1f} 公克/天\n"
-        report_text += "--------------------------------------\n\n"
-    else:
-        report_text += "🥗 建議餵食計畫: 尚未計算或無有效食物熱量資訊。\n"
-        report_text += "--------------------------------------\n\n"
-    
-    report_text += "ℹ️ 免責聲明與重要提示：\n"
-    report_text += """
-此工具提供的熱量需求為估算值，基於常用公式和參考數據。
-每隻貓咪的代謝、活動量、健康狀況、品種及個別差異都可能影響實際熱量需求。
-在任何飲食調整（特別是增重或減重計畫）前，請務必諮詢您的獸醫或專業寵物營養師，
-獲取最精確的建議與指導，以確保貓咪的健康與安全。
-本工具不提供醫療診斷或治療建議。
-"""
-    report_text += "\n--------------------------------------"
-    report_text += "\nKuro家｜貓咪飲食計畫產生器 (僅供參考)"
-
-    return report_text
-
 # --- 主要應用程式邏輯 ---
 def main():
     st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout="centered")
@@ -186,10 +71,11 @@ def main():
             if age <= 0:
                 st.error("貓咪總年齡必須大於 0 個月，請重新輸入。")
             else:
-                rer = calculate_rer(weight_s1)
-                if rer is not None:
-                    multiplier = get_activity_multiplier(age, is_neutered_s1, bcs_s1, is_pregnant_s1, is_lactating_s1)
-                    der = rer * multiplier
+                der_info = calculate_der(weight_s1, age, is_neutered_s1, bcs_s1, is_pregnant_s1, is_lactating_s1)
+                if der_info is None:
+                    st.error("體重必須大於零。")
+                else:
+                    rer, multiplier, der = der_info["rer"], der_info["multiplier"], der_info["der"]
                     st.session_state.der = der
 
                     # 將輸入值保存到 session_state，供下次加載或報告使用
@@ -198,9 +84,7 @@ def main():
                         "is_neutered": is_neutered_s1_display, "is_neutered_bool": is_neutered_s1,
                         "bcs": bcs_s1, "is_pregnant": is_pregnant_s1, "is_lactating": is_lactating_s1
                     }
-                    st.session_state.der_info = {
-                        "rer": rer, "multiplier": multiplier, "der": der
-                    }
+                    st.session_state.der_info = der_info
 
                     st.subheader("📈 計算結果")
                     st.write(f"靜息能量需求 (RER): **{rer:.2f} 大卡/天**")
@@ -261,38 +145,21 @@ def main():
                 st.session_state.wet_food_package_price = wet_food_package_price_s2
 
                 der = st.session_state.der
-                dry_food_calories = (dry_food_grams_s2 / 1000.0) * dry_food_kcal_per_1000g_s2
-                wet_food_calories = (wet_food_grams_s2 / 100.0) * wet_food_kcal_per_100g_s2
-                total_intake = dry_food_calories + wet_food_calories
-                calorie_difference = total_intake - der
-
-                st.session_state.intake_analysis = {
-                    "dry_food_grams": dry_food_grams_s2, "dry_food_kcal": dry_food_calories,
-                    "wet_food_grams": wet_food_grams_s2, "wet_food_kcal": wet_food_calories,
-                    "total_intake": total_intake, "calorie_difference": calorie_difference
-                }
-                
+                intake_analysis = analyze_intake(der, dry_food_grams_s2, dry_food_kcal_per_1000g_s2,
+                                                 wet_food_grams_s2, wet_food_kcal_per_100g_s2)
+                st.session_state.intake_analysis = intake_analysis
+                dry_food_calories = intake_analysis["dry_food_kcal"]
+                wet_food_calories = intake_analysis["wet_food_kcal"]
+                total_intake = intake_analysis["total_intake"]
+                calorie_difference = intake_analysis["calorie_difference"]
+
                 # 計算伙食費
-                daily_dry_cost = 0.0
-                if dry_food_package_weight_s2 > 0:
-                    cost_per_gram_dry = dry_food_package_price_s2 / dry_food_package_weight_s2
-                    daily_dry_cost = dry_food_grams_s2 * cost_per_gram_dry
-                
-                daily_wet_cost = 0.0
-                if wet_food_package_weight_s2 > 0:
-                    cost_per_gram_wet = wet_food_package_price_s2 / wet_food_package_weight_s2
-                    daily_wet_cost = wet_food_grams_s2 * cost_per_gram_wet
-                
-                total_daily_cost = daily_dry_cost + daily_wet_cost
-                total_monthly_cost = total_daily_cost * 30 # 以30天計算每月
-
-                st.session_state.monthly_cost_info = {
-                    "daily_dry_cost": daily_dry_cost,
-                    "daily_wet_cost": daily_wet_cost,
-                    "total_daily_cost": total_daily_cost,
-                    "total_monthly_cost": total_monthly_cost
-                }
-                
+                monthly_cost_info = calculate_monthly_cost(dry_food_grams_s2, dry_food_package_weight_s2, dry_food_package_price_s2,
+                                                           wet_food_grams_s2, wet_food_package_weight_s2, wet_food_package_price_s2)
+                st.session_state.monthly_cost_info = monthly_cost_info
+                total_daily_cost = monthly_cost_info["total_daily_cost"]
+                total_monthly_cost = monthly_cost_info["total_monthly_cost"]
+
                 # 顯示當前分析結果
                 st.subheader("📊 熱量攝取分析")
                 st.write(f"從乾乾攝取的熱量: **{dry_food_calories:.2f} 大卡**")
@@ -357,23 +224,11 @@ def main():
             # 步驟3的「計算」按鈕
             if st.button("✅ 產生建議餵食量", key="generate_plan_s3_btn"):
                 der = st.session_state.der
-                target_wet_calories = der * (wet_food_percentage_s3 / 100.0)
-                target_dry_calories = der * ((100 - wet_food_percentage_s3) / 100.0)
-
-                required_dry_grams = 0.0
-                if st.session_state.dry_food_kcal_per_1000g > 0:
-                    required_dry_grams = (target_dry_calories / st.session_state.dry_food_kcal_per_1000g) * 1000.0
-                
-                required_wet_grams = 0.0
-                if st.session_state.wet_food_kcal_per_100g > 0:
-                    required_wet_grams = (target_wet_calories / st.session_state.wet_food_kcal_per_100g) * 100.0
-
-                st.session_state.feeding_plan = {
-                    "wet_food_percentage": wet_food_percentage_s3,
-                    "required_dry_grams": required_dry_grams,
-                    "required_wet_grams": required_wet_grams,
-                    "target_kcal": der
-                }
+                feeding_plan = build_feeding_plan(der, wet_food_percentage_s3,
+                                                  st.session_state.dry_food_kcal_per_1000g, st.session_state.wet_food_kcal_per_100g)
+                st.session_state.feeding_plan = feeding_plan
+                required_dry_grams = feeding_plan["required_dry_grams"]
+                required_wet_grams = feeding_plan["required_wet_grams"]
 
                 # 顯示當前計畫結果
                 st.subheader("🍽️ 每日建議餵食量")
@@ -473,7 +328,7 @@ def main():
             st.subheader("📄 一鍵複製飲食報告")
             
             # 調整 generate_text_report 的參數順序
-            full_report_text = generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan)
+            full_report_text = generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=PAGE_TITLE)
             
             st.code(full_report_text, language="text")            
             st.info("💡 點擊上方報告內容區塊右上角的複製按鈕，即可將報告內容複製到剪貼簿。")
@@ -1,497 +1,892 @@
 import streamlit as st
-import io
+import functools
+import importlib
 import os
-from datetime import datetime
+import pickle
+from datetime import date
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from cat_bcs_guide import GUIDE_DISPLAY_WIDTH, guide_data_uri
+from cat_cache import cached_text_report
+from cat_catalog import get_catalog, product_label
+from cat_core import analyze_intake, build_feeding_plan, calculate_der, calculate_monthly_cost
+from cat_diet_search import find_cheapest_plans
+from cat_history import get_history_store, history_key, is_owner_token, new_owner_token
+from cat_household import FOOD_KINDS, Household, HouseholdCat, foods_from_inputs
+from cat_images import bcs_class
+from cat_profiling import get_profiler, profiled, span
+from cat_state import CatProfile, SessionModel
+from cat_weight_log import (ROLLING_WINDOWS, TREND_WINDOW, get_weight_tracker, implied_multiplier, log_weight,
+                            trend_advice)
 
 # --- 常數定義 ---
 PAGE_TITLE = "Kuro家貓咪熱量計算機"
-PAGE_ICON = "🐈‍"
-
-# --- 輔助函數 ---
-def calculate_rer(weight_kg):
+PAGE_ICON = "🐈" # 必須是單一 emoji：多出零寬連接字元 (U+200D) 時 Streamlit 會當成圖片處理，匯入 NumPy 與 Pillow
+PROJECTION_WEEKS = 26 # 第二步體重變化預估的週數
+HISTORY_ROWS = 30 # 第一步顯示的歷史紀錄筆數
+WEIGHT_CHART_DAYS = 90 # 第一步體重圖表顯示的筆數
+ILLUSTRATION_WIDTH = 240 # 第四步插圖的顯示寬度 (像素)
+
+# --- 延遲匯入 ---
+# 冷啟動時第一步只需要 cat_core 等純 Python 模組；NumPy (體重預估、多種食物、不確定範圍，約 100 毫秒)
+# 與 Pillow (第四步的 PDF / PNG 下載，約 40 毫秒) 等到第一次用到該功能時才匯入，每個伺服器行程只匯入一次。
+# 函數以 lazy() 包裝，常數則在使用的面板內匯入。第一步不會載入的模組與匯入時間預算
+# 見 benchmarks/bench_import_time.py --check，冷啟動到第一步畫面的時間見 benchmarks/bench_cold_start.py。
+def lazy(module, name):
+    """回傳呼叫時才匯入 module 並呼叫其中 name 函數的包裝；匯入之後每次呼叫只多一次 sys.modules 查詢。"""
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+    call.__name__ = call.__qualname__ = name
+    return call
+
+simulate_weight = lazy("cat_simulate", "simulate_weight")
+simulate_uncertainty = lazy("cat_uncertainty", "simulate_uncertainty")
+foods_from_rows = lazy("cat_plan", "foods_from_rows")
+solve_feeding_plan = lazy("cat_plan", "solve_feeding_plan")
+
+# --- 效能紀錄 (除錯用) ---
+# 設定環境變數 KURO_PROFILE=1 (或 KURO_PROFILE_FILE) 時，記錄每次重跑中 session_state 初始化、
+# 各步驟的輸入區、各項計算與報告產生的時間，以及 widget 數與 session_state 大小 (見 cat_profiling.py)。
+# 網址加上 ?debug=1 會在側邊欄顯示除錯面板。未啟用時 profiled 直接回傳原函數，沒有任何開銷。
+calculate_der = profiled("calculate_der")(calculate_der)
+analyze_intake = profiled("analyze_intake")(analyze_intake)
+calculate_monthly_cost = profiled("calculate_monthly_cost")(calculate_monthly_cost)
+build_feeding_plan = profiled("build_feeding_plan")(build_feeding_plan)
+simulate_weight = profiled("simulate_weight")(simulate_weight)
+simulate_uncertainty = profiled("simulate_uncertainty")(simulate_uncertainty)
+find_cheapest_plans = profiled("find_cheapest_plans")(find_cheapest_plans)
+solve_feeding_plan = profiled("solve_feeding_plan")(solve_feeding_plan)
+cached_text_report = profiled("generate_text_report")(cached_text_report)
+DEBUG_RERUNS = 20 # 除錯面板顯示的重跑筆數
+
+def session_gauges():
+    """
+    每次重跑結束時記錄的數值：session id、本次重跑建立的 widget 數與 session_state 大小。
+    session 的資料都在 SessionModel 中，大小以它 pickle 後的位元組數計 (由 cat_profiling 的背景執行緒計算)；
+    widget 的值很小，逐一取出 (Streamlit 會重新解碼每個 widget 的值) 反而比 pickle 整個模型慢好幾倍。
+    session_state_bytes 是近似值：背景執行緒 pickle 的是同一個 SessionModel 物件，不是重跑結束時的複本，
+    若下一次重跑已開始修改它，量到的是修改中的大小，pickle 失敗時記為 None (cat_profiling._resolve)。
     """
-    計算貓咪的休息能量需求 (Resting Energy Requirement, RER)。
-    公式: RER = 70 * (體重kg ** 0.75)
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return {}
+    try:
+        widgets = len(ctx.shared.widget_ids_this_run.snapshot()) # Streamlit 內部 API，版本不同時可能不存在
+    except AttributeError:
+        widgets = None
+    model = st.session_state.get("model")
+    return {"session_id": ctx.session_id, "widgets": widgets,
+            "session_state_bytes": lambda: len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))}
+
+def debug_panel(profiler):
     """
-    if weight_kg <= 0:
-        st.error("體重必須大於零。")
-        return None
-    return 70 * (float(weight_kg)**0.75)
-
-def get_activity_multiplier(age_months, is_neutered, bcs, is_pregnant=False, is_lactating=False):
-    """根據貓咪的年齡、絕育狀態、BCS、懷孕/哺乳狀態，返回活動係數。"""
-    multiplier = 1.0 # 預設值
-
-    if is_pregnant:
-        return 2.0 # 懷孕貓咪
-    if is_lactating:
-        return 3.0 # 哺乳貓咪 (簡化，可以根據幼貓數量調整)
-
-    if age_months < 4:
-        multiplier = 3.0
-    elif age_months >= 4 and age_months <= 12:
-        multiplier = 2.0
-    elif age_months > 12 and age_months < 84: # 假設1到7歲是成貓
-        if is_neutered:
-            multiplier = 1.2 # 絕育成貓
-            if bcs > 5: # 體重過重，目標減肥
-                multiplier = 0.8
-            elif bcs < 4: # 體重過輕，目標增重
-                multiplier = 1.6
+    側邊欄的除錯面板：這個 session 最近幾次重跑的時間分布。面板本身顯示的是已結束、且背景執行緒已處理完的最近一次重跑
+    (不等待佇列，通常就是上一次重跑)。
+    """
+    ctx = get_script_run_ctx()
+    reruns = profiler.reruns(ctx.session_id if ctx else None)[-DEBUG_RERUNS:]
+    with st.sidebar.expander("🛠️ 效能除錯", expanded=True):
+        if not reruns:
+            st.caption("尚無紀錄。")
+            return
+        last = reruns[-1]
+        col1, col2 = st.columns(2)
+        col1.metric("上次重跑", f"{last.total_ms:.1f} ms", help=f"{last.kind} ({last.status})")
+        col2.metric("紀錄本身", f"{last.overhead_ms:.2f} ms")
+        col1.metric("widget 數", last.gauges.get("widgets") if last.gauges.get("widgets") is not None else "—")
+        state_bytes = last.gauges.get("session_state_bytes")
+        col2.metric("session_state", f"{state_bytes / 1024:.1f} KB" if state_bytes is not None else "—")
+        st.dataframe([{"區段": "　" * depth + name, "開始 (ms)": round(start, 2), "耗時 (ms)": round(ms, 2)}
+                      for name, depth, start, ms in last.spans], width="stretch", hide_index=True)
+        st.caption(f"最近 {len(reruns)} 次重跑")
+        st.dataframe([{"種類": r.kind, "狀態": r.status, "總計 (ms)": round(r.total_ms, 1),
+                       "widget 數": r.gauges.get("widgets"), "session_state (位元組)": r.gauges.get("session_state_bytes")}
+                      for r in reversed(reruns)], width="stretch", hide_index=True)
+
+if get_profiler() is not None:
+    get_profiler().set_collector(session_gauges)
+
+# --- 各步驟的輸入表單與結果區 ---
+# 每個步驟的輸入放在 st.form 中：編輯欄位不會觸發重跑，按下「計算」才一次送出。
+# 表單與結果區包在 st.fragment 裡，送出時只重跑該步驟的 fragment，不重跑整個 main()；
+# 換步驟的按鈕才以 st.rerun() 重跑整個應用程式。
+
+@st.fragment
+@profiled("der_panel")
+def der_panel():
+    """第一步：貓咪基本資料表單與 DER 計算結果。"""
+    model = st.session_state.model
+    # BCS 滑桿與體態示意圖放在表單外：拖動滑桿只重跑這個 fragment，示意圖立即換成對應的分級
+    # (在表單內要按下「計算」才會更新)；按下「計算」時使用滑桿目前的值
+    guide_text, guide_image = st.columns([3, 1])
+    bcs_s1 = guide_text.slider("身體狀況評分 BCS (1:過瘦, 5:理想, 9:過胖)", min_value=1, max_value=9, value=model.profile.bcs,
+                               key="bcs_s1")
+    guide_text.caption("""
+    - **1-3分 (過瘦):** 肋骨、脊椎易見且突出。
+    - **4-5分 (理想):** 肋骨可觸及，腰身明顯。
+    - **6-7分 (過重):** 肋骨不易觸及，腰身不明顯。
+    - **8-9分 (肥胖):** 肋骨難以觸及，腹部明顯下垂。
+    """)
+    # 目前 BCS 分級的體態示意圖 (cat_bcs_guide)：預先產生的 WebP，每個行程只讀一次；
+    # 以 <img> 直接顯示，不經 st.image (會匯入 NumPy、Pillow 並在每次重跑時處理圖片)
+    guide = guide_data_uri(bcs_s1)
+    if guide:
+        low, high, label = bcs_class(bcs_s1)[:3]
+        guide_image.markdown(f'<img src="{guide}" width="{GUIDE_DISPLAY_WIDTH}" alt="BCS {low}-{high} 分 ({label})">',
+                             unsafe_allow_html=True)
+
+    with st.form("der_form_s1", border=False):
+        # 使用 session_state 中的值作為預設值
+        name_s1 = st.text_input("貓咪名字 (選填，填寫後會保存每天的計算紀錄)", value=model.profile.name, key="name_s1",
+                                help="紀錄屬於目前的網址 (含 ?owner=)：請把網址加入書籤，或分享給要一起記錄的家人；"
+                                     "其他人輸入相同的名字看不到你的紀錄。")
+        weight_s1 = st.number_input("體重 (公斤)", min_value=0.1, max_value=20.0, value=model.profile.weight, step=0.1, key="weight_s1")
+        age_years_s1 = st.number_input("年齡 (歲)", min_value=0, max_value=25, value=model.profile.age_years, step=1, key="age_years_s1")
+        age_months_s1 = st.number_input("年齡 (個月)", min_value=0, max_value=11, value=model.profile.age_months, step=1, key="age_months_s1")
+
+        is_neutered_s1_options = ('是', '否')
+        is_neutered_s1_index = 0 if model.profile.is_neutered else 1
+        is_neutered_s1_display = st.radio("是否已絕育？", is_neutered_s1_options, index=is_neutered_s1_index, key="is_neutered_s1")
+        is_neutered_s1 = (is_neutered_s1_display == '是')
+
+        is_pregnant_s1 = st.checkbox("母貓是否懷孕？", value=model.profile.is_pregnant, key="is_pregnant_s1")
+        is_lactating_s1 = st.checkbox("母貓是否哺乳中？", value=model.profile.is_lactating, key="is_lactating_s1")
+
+        st.markdown("---")
+
+        # 步驟1的「計算」按鈕
+        submitted = st.form_submit_button("✅ 計算貓咪每日所需熱量", key="calc_der_s1_btn")
+
+    if submitted:
+        age = age_years_s1 * 12 + age_months_s1
+
+        if age <= 0:
+            st.error("貓咪總年齡必須大於 0 個月，請重新輸入。")
         else:
-            multiplier = 1.4 # 未絕育成貓
-            if bcs > 5: # 體重過重
-                multiplier = 1.0
-            elif bcs < 4: # 體重過輕
-                multiplier = 1.8
-    else: # age_months >= 84 (老年貓)
-        multiplier = 1.0
-        if bcs > 5: # 體重過重
-            multiplier = 0.8
-        elif bcs < 4: # 體重過輕
-            multiplier = 1.2
-
-    return multiplier
-
-def generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan): # 調整參數順序
-    report_text = f"--- 🐱 貓咪飲食報告 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---\n\n"
-
-    report_text += "📋 貓咪基本資料:\n"
-    report_text += f"- 體重: {cat_info.get('weight', 0):.2f} 公斤\n"
-    report_text += f"- 年齡: {cat_info.get('age_years', 0)} 歲 {cat_info.get('age_months', 0)} 個月\n"
-    report_text += f"- BCS: {cat_info.get('bcs', 0)} / 9\n"
-    report_text += f"- 絕育狀態: {cat_info.get('is_neutered', '未知')}\n"
-    if cat_info.get('is_pregnant', False):
-        report_text += f"- 生理狀態: 懷孕中\n"
-    if cat_info.get('is_lactating', False):
-        report_text += f"- 生理狀態: 哺乳中\n"
-    report_text += "--------------------------------------\n\n"
-
-    report_text += "📈 每日建議攝取:\n"
-    report_text += f"- 建議熱量 (DER): {der_info.get('der', 0):.2f} 大卡/天\n"
-    report_text += "--------------------------------------\n\n"
-
-    if intake_analysis:
-        report_text += "📊 目前飲食分析:\n"
-        report_text += f"- 從乾乾攝取的熱量: {intake_analysis.get('dry_food_kcal', 0):.2f} 大卡\n"
-        report_text += f"- 從濕食攝取的熱量: {intake_analysis.get('wet_food_kcal', 0):.2f} 大卡\n"
-        report_text += f"- 每日總攝取熱量: {intake_analysis.get('total_intake', 0):.2f} 大卡\n"
-        diff = intake_analysis.get('calorie_difference', 0)
-        report_text += f"- 與建議量差異: {diff:+.2f} 大卡\n"
-        if diff > 5:
-            report_text += "(攝取超標，建議調整)\n"
-        elif diff < -5:
-            report_text += "(攝取不足，建議調整)\n"
+            der_info = calculate_der(weight_s1, age, is_neutered_s1, bcs_s1, is_pregnant_s1, is_lactating_s1)
+            if der_info is None:
+                st.error("體重必須大於零。")
+            else:
+                rer, multiplier, der = der_info["rer"], der_info["multiplier"], der_info["der"]
+
+                # 將輸入值保存到 session 狀態，供下次加載或報告使用
+                model.profile = CatProfile(weight_s1, age_years_s1, age_months_s1, is_neutered_s1,
+                                           bcs_s1, is_pregnant_s1, is_lactating_s1, name_s1.strip())
+                model.results.der_info = der_info
+                save_history(model, bcs=bcs_s1, der=der)
+                if model.profile.name:
+                    log_weight(cat_key(model), weight_s1) # 體重同時是今天的體重紀錄
+
+                st.subheader("📈 計算結果")
+                st.write(f"靜息能量需求 (RER): **{rer:.2f} 大卡/天**")
+                st.write(f"活動係數: **{multiplier:.1f}**")
+                st.success(f"每日建議熱量 (DER): **{der:.2f} 大卡/天**")
+                st.info("DER 是根據貓咪的詳細身體狀況估算的每日建議攝取熱量。")
+
+    history_panel(model)
+    weight_log_panel(model)
+
+    # 只有在DER計算成功後才顯示「下一步」按鈕
+    if model.der is not None:
+        st.markdown("---")
+        if st.button("➡️ 進入第二步：分析目前飲食", key="next_step1_btn"):
+            model.current_step = 2
+            st.rerun()
+
+def cat_key(model):
+    """目前這隻貓在歷史紀錄中的 cat_id (擁有者代碼 + 名字)；沒有填寫名字時為 None。"""
+    return history_key(model.owner, model.profile.name) if model.profile.name else None
+
+def save_history(model, **values):
+    """有填寫貓咪名字時，把這一步的結果存進歷史紀錄 (背景批次寫入，不拖慢重跑)。"""
+    if model.profile.name:
+        get_history_store().record(cat_key(model), **values)
+
+@profiled("history_panel")
+def history_panel(model):
+    """第一步：這隻貓最近的計算紀錄。"""
+    if not model.profile.name:
+        return
+    entries = get_history_store().latest(cat_key(model), HISTORY_ROWS)
+    if not entries:
+        return
+    with st.expander(f"📜 {model.profile.name} 的歷史紀錄 (最近 {HISTORY_ROWS} 筆)"):
+        st.dataframe(
+            [{"日期": e.date, "體重 (公斤)": e.weight, "BCS": e.bcs, "DER (大卡)": e.der, "每日攝取 (大卡)": e.total_intake,
+              "每月伙食費 (元)": e.monthly_cost, "濕食佔比 (%)": e.wet_food_percentage,
+              "建議乾食 (公克)": e.required_dry_grams, "建議濕食 (公克)": e.required_wet_grams} for e in reversed(entries)],
+            width="stretch", hide_index=True,
+            column_config={name: st.column_config.NumberColumn(format="%.1f")
+                           for name in ("DER (大卡)", "每日攝取 (大卡)", "每月伙食費 (元)", "建議乾食 (公克)", "建議濕食 (公克)")},
+        )
+
+@profiled("weight_log_panel")
+def weight_log_panel(model):
+    """第一步：每天的體重紀錄、滾動平均與每週變化，並依趨勢建議調整 BCS 或餵食量。"""
+    name = model.profile.name
+    if not name:
+        return
+    with st.expander(f"⚖️ {name} 的體重紀錄與趨勢"):
+        with st.form("weight_log_form_s1", border=False):
+            col1, col2 = st.columns(2)
+            weigh_date = col1.date_input("日期", value=date.today(), max_value=date.today(), key="weigh_date_s1")
+            weigh_weight = col2.number_input("體重 (公斤)", min_value=0.1, max_value=20.0, value=model.profile.weight,
+                                             step=0.05, key="weigh_weight_s1")
+            submitted = st.form_submit_button("➕ 記錄體重", key="log_weight_s1_btn")
+        key = cat_key(model)
+        tracker = log_weight(key, weigh_weight, weigh_date) if submitted else get_weight_tracker(key)
+        if tracker.count == 0:
+            st.caption("尚無體重紀錄。")
+            return
+
+        cols = st.columns(len(ROLLING_WINDOWS))
+        for col, days in zip(cols, ROLLING_WINDOWS):
+            stats = tracker.stats(days)
+            delta = None if stats.kg_per_week is None else f"{stats.kg_per_week:+.2f} 公斤/週 ({stats.pct_per_week:+.1f}%)"
+            col.metric(f"近 {days} 天平均體重", f"{stats.mean:.2f} 公斤", delta=delta, delta_color="off")
+
+        entries = get_history_store().latest(key, WEIGHT_CHART_DAYS)
+        st.line_chart({"體重 (公斤)": {e.date: e.weight for e in entries if e.weight is not None}},
+                      x_label="日期", y_label="體重 (公斤)")
+
+        trend = tracker.stats(TREND_WINDOW)
+        for level, message in trend_advice(trend, model.profile.bcs):
+            getattr(st, level)(message)
+        # 有攝取熱量時 (本次第二步或最近的紀錄)，由體重變化反推實際的活動係數
+        der_info = model.results.der_info
+        intake = model.results.intake_analysis["total_intake"] if model.results.intake_analysis else next(
+            (e.total_intake for e in reversed(entries) if e.total_intake), None)
+        multiplier = implied_multiplier(trend, intake, der_info["rer"]) if der_info else None
+        if multiplier is not None:
+            st.info(f"依近 {TREND_WINDOW} 天的體重變化與每日攝取 {intake:.0f} 大卡推算，"
+                    f"實際的活動係數約為 **{multiplier:.2f}** (目前使用 {der_info['multiplier']:.1f})。")
+
+def fill_from_product(product):
+    """把商品資料庫選到的商品帶入第二步的熱量、包裝重量與價格欄位 (按鈕的 on_click，在重跑前執行)。"""
+    food = st.session_state.model.food
+    if product.kind == "dry":
+        food.dry_food_kcal_per_1000g = product.kcal_per_1000g
+        food.dry_food_package_weight = product.package_weight
+        food.dry_food_package_price = product.package_price
+        fields = {"dry_kcal_s2": food.dry_food_kcal_per_1000g, "dry_package_weight_s2": food.dry_food_package_weight,
+                  "dry_package_price_s2": food.dry_food_package_price}
+    else:
+        food.wet_food_kcal_per_100g = product.kcal_per_1000g / 10
+        food.wet_food_package_weight = product.package_weight
+        food.wet_food_package_price = product.package_price
+        fields = {"wet_kcal_s2": food.wet_food_kcal_per_100g, "wet_package_weight_s2": food.wet_food_package_weight,
+                  "wet_package_price_s2": food.wet_food_package_price}
+    # 表單欄位的值存在各自的 widget key 中，直接改寫才會更新畫面上的數字
+    for key, value in fields.items():
+        st.session_state[key] = value
+
+def catalog_search():
+    """第二步：搜尋商品資料庫，選擇後自動帶入食物資訊。"""
+    with st.expander("🔎 從商品資料庫帶入食物資訊"):
+        query = st.text_input("搜尋品牌或品名", key="catalog_query_s2", placeholder="例如：雞肉、Shiro、主食罐")
+        if not query.strip():
+            return
+        products = get_catalog().search(query)
+        if not products:
+            st.caption("找不到符合的商品，請換個關鍵字或直接在下方手動輸入。")
+            return
+        product = st.selectbox("選擇商品", products, format_func=product_label, key="catalog_pick_s2")
+        target = "乾食" if product.kind == "dry" else "濕食"
+        st.button(f"📥 帶入{target}欄位", key="catalog_fill_s2_btn", on_click=fill_from_product, args=(product,))
+
+def fill_from_plan(plan):
+    """把省錢方案的商品與每日公克數帶入第二步欄位 (按鈕的 on_click)。"""
+    food = st.session_state.model.food
+    for product in (plan["dry"], plan["wet"]):
+        if product is not None:
+            fill_from_product(product)
+    food.dry_food_grams = round(plan["required_dry_grams"], 1)
+    food.wet_food_grams = round(plan["required_wet_grams"], 1)
+    st.session_state["dry_grams_s2"] = food.dry_food_grams
+    st.session_state["wet_grams_s2"] = food.wet_food_grams
+
+def cheapest_plan_search(model):
+    """第二步：在商品資料庫中找出滿足每日建議熱量、每月伙食費最低的組合。"""
+    catalog = get_catalog()
+    with st.expander("💡 找出最省錢的飲食組合"):
+        with st.form("cheapest_plan_form_s2", border=False):
+            min_wet_percentage = st.slider("濕食熱量佔比至少 (%)", min_value=0, max_value=100,
+                                           value=model.food.wet_food_percentage, step=5, key="cheapest_min_wet_s2")
+            brands = st.multiselect("只考慮這些品牌 (不選表示全部)", catalog.brands(), key="cheapest_brands_s2")
+            top_n = st.number_input("列出方案數", min_value=1, max_value=20, value=5, step=1, key="cheapest_top_n_s2")
+            submitted = st.form_submit_button("🔍 搜尋", key="cheapest_plan_s2_btn")
+
+        if submitted:
+            model.results.cheapest_plans = find_cheapest_plans(model.der, catalog.products(brands=brands),
+                                                               min_wet_percentage, top_n)
+        plans = model.results.cheapest_plans
+        if plans is None:
+            return
+        if not plans:
+            st.caption("找不到符合條件的商品組合。")
+            return
+        st.dataframe(
+            [{"乾食": f"{p['dry'].brand} {p['dry'].name}" if p["dry"] else "—",
+              "濕食": f"{p['wet'].brand} {p['wet'].name}" if p["wet"] else "—",
+              "濕食佔比 (%)": round(p["wet_food_percentage"], 1),
+              "乾食 (公克/天)": round(p["required_dry_grams"], 1), "濕食 (公克/天)": round(p["required_wet_grams"], 1),
+              "每月伙食費 (元)": round(p["total_monthly_cost"], 1)} for p in plans],
+            width="stretch", hide_index=True,
+        )
+        choice = st.selectbox("套用方案", range(len(plans)), key="cheapest_pick_s2",
+                              format_func=lambda i: f"第 {i + 1} 名：每月 {plans[i]['total_monthly_cost']:.0f} 元")
+        st.button("📥 帶入第二步欄位", key="cheapest_fill_s2_btn", on_click=fill_from_plan, args=(plans[choice],))
+
+@st.fragment
+@profiled("intake_panel")
+def intake_panel():
+    """第二步：目前飲食與價格表單、熱量攝取分析與每月伙食費。"""
+    model = st.session_state.model
+    food = model.food
+    # 表單欄位的初始值來自 session 狀態模型；以 widget key 設定 (而非 value=)，商品資料庫才能改寫欄位
+    for key, value in (("dry_grams_s2", food.dry_food_grams), ("dry_kcal_s2", food.dry_food_kcal_per_1000g),
+                       ("dry_package_weight_s2", food.dry_food_package_weight), ("dry_package_price_s2", food.dry_food_package_price),
+                       ("wet_grams_s2", food.wet_food_grams), ("wet_kcal_s2", food.wet_food_kcal_per_100g),
+                       ("wet_package_weight_s2", food.wet_food_package_weight), ("wet_package_price_s2", food.wet_food_package_price)):
+        if key not in st.session_state:
+            st.session_state[key] = value
+    catalog_search()
+    with st.form("intake_form_s2", border=False):
+        st.subheader("乾食 (乾乾) 資訊")
+        dry_food_grams_s2 = st.number_input("每日總餵食量 (公克)", key="dry_grams_s2", min_value=0.0, step=1.0)
+        dry_food_kcal_per_1000g_s2 = st.number_input("每 1000 公克的熱量 (大卡)", key="dry_kcal_s2", min_value=0.0, step=10.0)
+        dry_food_package_weight_s2 = st.number_input("每包乾食重量 (公克)", key="dry_package_weight_s2", min_value=0.0, step=10.0)
+        dry_food_package_price_s2 = st.number_input("每包乾食價格 (元)", key="dry_package_price_s2", min_value=0.0, step=1.0)
+
+        st.subheader("濕食 (主食罐/副食罐) 資訊")
+        wet_food_grams_s2 = st.number_input("每日總餵食量 (公克)", key="wet_grams_s2", min_value=0.0, step=1.0)
+        wet_food_kcal_per_100g_s2 = st.number_input("每 100 公克的熱量 (大卡)", key="wet_kcal_s2", min_value=0.0, step=1.0)
+        wet_food_package_weight_s2 = st.number_input("每罐/包濕食重量 (公克)", key="wet_package_weight_s2", min_value=0.0, step=1.0)
+        wet_food_package_price_s2 = st.number_input("每罐/包濕食價格 (元)", key="wet_package_price_s2", min_value=0.0, step=1.0)
+
+        st.markdown("---")
+
+        # 步驟2的「計算」按鈕
+        submitted = st.form_submit_button("✅ 計算實際攝取與費用", key="analyze_intake_s2_btn")
+
+    if submitted:
+        if model.der is None:
+            st.error("⚠️ 請先返回第一步，完成每日建議熱量的計算！")
+        elif dry_food_kcal_per_1000g_s2 == 0 and wet_food_kcal_per_100g_s2 == 0:
+            st.warning("⚠️ 請輸入至少一種食物的熱量資訊，才能進行分析。")
         else:
-            report_text += "(熱量攝取接近建議值)\n"
-        report_text += "--------------------------------------\n\n"
+            # 將輸入值保存到 session 狀態
+            food.dry_food_grams = dry_food_grams_s2
+            food.wet_food_grams = wet_food_grams_s2
+            food.dry_food_kcal_per_1000g = dry_food_kcal_per_1000g_s2
+            food.wet_food_kcal_per_100g = wet_food_kcal_per_100g_s2
+            food.dry_food_package_weight = dry_food_package_weight_s2
+            food.dry_food_package_price = dry_food_package_price_s2
+            food.wet_food_package_weight = wet_food_package_weight_s2
+            food.wet_food_package_price = wet_food_package_price_s2
+
+            der = model.der
+            intake_analysis = analyze_intake(der, dry_food_grams_s2, dry_food_kcal_per_1000g_s2,
+                                             wet_food_grams_s2, wet_food_kcal_per_100g_s2)
+            model.results.intake_analysis = intake_analysis
+            dry_food_calories = intake_analysis["dry_food_kcal"]
+            wet_food_calories = intake_analysis["wet_food_kcal"]
+            total_intake = intake_analysis["total_intake"]
+            calorie_difference = intake_analysis["calorie_difference"]
+
+            # 計算伙食費
+            monthly_cost_info = calculate_monthly_cost(dry_food_grams_s2, dry_food_package_weight_s2, dry_food_package_price_s2,
+                                                       wet_food_grams_s2, wet_food_package_weight_s2, wet_food_package_price_s2)
+            model.results.monthly_cost_info = monthly_cost_info
+            save_history(model, total_intake=intake_analysis["total_intake"],
+                         daily_cost=monthly_cost_info["total_daily_cost"], monthly_cost=monthly_cost_info["total_monthly_cost"])
+            total_daily_cost = monthly_cost_info["total_daily_cost"]
+            total_monthly_cost = monthly_cost_info["total_monthly_cost"]
+
+            # 顯示當前分析結果
+            st.subheader("📊 熱量攝取分析")
+            st.write(f"從乾乾攝取的熱量: **{dry_food_calories:.2f} 大卡**")
+            st.write(f"從濕食攝取的熱量: **{wet_food_calories:.2f} 大卡**")
+            st.success(f"貓咪每日總攝取熱量: **{total_intake:.2f} 大卡**")
+
+            st.markdown("---")
+            st.subheader("⚖️ 攝取與建議量比較")
+            st.write(f"每日建議攝取 (DER): **{der:.2f} 大卡**")
+            st.write(f"每日實際攝取: **{total_intake:.2f} 大卡**")
+
+            if calorie_difference > 5:
+                st.warning(f"❗️ **攝取超標**：比建議值多了 **{calorie_difference:.2f} 大卡**。")
+                st.info("提醒：長期熱量超標可能導致肥胖及相關健康問題，請考慮與獸醫師討論並調整餵食量。")
+            elif calorie_difference < -5:
+                st.warning(f"❗️ **攝取不足**：比建議值少了 **{-calorie_difference:.2f} 大卡**。")
+                st.info("提醒：長期熱量不足可能影響貓咪健康與活力，請確認是否需要增加餵食量或更換更高熱量的食物。")
+            else:
+                st.balloons()
+                st.success("🎉 **完美！** 貓咪的熱量攝取與建議值非常接近！")
+
+            # 以目前的攝取量推估未來體重 (DER 隨體重與年齡逐週重算)
+            profile = model.profile
+            trajectory = simulate_weight(profile.weight, total_intake, profile.total_age_months, profile.is_neutered, profile.bcs,
+                                         profile.is_pregnant, profile.is_lactating, weeks=PROJECTION_WEEKS)
+            st.markdown("---")
+            st.subheader("📉 體重變化預估")
+            st.line_chart({"體重 (公斤)": trajectory.weight[0]}, x_label="週", y_label="體重 (公斤)")
+            st.caption(f"若持續目前的餵食量，{PROJECTION_WEEKS} 週後體重約為 **{trajectory.weight[0, -1]:.2f} 公斤** "
+                       "(以每增減 1 公斤約 7700 大卡的能量平衡粗估，僅供參考)。")
+
+            st.markdown("---")
+            st.subheader("💰 目前每月伙食費") # 修改標題
+            col_cost1, col_cost2 = st.columns(2)
+            col_cost1.metric("每日總花費", f"{total_daily_cost:.2f} 元")
+            col_cost2.metric("每月總花費", f"{total_monthly_cost:.2f} 元")
+            st.caption("此為根據您輸入的食物價格和每日餵食量估算，以30天計。")
+
+    if model.der is not None:
+        cheapest_plan_search(model)
+
+    # 只有在分析完成後才顯示「下一步」按鈕
+    if model.results.intake_analysis is not None:
+        st.markdown("---")
+        if st.button("➡️ 進入第三步：規劃飲食建議", key="next_step2_btn"):
+            model.current_step = 3
+            st.rerun()
+
+@st.fragment
+@profiled("plan_panel")
+def plan_panel():
+    """第三步：乾濕食熱量比例表單與建議餵食量。"""
+    model = st.session_state.model
+    with st.form("plan_form_s3", border=False):
+        st.subheader("設定乾濕食熱量比例")
+        wet_food_percentage_s3 = st.slider(
+            "希望「濕食」提供的熱量佔每日總熱量的百分比 (%)",
+            min_value=0, max_value=100, value=model.food.wet_food_percentage, step=5, key="wet_food_percentage_s3"
+        )
+
+        st.markdown("---")
+        # 步驟3的「計算」按鈕
+        submitted = st.form_submit_button("✅ 產生建議餵食量", key="generate_plan_s3_btn")
+
+    if submitted:
+        model.food.wet_food_percentage = wet_food_percentage_s3 # 保存值
+        der = model.der
+        feeding_plan = build_feeding_plan(der, wet_food_percentage_s3,
+                                          model.food.dry_food_kcal_per_1000g, model.food.wet_food_kcal_per_100g)
+        model.results.feeding_plan = feeding_plan
+        save_history(model, wet_food_percentage=wet_food_percentage_s3,
+                     required_dry_grams=feeding_plan["required_dry_grams"], required_wet_grams=feeding_plan["required_wet_grams"])
+        required_dry_grams = feeding_plan["required_dry_grams"]
+        required_wet_grams = feeding_plan["required_wet_grams"]
+
+        # 顯示當前計畫結果
+        st.subheader("🍽️ 每日建議餵食量")
+        st.info(f"為了達到每日 **{der:.2f} 大卡** 的目標：")
+
+        col_rec_1, col_rec_2 = st.columns(2)
+        with col_rec_1:
+            st.metric(label="乾食 (乾乾)", value=f"{required_dry_grams:.1f} 公克")
+        with col_rec_2:
+            st.metric(label="濕食 (主食罐)", value=f"{required_wet_grams:.1f} 公克")
+
+        st.caption(f"此建議是基於 {100-wet_food_percentage_s3}% 乾食與 {wet_food_percentage_s3}% 濕食的熱量佔比所計算。請在 1-2 週內密切觀察貓咪的體重和身體狀況，並與您的獸醫師討論，視情況微調餵食量。")
+
+    multi_food_panel(model)
+    uncertainty_panel(model)
+
+    # 只有在計畫生成後才顯示「下一步」按鈕
+    if model.results.feeding_plan is not None:
+        st.markdown("---")
+        if st.button("➡️ 進入第四步：飲食報告總覽", key="next_step3_btn"):
+            model.current_step = 4
+            st.rerun()
+
+def multi_food_panel(model):
+    """第三步 (進階)：同時搭配多種食物，依熱量佔比與公克數上下限求出各自的餵食量。"""
+    with st.expander("🧮 多種食物組合 (進階)"):
+        st.caption("可新增多列食物 (乾乾、主食罐、餐包 ...)。熱量佔比留白的食物平分剩餘佔比；"
+                   "最少/最多公克數留白表示不限，計算時會在限制內盡量接近指定佔比。")
+        with st.form("multi_food_form_s3", border=False):
+            edited_rows = st.data_editor(
+                model.food.food_rows or model.food.default_food_rows(),
+                num_rows="dynamic", width="stretch", key="multi_food_table_s3",
+                column_config={
+                    "name": st.column_config.TextColumn("名稱"),
+                    "kcal": st.column_config.NumberColumn("熱量 (大卡)", min_value=0.0, format="%.1f"),
+                    "per_grams": st.column_config.SelectboxColumn("每 (公克)", options=[100.0, 1000.0], default=100.0),
+                    "share": st.column_config.NumberColumn("熱量佔比 (%)", min_value=0.0, max_value=100.0, format="%.1f"),
+                    "min_grams": st.column_config.NumberColumn("最少 (公克/天)", min_value=0.0, format="%.1f"),
+                    "max_grams": st.column_config.NumberColumn("最多 (公克/天)", min_value=0.0, format="%.1f"),
+                },
+            )
+            submitted = st.form_submit_button("🧮 計算多種食物餵食量", key="solve_multi_food_s3_btn")
+
+        if submitted:
+            model.food.food_rows = edited_rows
+            try:
+                model.results.multi_food_plan = solve_feeding_plan(model.der, foods_from_rows(edited_rows))
+            except ValueError as e:
+                model.results.multi_food_plan = None
+                st.error(f"❌ {e}")
+
+        plan = model.results.multi_food_plan
+        if plan is not None:
+            st.info(f"為了達到每日 **{plan['target_kcal']:.2f} 大卡** 的目標：")
+            st.dataframe(
+                [{"名稱": f["name"], "每日公克數": round(f["grams"], 1), "熱量 (大卡)": round(f["kcal"], 1),
+                  "熱量佔比 (%)": round(f["share"], 1)} for f in plan["foods"]],
+                width="stretch", hide_index=True,
+            )
+
+def uncertainty_panel(model):
+    """第三步 (進階)：抽樣模擬體重、熱量標示與活動係數的誤差，列出 DER、餵食量與伙食費的可能範圍。"""
+    from cat_uncertainty import PERCENTILES, UNCERTAINTY_DEFAULTS, UNCERTAINTY_LABELS
+
+    with st.expander("🎲 不確定範圍 (蒙地卡羅模擬)"):
+        st.caption("體重秤、包裝上的熱量標示與活動係數都有誤差。這裡抽樣 100 萬組可能的輸入，"
+                   "列出每日建議熱量、乾濕食公克數與每月伙食費的百分位數。")
+        with st.form("uncertainty_form_s3", border=False):
+            weight_sd_kg = st.number_input("體重秤誤差 (標準差，公斤)", min_value=0.0, max_value=1.0,
+                                           value=UNCERTAINTY_DEFAULTS["weight_sd_kg"], step=0.05, key="weight_sd_s3")
+            kcal_tolerance = st.slider("熱量標示誤差 (±%)", min_value=0, max_value=30,
+                                       value=round(UNCERTAINTY_DEFAULTS["kcal_tolerance"] * 100), step=1, key="kcal_tolerance_s3")
+            multiplier_sd = st.slider("活動係數的個體差異 (標準差，%)", min_value=0, max_value=40,
+                                      value=round(UNCERTAINTY_DEFAULTS["multiplier_sd"] * 100), step=1, key="multiplier_sd_s3")
+            submitted = st.form_submit_button("🎲 模擬不確定範圍", key="simulate_uncertainty_s3_btn")
+
+        if submitted:
+            food = model.food
+            model.results.uncertainty = simulate_uncertainty(
+                model.profile.weight, model.results.der_info["multiplier"], food.wet_food_percentage,
+                food.dry_food_kcal_per_1000g, food.wet_food_kcal_per_100g,
+                food.dry_food_package_weight, food.dry_food_package_price,
+                food.wet_food_package_weight, food.wet_food_package_price,
+                weight_sd_kg=weight_sd_kg, kcal_tolerance=kcal_tolerance / 100, multiplier_sd=multiplier_sd / 100,
+            )
+
+        bands = model.results.uncertainty
+        if bands is not None:
+            st.dataframe(
+                [{"項目": UNCERTAINTY_LABELS[name], **{f"P{q}": round(values[q], 1) for q in PERCENTILES}}
+                 for name, values in bands.items()],
+                width="stretch", hide_index=True,
+            )
+            st.caption(f"P50 為中位數；90% 的模擬結果落在 P{PERCENTILES[0]} 與 P{PERCENTILES[-1]} 之間。"
+                       "以目前設定的乾濕食熱量比例計算。")
+
+@profiled("report_panel")
+def report_panel(model):
+    """第四步：報告總覽、可複製的文字報告與 PDF / PNG 下載。"""
+    from cat_export import EXPORT_MIME_TYPES, export_report
+    from cat_images import ImageGenerationError, illustration_pending, report_illustration
+
+    cat_info = model.profile.to_cat_info()
+    der_info = model.results.der_info
+    intake_analysis = model.results.intake_analysis
+    feeding_plan = model.results.feeding_plan
+    monthly_cost_info = model.results.monthly_cost_info
+
+    st.subheader("🐾 貓咪基本資料")
+    col1, col2 = st.columns(2)
+    col1.metric("體重", f"{cat_info.get('weight', 0):.2f} 公斤")
+    col1.metric("BCS", f"{cat_info.get('bcs', 0)} / 9")
+    col2.metric("年齡", f"{cat_info.get('age_years', 0)} 歲 {cat_info.get('age_months', 0)} 個月")
+    col2.metric("絕育狀態", cat_info.get('is_neutered', '未知'))
+    if cat_info.get('is_pregnant', False) or cat_info.get('is_lactating', False):
+        special_status = []
+        if cat_info.get('is_pregnant', False): special_status.append("懷孕")
+        if cat_info.get('is_lactating', False): special_status.append("哺乳")
+        st.write(f"**特殊生理狀態**: {', '.join(special_status)}")
+
+    # 依 BCS 分級與年齡階段的插圖 (cat_images)：只顯示已在磁碟上的圖；還沒有時在背景產生 (需要 API 金鑰)，不等待
+    try:
+        with span("report_illustration"):
+            illustration = report_illustration(model.profile.bcs, model.profile.total_age_months, ILLUSTRATION_WIDTH)
+    except ImageGenerationError as e:
+        illustration = None
+        st.caption(f"⚠️ 插圖產生失敗：{e}")
+    if illustration is None and illustration_pending(model.profile.bcs, model.profile.total_age_months):
+        st.caption("🎨 插圖產生中，稍後重新整理即可看到。")
+    if illustration is not None:
+        st.image(illustration, width=ILLUSTRATION_WIDTH)
+    st.markdown("---")
+
+    st.subheader("📈 每日建議攝取")
+    st.metric("建議熱量 (DER)", f"{der_info.get('der', 0):.2f} 大卡/天")
+    st.markdown("---")
+
+    st.subheader("📊 目前飲食分析")
+    col1, col2 = st.columns(2)
+    col1.metric("每日總攝取熱量", f"{intake_analysis.get('total_intake', 0):.2f} 大卡")
+    diff = intake_analysis.get('calorie_difference', 0)
+    if diff > 5:
+        delta_text = f"+{diff:.2f} 大卡"
+        delta_color = "inverse"
+    elif diff < -5:
+        delta_text = f"{diff:.2f} 大卡"
+        delta_color = "off"
     else:
-        report_text += "📊 目前飲食分析: 尚未輸入餵食資訊，無法分析。\n"
-        report_text += "--------------------------------------\n\n"
-    
+        delta_text = "接近理想"
+        delta_color = "normal"
+    col2.metric("與建議量差異", f"{diff:+.2f} 大卡", delta=delta_text, delta_color=delta_color)
+    st.markdown("---")
+
     # 將伙食費顯示在飲食分析後面
-    if monthly_cost_info and monthly_cost_info.get('total_monthly_cost') is not None:
-        report_text += "💰 目前每月伙食費:\n" # 修改標題
-        report_text += f"- 每日乾食花費: {monthly_cost_info.get('daily_dry_cost', 0):.2f} 元\n"
-        report_text += f"- 每日濕食花費: {monthly_cost_info.get('daily_wet_cost', 0):.2f} 元\n"
-        report_text += f"- 每月總伙食費: {monthly_cost_info.get('total_monthly_cost', 0):.2f} 元 (以30天計)\n"
-        report_text += "--------------------------------------\n\n"
-    else:
-        report_text += "💰 目前每月伙食費: 尚未輸入食物價格資訊，無法估算。\n" # 修改標題
-        report_text += "--------------------------------------\n\n"
-
-    if feeding_plan and feeding_plan.get('target_kcal') is not None:
-        report_text += "🥗 建議餵食計畫:\n"
-        report_text += f"目標熱量約: {feeding_plan.get('target_kcal', 0):.0f} 大卡/天\n"
-        report_text += f"熱量佔比: {100 - feeding_plan.get('wet_food_percentage', 0)}% 乾食 / {feeding_plan.get('wet_food_percentage', 0)}% 濕食\n"
-        report_text += f"- 建議乾食餵食量: {feeding_plan.get('required_dry_grams', 0):.1f} 公克/天\n"
-        report_text += f"- 建議濕食餵食量: {feeding_plan.get('required_wet_grams', 0):.1f} 公克/天\n"
-        report_text += "--------------------------------------\n\n"
-    else:
-        report_text += "🥗 建議餵食計畫: 尚未計算或無有效食物熱量資訊。\n"
-        report_text += "--------------------------------------\n\n"
+    if monthly_cost_info:
+        st.subheader("💰 目前每月伙食費") # 修改標題
+        col1, col2 = st.columns(2)
+        col1.metric("每日總花費", f"{monthly_cost_info.get('total_daily_cost', 0):.2f} 元")
+        col2.metric("每月總花費", f"{monthly_cost_info.get('total_monthly_cost', 0):.2f} 元")
+        st.caption("此為根據您輸入的食物價格和每日餵食量估算，以30天計。")
+        st.markdown("---")
+
+    st.subheader("🥗 建議餵食計畫")
+    st.write(f"基於 **{100 - feeding_plan.get('wet_food_percentage', 0)}% 乾食** 與 **{feeding_plan.get('wet_food_percentage', 0)}% 濕食** 的熱量佔比，目標約 **{feeding_plan.get('target_kcal', 0):.0f} 大卡/天**")
+    col1, col2 = st.columns(2)
+    col1.metric("建議乾食餵食量", f"{feeding_plan.get('required_dry_grams', 0):.1f} 公克/天")
+    col2.metric("建議濕食餵食量", f"{feeding_plan.get('required_wet_grams', 0):.1f} 公克/天")
+    st.caption("此為粗略建議，請諮詢獸醫獲取精確處方糧或食譜。")
+    st.markdown("---")
+    
+    st.subheader("📄 一鍵複製飲食報告")
+    
+    # 調整 generate_text_report 的參數順序
+    full_report_text = cached_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan, app_name=PAGE_TITLE)
     
-    report_text += "ℹ️ 免責聲明與重要提示：\n"
-    report_text += """
-此工具提供的熱量需求為估算值，基於常用公式和參考數據。
-每隻貓咪的代謝、活動量、健康狀況、品種及個別差異都可能影響實際熱量需求。
-在任何飲食調整（特別是增重或減重計畫）前，請務必諮詢您的獸醫或專業寵物營養師，
-獲取最精確的建議與指導，以確保貓咪的健康與安全。
-本工具不提供醫療診斷或治療建議。
-"""
-    report_text += "\n--------------------------------------"
-    report_text += "\nKuro家貓咪熱量計算機 (僅供參考)"
-
-    return report_text
+    st.code(full_report_text, language="text")
+    
+    st.info("💡 點擊上方報告內容區塊右上角的複製按鈕，即可將報告內容複製到剪貼簿。")
+
+    # 下載 PDF / PNG：data 傳入函數，只有按下按鈕時才產生檔案，重跑第四步時不會排版
+    report_args = (cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan)
+    col1, col2 = st.columns(2)
+    for col, fmt, label in ((col1, "pdf", "📥 下載 PDF 報告"), (col2, "png", "🖼️ 下載 PNG 圖片")):
+        col.download_button(
+            label, data=functools.partial(export_report, *report_args, fmt=fmt, app_name=PAGE_TITLE),
+            file_name=f"kuro_cat_report.{fmt}", mime=EXPORT_MIME_TYPES[fmt],
+            on_click="ignore", key=f"download_{fmt}_s4", width="stretch"
+        )
+    
+    st.markdown("---")
+    # 重設按鈕
+    if st.button("🔄 重新開始計算", key="reset_app"):
+        # 換成全新的狀態模型即完成重設 (回到第一步、清除所有輸入與結果)
+        # 多貓家庭的資料與歷史紀錄的擁有者代碼保留
+        st.session_state.model = SessionModel(household=model.household, owner=model.owner)
+        st.rerun()
+
+# --- 多貓家庭模式 ---
+# 每隻貓一個表單、共用食物清單一個表單；送出時只重算被修改的那隻貓 (或有吃被修改食物的貓)，
+# 其餘貓咪沿用 Household 快取的結果，家庭合計直接加總 (見 cat_household.py)。
+
+FOOD_KIND_LABELS = {"dry": "乾食", "wet": "濕食"}
+
+def household_foods_panel(household):
+    """共用食物清單：可新增、修改或刪除食物，按下更新後只重算有吃被修改食物的貓。"""
+    with st.expander("🥫 共用食物清單", expanded=not household.cats):
+        st.caption("全家共用的乾乾與罐頭。乾食熱量通常標示每 1000 公克，濕食每 100 公克。")
+        with st.form("hh_foods_form", border=False):
+            edited_rows = st.data_editor(
+                household.food_rows(), num_rows="dynamic", width="stretch",
+                # 新增或刪除食物後換一個 key，避免表格把已套用的新增列再套用一次
+                key="hh_foods_table_" + "-".join(map(str, household.foods)),
+                column_order=("name", "kind", "kcal", "per_grams", "package_weight", "package_price"),
+                column_config={
+                    "name": st.column_config.TextColumn("名稱"),
+                    "kind": st.column_config.SelectboxColumn("種類", options=FOOD_KINDS, default="dry",
+                                                             format_func=FOOD_KIND_LABELS.get),
+                    "kcal": st.column_config.NumberColumn("熱量 (大卡)", min_value=0.0, format="%.1f"),
+                    "per_grams": st.column_config.SelectboxColumn("每 (公克)", options=[100.0, 1000.0]),
+                    "package_weight": st.column_config.NumberColumn("包裝重量 (公克)", min_value=0.0, format="%.0f"),
+                    "package_price": st.column_config.NumberColumn("包裝價格 (元)", min_value=0.0, format="%.0f"),
+                },
+            )
+            submitted = st.form_submit_button("💾 更新食物清單", key="hh_save_foods_btn")
+        if submitted:
+            try:
+                household.apply_food_rows(edited_rows)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                st.rerun()
+
+def household_cat_panel(household, cat_id):
+    """一隻貓的資料表單；按下更新只重算這隻貓。"""
+    cat = household.cats[cat_id]
+    profile = cat.profile
+    food_label = lambda food_id: "不吃" if food_id is None else household.foods[food_id].name
+    with st.expander(f"🐱 {cat.name}"):
+        with st.form(f"hh_cat_form_{cat_id}", border=False):
+            name = st.text_input("名字", value=cat.name, key=f"hh_name_{cat_id}")
+            col1, col2, col3 = st.columns(3)
+            weight = col1.number_input("體重 (公斤)", min_value=0.1, max_value=20.0, value=profile.weight, step=0.1, key=f"hh_weight_{cat_id}")
+            age_years = col2.number_input("年齡 (歲)", min_value=0, max_value=25, value=profile.age_years, step=1, key=f"hh_age_years_{cat_id}")
+            age_months = col3.number_input("年齡 (個月)", min_value=0, max_value=11, value=profile.age_months, step=1, key=f"hh_age_months_{cat_id}")
+            is_neutered = st.radio("是否已絕育？", ("是", "否"), index=0 if profile.is_neutered else 1,
+                                   horizontal=True, key=f"hh_neutered_{cat_id}") == "是"
+            bcs = st.slider("身體狀況評分 BCS (1:過瘦, 5:理想, 9:過胖)", min_value=1, max_value=9, value=profile.bcs, key=f"hh_bcs_{cat_id}")
+            col1, col2 = st.columns(2)
+            is_pregnant = col1.checkbox("母貓是否懷孕？", value=profile.is_pregnant, key=f"hh_pregnant_{cat_id}")
+            is_lactating = col2.checkbox("母貓是否哺乳中？", value=profile.is_lactating, key=f"hh_lactating_{cat_id}")
+
+            dry_options = [None] + [food_id for food_id, f in household.foods.items() if f.kind == "dry"]
+            wet_options = [None] + [food_id for food_id, f in household.foods.items() if f.kind == "wet"]
+            col1, col2 = st.columns(2)
+            dry_food_id = col1.selectbox("乾食", dry_options, format_func=food_label, key=f"hh_dry_{cat_id}",
+                                         index=dry_options.index(cat.dry_food_id) if cat.dry_food_id in dry_options else 0)
+            wet_food_id = col2.selectbox("濕食", wet_options, format_func=food_label, key=f"hh_wet_{cat_id}",
+                                         index=wet_options.index(cat.wet_food_id) if cat.wet_food_id in wet_options else 0)
+            wet_food_percentage = st.slider("濕食提供的熱量佔比 (%)", min_value=0, max_value=100,
+                                            value=cat.wet_food_percentage, step=5, key=f"hh_wet_pct_{cat_id}")
+            submitted = st.form_submit_button("💾 更新這隻貓", key=f"hh_save_cat_{cat_id}")
+
+        if submitted:
+            if age_years * 12 + age_months <= 0:
+                st.error("貓咪總年齡必須大於 0 個月，請重新輸入。")
+            else:
+                household.update_cat(cat_id, HouseholdCat(
+                    name.strip() or cat.name,
+                    CatProfile(weight, age_years, age_months, is_neutered, bcs, is_pregnant, is_lactating),
+                    dry_food_id, wet_food_id, wet_food_percentage,
+                ))
+                st.rerun()
+        if st.button("🗑️ 移除這隻貓", key=f"hh_remove_cat_{cat_id}"):
+            household.remove_cat(cat_id)
+            st.rerun()
+
+def household_totals_panel(household):
+    """家庭合計：各貓的建議餵食量與伙食費、每種食物的用量 (由快取結果加總)。"""
+    totals = household.totals()
+    st.subheader("💰 家庭每月伙食費")
+    col1, col2 = st.columns(2)
+    col1.metric("每日總花費", f"{totals['total_daily_cost']:.2f} 元")
+    col2.metric("每月總花費", f"{totals['total_monthly_cost']:.2f} 元")
+    st.dataframe(
+        [{"貓咪": c["name"], "DER (大卡/天)": round(c["der"], 1) if c["der"] is not None else None,
+          "乾食 (公克/天)": round(c["dry_grams"], 1), "濕食 (公克/天)": round(c["wet_grams"], 1),
+          "每日花費 (元)": round(c["daily_cost"], 2), "每月花費 (元)": round(c["monthly_cost"], 2)} for c in totals["cats"]],
+        width="stretch", hide_index=True,
+    )
+    st.subheader("🥫 共用食物用量")
+    st.dataframe(
+        [{"食物": f["name"], "全家每日用量 (公克)": round(f["daily_grams"], 1),
+          "一包可吃 (天)": round(f["days_per_package"], 1) if f["days_per_package"] is not None else None,
+          "每月花費 (元)": round(f["monthly_cost"], 2)} for f in totals["foods"]],
+        width="stretch", hide_index=True,
+    )
+    st.caption("此為根據各貓的建議餵食量與食物價格估算，以30天計。")
+
+@profiled("household_page")
+def household_page(model):
+    """多貓家庭模式：每隻貓各自的資料，共用食物清單，合計伙食費。"""
+    if model.household is None:
+        # 第一次進入時，以目前單貓模式的資料建立第一隻貓與共用食物
+        household = Household(foods_from_inputs(model.food))
+        dry_food_id, wet_food_id = household.foods
+        household.add_cat(HouseholdCat("貓咪 1", model.profile, dry_food_id, wet_food_id, model.food.wet_food_percentage))
+        model.household = household
+    household = model.household
+
+    st.header("🏠 多貓家庭")
+    st.info("為每隻貓填寫基本資料與吃的食物，全家共用同一份食物清單；修改一隻貓只會重新計算那一隻。")
+    household_foods_panel(household)
+    for cat_id in list(household.cats):
+        household_cat_panel(household, cat_id)
+    if st.button("➕ 新增一隻貓", key="hh_add_cat_btn"):
+        first_dry = next((food_id for food_id, f in household.foods.items() if f.kind == "dry"), None)
+        first_wet = next((food_id for food_id, f in household.foods.items() if f.kind == "wet"), None)
+        household.add_cat(HouseholdCat(f"貓咪 {len(household.cats) + 1}", CatProfile(), first_dry, first_wet))
+        st.rerun()
+    st.markdown("---")
+    household_totals_panel(household)
+
+def session_owner():
+    """歷史紀錄的擁有者代碼：沿用網址的 ?owner=，沒有 (或格式不對) 時產生新的並寫回網址。"""
+    owner = st.query_params.get("owner")
+    if not is_owner_token(owner):
+        owner = new_owner_token()
+        st.query_params["owner"] = owner
+    return owner
 
 # --- 主要應用程式邏輯 ---
+@profiled("main")
 def main():
     st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout="centered")
     st.title(f"{PAGE_ICON} {PAGE_TITLE}")
 
-    # 初始化 session_state
-    if 'current_step' not in st.session_state:
-        st.session_state.current_step = 1
-    # 初始化所有可能需要跨步驟存儲的變量
-    if 'der' not in st.session_state: st.session_state.der = None
-    if 'cat_info' not in st.session_state: st.session_state.cat_info = {}
-    if 'der_info' not in st.session_state: st.session_state.der_info = {}
-    if 'intake_analysis' not in st.session_state: st.session_state.intake_analysis = None
-    if 'feeding_plan' not in st.session_state: st.session_state.feeding_plan = None
-    if 'monthly_cost_info' not in st.session_state: st.session_state.monthly_cost_info = None
-    
-    # 預設值，確保每次頁面重載時都有值
-    if 'dry_food_grams' not in st.session_state: st.session_state.dry_food_grams = 0.0
-    if 'wet_food_grams' not in st.session_state: st.session_state.wet_food_grams = 0.0
-    if 'dry_food_kcal_per_1000g' not in st.session_state: st.session_state.dry_food_kcal_per_1000g = 3600.0
-    if 'wet_food_kcal_per_100g' not in st.session_state: st.session_state.wet_food_kcal_per_100g = 100.0
-    if 'dry_food_package_weight' not in st.session_state: st.session_state.dry_food_package_weight = 1500.0
-    if 'dry_food_package_price' not in st.session_state: st.session_state.dry_food_package_price = 300.0
-    if 'wet_food_package_weight' not in st.session_state: st.session_state.wet_food_package_weight = 80.0
-    if 'wet_food_package_price' not in st.session_state: st.session_state.wet_food_package_price = 30.0
-    if 'wet_food_percentage_plan' not in st.session_state: st.session_state.wet_food_percentage_plan = 50
+    # 初始化 session_state：整個 session 的狀態都放在一個 SessionModel 中 (見 cat_state.py)
+    with span("session_state"):
+        if 'model' not in st.session_state:
+            st.session_state.model = SessionModel(owner=session_owner())
+        model = st.session_state.model
+
+    profiler = get_profiler()
+    if profiler is not None and st.query_params.get("debug") == "1":
+        debug_panel(profiler)
+
+    if st.sidebar.toggle("🏠 多貓家庭模式", key="household_mode", help="一次管理多隻貓，共用同一批乾乾與罐頭"):
+        household_page(model)
+        return
 
     # --- 步驟 1: 計算建議熱量 ---
-    if st.session_state.current_step == 1:
+    if model.current_step == 1:
         st.header("🐾 第一步：計算建議熱量")
         st.info("請輸入貓咪的詳細基本資料，以估算其每日所需的熱量。")
 
-        # 使用 session_state 中的值作為預設值
-        weight_s1 = st.number_input("體重 (公斤)", min_value=0.1, max_value=20.0, value=st.session_state.cat_info.get('weight', 4.0), step=0.1, key="weight_s1")
-        age_years_s1 = st.number_input("年齡 (歲)", min_value=0, max_value=25, value=st.session_state.cat_info.get('age_years', 2), step=1, key="age_years_s1")
-        age_months_s1 = st.number_input("年齡 (個月)", min_value=0, max_value=11, value=st.session_state.cat_info.get('age_months', 0), step=1, key="age_months_s1")
-        
-        is_neutered_s1_options = ('是', '否')
-        is_neutered_s1_index = is_neutered_s1_options.index(st.session_state.cat_info.get('is_neutered', '是'))
-        is_neutered_s1_display = st.radio("是否已絕育？", is_neutered_s1_options, index=is_neutered_s1_index, key="is_neutered_s1")
-        is_neutered_s1 = (is_neutered_s1_display == '是')
-        
-        bcs_s1 = st.slider("身體狀況評分 BCS (1:過瘦, 5:理想, 9:過胖)", min_value=1, max_value=9, value=st.session_state.cat_info.get('bcs', 5), key="bcs_s1")
-        st.caption("""
-        - **1-3分 (過瘦):** 肋骨、脊椎易見且突出。
-        - **4-5分 (理想):** 肋骨可觸及，腰身明顯。
-        - **6-7分 (過重):** 肋骨不易觸及，腰身不明顯。
-        - **8-9分 (肥胖):** 肋骨難以觸及，腹部明顯下垂。
-        """)
-        is_pregnant_s1 = st.checkbox("母貓是否懷孕？", value=st.session_state.cat_info.get('is_pregnant', False), key="is_pregnant_s1")
-        is_lactating_s1 = st.checkbox("母貓是否哺乳中？", value=st.session_state.cat_info.get('is_lactating', False), key="is_lactating_s1")
-        
-        st.markdown("---")
-        
-        # 步驟1的「計算」按鈕
-        if st.button("✅ 計算貓咪每日所需熱量", key="calc_der_s1_btn"):
-            age = age_years_s1 * 12 + age_months_s1
-
-            if age <= 0:
-                st.error("貓咪總年齡必須大於 0 個月，請重新輸入。")
-            else:
-                rer = calculate_rer(weight_s1)
-                if rer is not None:
-                    multiplier = get_activity_multiplier(age, is_neutered_s1, bcs_s1, is_pregnant_s1, is_lactating_s1)
-                    der = rer * multiplier
-                    st.session_state.der = der
-
-                    # 將輸入值保存到 session_state，供下次加載或報告使用
-                    st.session_state.cat_info = {
-                        "weight": weight_s1, "age_years": age_years_s1, "age_months": age_months_s1,
-                        "is_neutered": is_neutered_s1_display, "is_neutered_bool": is_neutered_s1,
-                        "bcs": bcs_s1, "is_pregnant": is_pregnant_s1, "is_lactating": is_lactating_s1
-                    }
-                    st.session_state.der_info = {
-                        "rer": rer, "multiplier": multiplier, "der": der
-                    }
-
-                    st.subheader("📈 計算結果")
-                    st.write(f"靜息能量需求 (RER): **{rer:.2f} 大卡/天**")
-                    st.write(f"活動係數: **{multiplier:.1f}**")
-                    st.success(f"每日建議熱量 (DER): **{der:.2f} 大卡/天**")
-                    st.info("DER 是根據貓咪的詳細身體狀況估算的每日建議攝取熱量。")
-        
-        # 只有在DER計算成功後才顯示「下一步」按鈕
-        if st.session_state.der is not None:
-            st.markdown("---")
-            if st.button("➡️ 進入第二步：分析目前飲食", key="next_step1_btn"):
-                st.session_state.current_step = 2
-                st.rerun()
+        der_panel()
 
     # --- 步驟 2: 分析目前飲食 ---
-    elif st.session_state.current_step == 2:
+    elif model.current_step == 2:
         st.header("📊 第二步：分析目前飲食")
         st.info("請輸入貓咪目前每日的餵食量、食物熱量與價格資訊。")
 
         # 返回上一步按鈕
         if st.button("◀️ 返回第一步", key="back_to_step1"):
-            st.session_state.current_step = 1
+            model.current_step = 1
             st.rerun()
         
         st.markdown("---") # 分隔線
         
-        st.subheader("乾食 (乾乾) 資訊")
-        # 使用 session_state 中的值作為預設值
-        dry_food_grams_s2 = st.number_input("每日總餵食量 (公克)", key="dry_grams_s2", min_value=0.0, step=1.0, value=st.session_state.dry_food_grams)
-        dry_food_kcal_per_1000g_s2 = st.number_input("每 1000 公克的熱量 (大卡)", key="dry_kcal_s2", min_value=0.0, value=st.session_state.dry_food_kcal_per_1000g, step=10.0)
-        dry_food_package_weight_s2 = st.number_input("每包乾食重量 (公克)", key="dry_package_weight_s2", min_value=0.0, value=st.session_state.dry_food_package_weight, step=10.0)
-        dry_food_package_price_s2 = st.number_input("每包乾食價格 (元)", key="dry_package_price_s2", min_value=0.0, value=st.session_state.dry_food_package_price, step=1.0)
-
-        st.subheader("濕食 (主食罐/副食罐) 資訊")
-        # 使用 session_state 中的值作為預設值
-        wet_food_grams_s2 = st.number_input("每日總餵食量 (公克)", key="wet_grams_s2", min_value=0.0, step=1.0, value=st.session_state.wet_food_grams)
-        wet_food_kcal_per_100g_s2 = st.number_input("每 100 公克的熱量 (大卡)", key="wet_kcal_s2", min_value=0.0, value=st.session_state.wet_food_kcal_per_100g, step=1.0)
-        wet_food_package_weight_s2 = st.number_input("每罐/包濕食重量 (公克)", key="wet_package_weight_s2", min_value=0.0, value=st.session_state.wet_food_package_weight, step=1.0)
-        wet_food_package_price_s2 = st.number_input("每罐/包濕食價格 (元)", key="wet_package_price_s2", min_value=0.0, value=st.session_state.wet_food_package_price, step=1.0)
-
-        st.markdown("---")
-        
-        # 步驟2的「計算」按鈕
-        if st.button("✅ 計算實際攝取與費用", key="analyze_intake_s2_btn"):
-            if st.session_state.der is None:
-                st.error("⚠️ 請先返回第一步，完成每日建議熱量的計算！")
-            elif dry_food_kcal_per_1000g_s2 == 0 and wet_food_kcal_per_100g_s2 == 0:
-                st.warning("⚠️ 請輸入至少一種食物的熱量資訊，才能進行分析。")
-            else:
-                # 將輸入值保存到 session_state
-                st.session_state.dry_food_grams = dry_food_grams_s2
-                st.session_state.wet_food_grams = wet_food_grams_s2
-                st.session_state.dry_food_kcal_per_1000g = dry_food_kcal_per_1000g_s2
-                st.session_state.wet_food_kcal_per_100g = wet_food_kcal_per_100g_s2
-                st.session_state.dry_food_package_weight = dry_food_package_weight_s2
-                st.session_state.dry_food_package_price = dry_food_package_price_s2
-                st.session_state.wet_food_package_weight = wet_food_package_weight_s2
-                st.session_state.wet_food_package_price = wet_food_package_price_s2
-
-                der = st.session_state.der
-                dry_food_calories = (dry_food_grams_s2 / 1000.0) * dry_food_kcal_per_1000g_s2
-                wet_food_calories = (wet_food_grams_s2 / 100.0) * wet_food_kcal_per_100g_s2
-                total_intake = dry_food_calories + wet_food_calories
-                calorie_difference = total_intake - der
-
-                st.session_state.intake_analysis = {
-                    "dry_food_grams": dry_food_grams_s2, "dry_food_kcal": dry_food_calories,
-                    "wet_food_grams": wet_food_grams_s2, "wet_food_kcal": wet_food_calories,
-                    "total_intake": total_intake, "calorie_difference": calorie_difference
-                }
-                
-                # 計算伙食費
-                daily_dry_cost = 0.0
-                if dry_food_package_weight_s2 > 0:
-                    cost_per_gram_dry = dry_food_package_price_s2 / dry_food_package_weight_s2
-                    daily_dry_cost = dry_food_grams_s2 * cost_per_gram_dry
-                
-                daily_wet_cost = 0.0
-                if wet_food_package_weight_s2 > 0:
-                    cost_per_gram_wet = wet_food_package_price_s2 / wet_food_package_weight_s2
-                    daily_wet_cost = wet_food_grams_s2 * cost_per_gram_wet
-                
-                total_daily_cost = daily_dry_cost + daily_wet_cost
-                total_monthly_cost = total_daily_cost * 30 # 以30天計算每月
-
-                st.session_state.monthly_cost_info = {
-                    "daily_dry_cost": daily_dry_cost,
-                    "daily_wet_cost": daily_wet_cost,
-                    "total_daily_cost": total_daily_cost,
-                    "total_monthly_cost": total_monthly_cost
-                }
-                
-                # 顯示當前分析結果
-                st.subheader("📊 熱量攝取分析")
-                st.write(f"從乾乾攝取的熱量: **{dry_food_calories:.2f} 大卡**")
-                st.write(f"從濕食攝取的熱量: **{wet_food_calories:.2f} 大卡**")
-                st.success(f"貓咪每日總攝取熱量: **{total_intake:.2f} 大卡**")
-
-                st.markdown("---")
-                st.subheader("⚖️ 攝取與建議量比較")
-                st.write(f"每日建議攝取 (DER): **{der:.2f} 大卡**")
-                st.write(f"每日實際攝取: **{total_intake:.2f} 大卡**")
-
-                if calorie_difference > 5:
-                    st.warning(f"❗️ **攝取超標**：比建議值多了 **{calorie_difference:.2f} 大卡**。")
-                    st.info("提醒：長期熱量超標可能導致肥胖及相關健康問題，請考慮與獸醫師討論並調整餵食量。")
-                elif calorie_difference < -5:
-                    st.warning(f"❗️ **攝取不足**：比建議值少了 **{-calorie_difference:.2f} 大卡**。")
-                    st.info("提醒：長期熱量不足可能影響貓咪健康與活力，請確認是否需要增加餵食量或更換更高熱量的食物。")
-                else:
-                    st.balloons()
-                    st.success("🎉 **完美！** 貓咪的熱量攝取與建議值非常接近！")
-                
-                st.markdown("---")
-                st.subheader("💰 目前每月伙食費") # 修改標題
-                col_cost1, col_cost2 = st.columns(2)
-                col_cost1.metric("每日總花費", f"{total_daily_cost:.2f} 元")
-                col_cost2.metric("每月總花費", f"{total_monthly_cost:.2f} 元")
-                st.caption("此為根據您輸入的食物價格和每日餵食量估算，以30天計。")
-        
-        # 只有在分析完成後才顯示「下一步」按鈕
-        if st.session_state.intake_analysis is not None:
-            st.markdown("---")
-            if st.button("➡️ 進入第三步：規劃飲食建議", key="next_step2_btn"):
-                st.session_state.current_step = 3
-                st.rerun()
+        intake_panel()
 
 
     # --- 步驟 3: 規劃飲食建議 ---
-    elif st.session_state.current_step == 3:
+    elif model.current_step == 3:
         st.header("🥗 第三步：規劃飲食建議")
         st.info("根據建議熱量，規劃理想的乾濕食比例與餵食量。")
 
         # 返回上一步按鈕
         if st.button("◀️ 返回第二步", key="back_to_step2"):
-            st.session_state.current_step = 2
+            model.current_step = 2
             st.rerun()
 
         st.markdown("---") # 分隔線
 
-        if st.session_state.der is None:
+        if model.der is None:
             st.warning("⚠️ 請先返回第一步，完成貓咪的每日建議熱量 (DER) 計算。")
-        elif st.session_state.dry_food_kcal_per_1000g == 0 and st.session_state.wet_food_kcal_per_100g == 0:
+        elif not model.food.has_kcal_info:
             st.warning("⚠️ 請返回第二步，輸入至少一種食物的熱量資訊，才能進行餵食量建議。")
         else:
-            st.subheader("設定乾濕食熱量比例")
-            wet_food_percentage_s3 = st.slider(
-                "希望「濕食」提供的熱量佔每日總熱量的百分比 (%)",
-                min_value=0, max_value=100, value=st.session_state.wet_food_percentage_plan, step=5, key="wet_food_percentage_s3"
-            )
-            st.session_state.wet_food_percentage_plan = wet_food_percentage_s3 # 保存值
-
-            st.markdown("---")
-            # 步驟3的「計算」按鈕
-            if st.button("✅ 產生建議餵食量", key="generate_plan_s3_btn"):
-                der = st.session_state.der
-                target_wet_calories = der * (wet_food_percentage_s3 / 100.0)
-                target_dry_calories = der * ((100 - wet_food_percentage_s3) / 100.0)
-
-                required_dry_grams = 0.0
-                if st.session_state.dry_food_kcal_per_1000g > 0:
-                    required_dry_grams = (target_dry_calories / st.session_state.dry_food_kcal_per_1000g) * 1000.0
-                
-                required_wet_grams = 0.0
-                if st.session_state.wet_food_kcal_per_100g > 0:
-                    required_wet_grams = (target_wet_calories / st.session_state.wet_food_kcal_per_100g) * 100.0
-
-                st.session_state.feeding_plan = {
-                    "wet_food_percentage": wet_food_percentage_s3,
-                    "required_dry_grams": required_dry_grams,
-                    "required_wet_grams": required_wet_grams,
-                    "target_kcal": der
-                }
-
-                # 顯示當前計畫結果
-                st.subheader("🍽️ 每日建議餵食量")
-                st.info(f"為了達到每日 **{der:.2f} 大卡** 的目標：")
-                
-                col_rec_1, col_rec_2 = st.columns(2)
-                with col_rec_1:
-                    st.metric(label="乾食 (乾乾)", value=f"{required_dry_grams:.1f} 公克")
-                with col_rec_2:
-                    st.metric(label="濕食 (主食罐)", value=f"{required_wet_grams:.1f} 公克")
-
-                st.caption(f"此建議是基於 {100-wet_food_percentage_s3}% 乾食與 {wet_food_percentage_s3}% 濕食的熱量佔比所計算。請在 1-2 週內密切觀察貓咪的體重和身體狀況，並與您的獸醫師討論，視情況微調餵食量。")
-        
-        # 只有在計畫生成後才顯示「下一步」按鈕
-        if st.session_state.feeding_plan is not None:
-            st.markdown("---")
-            if st.button("➡️ 進入第四步：飲食報告總覽", key="next_step3_btn"):
-                st.session_state.current_step = 4
-                st.rerun()
+            plan_panel()
 
 
     # --- 步驟 4: 飲食報告總覽 ---
-    elif st.session_state.current_step == 4:
+    elif model.current_step == 4:
         st.header("📄 第四步：飲食報告總覽")
         st.info("這是為您的貓咪生成的完整飲食報告。")
 
         # 返回上一步按鈕
         if st.button("◀️ 返回第三步", key="back_to_step3"):
-            st.session_state.current_step = 3
+            model.current_step = 3
             st.rerun()
 
         st.markdown("---") # 分隔線
 
         # 檢查所有必要數據是否存在，否則提示用戶從頭開始
-        if (st.session_state.der_info.get('der') is None or
-            st.session_state.intake_analysis is None or
-            st.session_state.feeding_plan is None or
-            st.session_state.monthly_cost_info is None):
+        if not model.results.is_complete:
             st.warning("⚠️ 報告生成所需資訊不完整。請返回第一步開始填寫所有資訊。")
         else:
-            cat_info = st.session_state.get('cat_info', {})
-            der_info = st.session_state.get('der_info', {})
-            intake_analysis = st.session_state.get('intake_analysis')
-            feeding_plan = st.session_state.get('feeding_plan')
-            monthly_cost_info = st.session_state.get('monthly_cost_info')
-
-            st.subheader("🐾 貓咪基本資料")
-            col1, col2 = st.columns(2)
-            col1.metric("體重", f"{cat_info.get('weight', 0):.2f} 公斤")
-            col1.metric("BCS", f"{cat_info.get('bcs', 0)} / 9")
-            col2.metric("年齡", f"{cat_info.get('age_years', 0)} 歲 {cat_info.get('age_months', 0)} 個月")
-            col2.metric("絕育狀態", cat_info.get('is_neutered', '未知'))
-            if cat_info.get('is_pregnant', False) or cat_info.get('is_lactating', False):
-                special_status = []
-                if cat_info.get('is_pregnant', False): special_status.append("懷孕")
-                if cat_info.get('is_lactating', False): special_status.append("哺乳")
-                st.write(f"**特殊生理狀態**: {', '.join(special_status)}")
-            st.markdown("---")
-
-            st.subheader("📈 每日建議攝取")
-            st.metric("建議熱量 (DER)", f"{der_info.get('der', 0):.2f} 大卡/天")
-            st.markdown("---")
-
-            st.subheader("📊 目前飲食分析")
-            col1, col2 = st.columns(2)
-            col1.metric("每日總攝取熱量", f"{intake_analysis.get('total_intake', 0):.2f} 大卡")
-            diff = intake_analysis.get('calorie_difference', 0)
-            if diff > 5:
-                delta_text = f"+{diff:.2f} 大卡"
-                delta_color = "inverse"
-            elif diff < -5:
-                delta_text = f"{diff:.2f} 大卡"
-                delta_color = "off"
-            else:
-                delta_text = "接近理想"
-                delta_color = "normal"
-            col2.metric("與建議量差異", f"{diff:+.2f} 大卡", delta=delta_text, delta_color=delta_color)
-            st.markdown("---")
-
-            # 將伙食費顯示在飲食分析後面
-            if monthly_cost_info:
-                st.subheader("💰 目前每月伙食費") # 修改標題
-                col1, col2 = st.columns(2)
-                col1.metric("每日總花費", f"{monthly_cost_info.get('total_daily_cost', 0):.2f} 元")
-                col2.metric("每月總花費", f"{monthly_cost_info.get('total_monthly_cost', 0):.2f} 元")
-                st.caption("此為根據您輸入的食物價格和每日餵食量估算，以30天計。")
-                st.markdown("---")
-
-            st.subheader("🥗 建議餵食計畫")
-            st.write(f"基於 **{100 - feeding_plan.get('wet_food_percentage', 0)}% 乾食** 與 **{feeding_plan.get('wet_food_percentage', 0)}% 濕食** 的熱量佔比，目標約 **{feeding_plan.get('target_kcal', 0):.0f} 大卡/天**")
-            col1, col2 = st.columns(2)
-            col1.metric("建議乾食餵食量", f"{feeding_plan.get('required_dry_grams', 0):.1f} 公克/天")
-            col2.metric("建議濕食餵食量", f"{feeding_plan.get('required_wet_grams', 0):.1f} 公克/天")
-            st.caption("此為粗略建議，請諮詢獸醫獲取精確處方糧或食譜。")
-            st.markdown("---")
-            
-            st.subheader("📄 一鍵複製飲食報告")
-            
-            # 調整 generate_text_report 的參數順序
-            full_report_text = generate_text_report(cat_info, der_info, intake_analysis, monthly_cost_info, feeding_plan)
-            
-            st.code(full_report_text, language="text")
-            
-            st.info("💡 點擊上方報告內容區塊右上角的複製按鈕，即可將報告內容複製到剪貼簿。")
-            
-            st.markdown("---")
-            # 重設按鈕
-            if st.button("🔄 重新開始計算", key="reset_app"):
-                st.session_state.current_step = 1
-                # 清除所有相關的 session_state 數據
-                for key in ['der', 'cat_info', 'der_info', 'intake_analysis', 'feeding_plan', 'monthly_cost_info',
-                            'dry_food_grams', 'wet_food_grams',
-                            'dry_food_kcal_per_1000g', 'wet_food_kcal_per_100g',
-                            'dry_food_package_weight', 'dry_food_package_price',
-                            'wet_food_package_weight', 'wet_food_package_price',
-                            'wet_food_percentage_plan']:
-                    if key in st.session_state:
-                        del st.session_state[key]
-                st.rerun()
+            report_panel(model)
 
 
 if __name__ == "__main__":